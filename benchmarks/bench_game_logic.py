@@ -0,0 +1,135 @@
+"""Microbenchmark du moteur de jeu : bitboards contre l'ancienne version chaîne.
+
+L'ancienne version de handle_move recopiait le plateau (list/join) puis
+parcourait lignes, colonnes et diagonales de la chaîne à chaque coup. Le
+moteur de server/jeu/game_logic.py pose un bit et ne teste que les masques
+passant par la case jouée.
+
+Vérifie d'abord que les deux donnent le même résultat sur toutes les
+positions atteignables du morpion, puis mesure le coût par coup sur des
+parties aléatoires, et le coût d'un test de fin sur des plateaux plus grands.
+
+Usage : python benchmarks/bench_game_logic.py [--games 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+from jeu import game_logic  # noqa: E402
+
+
+def legacy_check_game_end(board):
+    """check_game_end d'origine, sur une chaîne de 9 caractères"""
+    for i in range(0, 9, 3):
+        if board[i] == board[i+1] == board[i+2] != ' ':
+            return True, 1 if board[i] == 'X' else 2
+    for i in range(3):
+        if board[i] == board[i+3] == board[i+6] != ' ':
+            return True, 1 if board[i] == 'X' else 2
+    if board[0] == board[4] == board[8] != ' ':
+        return True, 1 if board[0] == 'X' else 2
+    if board[2] == board[4] == board[6] != ' ':
+        return True, 1 if board[2] == 'X' else 2
+    if ' ' not in board:
+        return True, 0
+    return False, None
+
+
+def legacy_play(board, player_number, index):
+    """Chemin d'un coup dans l'ancien handle_move"""
+    cells = list(board)
+    cells[index] = 'X' if player_number == 1 else 'O'
+    board = ''.join(cells)
+    return board, legacy_check_game_end(board)
+
+
+def check_all_positions(rules):
+    """Parcourt toutes les parties possibles et compare les deux moteurs"""
+    seen = 0
+
+    def explore(board, stones, player_number):
+        nonlocal seen
+        for index in range(9):
+            if board[index] != ' ':
+                continue
+            new_stones = list(stones)
+            new_board, expected = legacy_play(board, player_number, index)
+            assert rules.play(new_stones, player_number, index) == expected, new_board
+            assert rules.game_end(new_stones) == expected, new_board
+            assert rules.to_string(new_stones) == new_board
+            seen += 1
+            if not expected[0]:
+                explore(new_board, new_stones, 3 - player_number)
+
+    explore(' ' * 9, [0, 0], 1)
+    return seen
+
+
+def random_games(count, cells, rng):
+    games = []
+    for _ in range(count):
+        order = list(range(cells))
+        rng.shuffle(order)
+        games.append(order)
+    return games
+
+
+def bench_legacy(games):
+    moves = 0
+    start = time.perf_counter()
+    for order in games:
+        board = ' ' * 9
+        player_number = 1
+        for index in order:
+            board, (is_over, _) = legacy_play(board, player_number, index)
+            moves += 1
+            if is_over:
+                break
+            player_number = 3 - player_number
+    return (time.perf_counter() - start) / moves * 1e9
+
+
+def bench_bitboard(rules, games):
+    moves = 0
+    start = time.perf_counter()
+    for order in games:
+        stones = [0, 0]
+        player_number = 1
+        for index in order:
+            is_over, _ = rules.play(stones, player_number, index)
+            moves += 1
+            if is_over:
+                break
+            player_number = 3 - player_number
+    return (time.perf_counter() - start) / moves * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    rules = game_logic.TIC_TAC_TOE
+
+    print(f"Positions vérifiées : {check_all_positions(rules)} (identiques)")
+
+    games = random_games(args.games, 9, rng)
+    legacy = bench_legacy(games)
+    bitboard = bench_bitboard(rules, games)
+    print(f"Coup + test de fin, 3×3 : chaîne {legacy:.0f} ns, bitboard {bitboard:.0f} ns "
+          f"(x{legacy / bitboard:.1f})")
+
+    print(f"{'plateau':>10}{'k':>4}{'masques':>10}{'par case':>10}{'ns/coup':>10}")
+    for size, k in ((3, 3), (7, 4), (15, 5), (19, 5)):
+        board_rules = game_logic.Rules(size, k)
+        per_cell = max(map(len, board_rules.masks_by_cell))
+        cost = bench_bitboard(board_rules, random_games(max(args.games // size ** 2, 100), size * size, rng))
+        print(f"{f'{size}×{size}':>10}{k:>4}{len(board_rules.win_masks):>10}{per_cell:>10}{cost:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
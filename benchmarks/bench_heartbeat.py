@@ -0,0 +1,90 @@
+"""Coût des battements de cœur selon le nombre de connexions.
+
+N sessions factices ont négocié 'heartbeat' et répondent immédiatement à
+chaque ping. La roue de temporisation du serveur tourne pendant quelques
+intervalles : on mesure le temps CPU par session et par intervalle, la
+mémoire de surveillance par session (tracemalloc) et l'écart entre
+l'intervalle demandé et l'intervalle réel entre deux pings. Les trois
+doivent rester stables quand N augmente.
+
+Usage : python benchmarks/bench_heartbeat.py [--sessions 1000,10000,100000]
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import server  # noqa: E402
+from timer_wheel import TimerWheel  # noqa: E402
+from bench_suite import MemoryConnection, player  # noqa: E402
+
+
+class PongConnection(MemoryConnection):
+    """Connexion en mémoire dont le client répond au ping sans délai"""
+
+    def __init__(self):
+        super().__init__(features=('heartbeat',))
+        self.pings = []
+
+    def send(self, message, kind='message'):
+        now = time.monotonic()
+        self.pings.append(now)
+        self.last_seen = now  # PONG immédiat
+        return super().send(message, kind)
+
+
+def thread_cpu(thread_id):
+    return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+
+
+def run(count, interval, intervals):
+    server.HEARTBEAT_INTERVAL = interval
+    server.HEARTBEAT_TIMEOUT = 3 * interval
+    server.timers = TimerWheel(tick=interval / 20)
+
+    sessions = [player(f"p{index}", PongConnection(), index) for index in range(count)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for session in sessions:
+        server.watch_session(session)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    watch_bytes = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+
+    # La mise en place sous tracemalloc est lente : le silence compte d'ici
+    now = time.monotonic()
+    for session in sessions:
+        session.conn.last_seen = now
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        server.timers.start()
+        cpu_start = thread_cpu(server.timers.thread.ident)
+        time.sleep(interval * intervals)
+        cpu = thread_cpu(server.timers.thread.ident) - cpu_start
+        server.timers.stop()
+
+    gaps = [b - a for session in sessions for a, b in zip(session.conn.pings, session.conn.pings[1:])]
+    pings = sum(len(session.conn.pings) for session in sessions)
+    mean_gap = sum(gaps) / len(gaps) if gaps else float('nan')
+    return cpu / (count * intervals) * 1e6, watch_bytes / count, pings, mean_gap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', default='1000,10000,100000')
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--intervals', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"intervalle {args.interval} s, {args.intervals} intervalles")
+    print(f"{'sessions':>9}{'CPU/session/intervalle':>24}{'mémoire/session':>17}{'pings':>9}{'écart moyen':>13}")
+    for count in [int(size) for size in args.sessions.split(',')]:
+        cpu, memory, pings, gap = run(count, args.interval, args.intervals)
+        print(f"{count:>9}{cpu:>22.2f}µs{memory:>15.0f} o{pings:>9}{gap:>11.3f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Benchmark de la file d'attente du matchmaking.
+
+Compare l'ancienne file (liste reconstruite à chaque passage, pop(0)) à la
+file actuelle (OrderedDict + Condition) avec 50 000 joueurs en attente, puis
+mesure le temps d'appariement réel du thread matchmaking() du serveur.
+
+Usage : python benchmarks/bench_matchmaking.py [--players 50000]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import server  # noqa: E402
+from bench_suite import MemoryConnection, player  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench_legacy_list(n, pairs, departures):
+    """Ancienne file : liste filtrée avant chaque appariement, pop(0)"""
+    queue = [('127.0.0.1', i, f"p{i}", MemoryConnection()) for i in range(n)]
+
+    start = time.process_time()
+    for conn in random.sample([e[3] for e in queue], departures):
+        queue[:] = [e for e in queue if e[3] != conn]
+    leave_cost = (time.process_time() - start) / departures
+
+    start = time.process_time()
+    for _ in range(pairs):
+        queue[:] = [e for e in queue if e[3].fileno() != -1]
+        queue.pop(0)
+        queue.pop(0)
+    pair_cost = (time.process_time() - start) / pairs
+    return leave_cost, pair_cost
+
+
+def bench_ordered_dict(n, pairs, departures):
+    """File actuelle : OrderedDict indexé par session"""
+    sessions = [player(f"p{i}", port=i) for i in range(n)]
+    queue = OrderedDict((s, None) for s in sessions)
+
+    start = time.process_time()
+    for s in random.sample(sessions, departures):
+        queue.pop(s, None)
+    leave_cost = (time.process_time() - start) / departures
+
+    start = time.process_time()
+    for _ in range(pairs):
+        queue.popitem(last=False)
+        queue.popitem(last=False)
+    pair_cost = (time.process_time() - start) / pairs
+    return leave_cost, pair_cost
+
+
+def bench_live_matchmaking(n, samples):
+    """Mesure le thread matchmaking() du serveur : vidage d'une file de n
+    joueurs arrivés d'un coup, puis délai d'appariement d'arrivées espacées"""
+    # On isole la file : pas d'envoi réseau ni de délai de notification
+    server.notify_players_match_found = lambda match_id, match: None
+    assigned = {}
+    done = threading.Event()
+
+    class TimedSession(server.PlayerSession):
+        def assign_match(self, match_id, player_number):
+            assigned[self] = time.perf_counter()
+            super().assign_match(match_id, player_number)
+            if len(assigned) == expected[0]:
+                done.set()
+
+    threading.Thread(target=server.matchmaking, daemon=True).start()
+
+    # 1. n joueurs arrivent en même temps
+    sessions = [TimedSession(MemoryConnection(), ('127.0.0.1', i), f"p{i}") for i in range(n)]
+    expected = [n - (n % 2)]
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with server.queue_lock:
+        for s in sessions:
+            server.enqueue_player(s)
+    done.wait()
+    burst = (time.perf_counter() - wall_start, time.process_time() - cpu_start)
+
+    # 2. Arrivées par paires sur une file vide
+    latencies = []
+    for i in range(samples):
+        done.clear()
+        expected[0] += 2
+        pair = [TimedSession(MemoryConnection(), ('127.0.0.1', i), f"q{i}") for _ in range(2)]
+        with server.queue_lock:
+            server.enqueue_player(pair[0])
+            server.enqueue_player(pair[1])
+            arrival = time.perf_counter()
+        done.wait()
+        latencies.append((assigned[pair[1]] - arrival) * 1000)
+    return burst, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=50000)
+    parser.add_argument('--legacy-pairs', type=int, default=200,
+                        help="paires mesurées sur l'ancienne file (coût en O(n) chacune)")
+    parser.add_argument('--samples', type=int, default=2000,
+                        help="paires arrivant sur une file vide pour le délai d'appariement")
+    args = parser.parse_args()
+    n = args.players
+
+    print(f"== File d'attente avec {n} joueurs ==")
+    legacy_leave, legacy_pair = bench_legacy_list(n, args.legacy_pairs, 200)
+    new_leave, new_pair = bench_ordered_dict(n, n // 2 - 200, 200)
+    print(f"{'':22}{'liste':>14}{'OrderedDict':>14}")
+    print(f"{'départ (µs)':22}{legacy_leave * 1e6:14.1f}{new_leave * 1e6:14.2f}")
+    print(f"{'appariement (µs)':22}{legacy_pair * 1e6:14.1f}{new_pair * 1e6:14.2f}")
+    print(f"Vider la file (CPU estimé) : liste {legacy_pair * n / 2:.1f} s, "
+          f"OrderedDict {new_pair * n / 2:.3f} s")
+
+    print(f"\n== matchmaking() réel ==")
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        (wall, cpu), latencies = bench_live_matchmaking(n, args.samples)
+    print(f"{n} joueurs arrivés d'un coup : {n // 2} matchs en {wall:.2f} s (CPU {cpu:.2f} s)")
+    print(f"délai d'appariement ({args.samples} paires) : p50 {percentile(latencies, 50):.3f} ms, "
+          f"p99 {percentile(latencies, 99):.3f} ms, max {max(latencies):.3f} ms")
+    print("(l'ancienne boucle attendait 1 s entre deux passages : ~500 ms en moyenne)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark de la persistance en arrière-plan (server/jeu/database.py).
+
+1. Débit soutenu : des threads enregistrent des tours aussi vite que
+   possible ; on mesure les tours écrits par seconde par l'écrivain groupé,
+   comparés à un INSERT + COMMIT par tour (écriture synchrone naïve).
+2. Latence d'un coup : server.handle_move est chronométré sans persistance,
+   puis avec l'écrivain actif ; la dernière ligne donne le surcoût mesuré.
+   Le coup ne fait que déposer des tuples bruts, mais l'écrivain dispute
+   le GIL au thread du coup pendant qu'il construit ses lots : c'est
+   surtout la queue de distribution (p99) qui s'en ressent.
+
+Usage : python benchmarks/bench_persistence.py [--turns 200000]
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import server  # noqa: E402
+from jeu import database  # noqa: E402
+from bench_suite import GAME, player  # noqa: E402
+
+
+def naive_turns_per_second(path, turns):
+    """Un INSERT puis un COMMIT par tour, sur le thread appelant"""
+    db = database.connect(path)
+    start = time.perf_counter()
+    for index in range(turns):
+        db.execute("BEGIN")
+        db.execute(database.INSERT_TURN, (index, 1, '00'))
+        db.execute("COMMIT")
+    elapsed = time.perf_counter() - start
+    db.close()
+    return turns / elapsed
+
+
+def write_behind_turns_per_second(path, turns, producers):
+    recorder = database.MatchRecorder(path, max_pending=turns + 1)
+    per_producer = turns // producers
+
+    def produce(offset):
+        for index in range(per_producer):
+            recorder.record_turn(offset + index, 1, '00')
+
+    threads = [threading.Thread(target=produce, args=(i * per_producer,)) for i in range(producers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    enqueued = time.perf_counter() - start
+    recorder.flush()
+    elapsed = time.perf_counter() - start
+    metrics = recorder.metrics()
+    recorder.close()
+    return metrics['written'] / elapsed, per_producer * producers / enqueued, metrics
+
+
+def move_latencies(matches, rounds):
+    """Durée (µs) de chaque appel à handle_move"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        server.matches.clear()
+        match_ids = []
+        with server.queue_lock:
+            for index in range(matches):
+                match_id, match = server.create_match(player(f"p{2 * index}", port=10000 + 2 * index),
+                                                      player(f"p{2 * index + 1}", port=10001 + 2 * index))
+                match['started'] = True
+                match_ids.append(match_id)
+
+        latencies = []
+        for _ in range(rounds):
+            for match_id in match_ids:
+                for player_number, cell in GAME:
+                    start = time.perf_counter()
+                    server.handle_move(match_id, player_number, cell)
+                    latencies.append(time.perf_counter() - start)
+                match = server.matches[match_id]
+                match.update(stones=[0, 0], current_turn=1, is_finished=False, winner=None)
+    return [latency * 1e6 for latency in latencies]
+
+
+def percentiles(values):
+    ordered = sorted(values)
+    return (statistics.median(ordered), ordered[int(len(ordered) * 0.99)], ordered[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=200000)
+    parser.add_argument('--naive-turns', type=int, default=5000)
+    parser.add_argument('--producers', type=int, default=4)
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        naive = naive_turns_per_second(os.path.join(tmp, 'naive.db'), args.naive_turns)
+        written, enqueue_rate, metrics = write_behind_turns_per_second(
+            os.path.join(tmp, 'behind.db'), args.turns, args.producers)
+        print(f"Tours persistés/s, un commit par tour : {naive:>10.0f}")
+        print(f"Tours persistés/s, écriture groupée   : {written:>10.0f} "
+              f"({metrics['batches']} transactions, commit moyen {metrics['avg_commit_ms']:.2f} ms)")
+        print(f"Tours déposés/s par {args.producers} threads      : {enqueue_rate:>10.0f}")
+
+        server.recorder = None
+        base = percentiles(move_latencies(args.matches, args.rounds))
+        server.recorder = database.MatchRecorder(os.path.join(tmp, 'server.db'))
+        with_db = percentiles(move_latencies(args.matches, args.rounds))
+        server.recorder.flush()
+        metrics = server.recorder.metrics()
+        server.recorder.close()
+        server.recorder = None
+
+    print(f"\nLatence de handle_move (µs) {'médiane':>10}{'p99':>10}{'max':>10}")
+    print(f"{'sans persistance':<28}{base[0]:>10.1f}{base[1]:>10.1f}{base[2]:>10.1f}")
+    print(f"{'avec écrivain groupé':<28}{with_db[0]:>10.1f}{with_db[1]:>10.1f}{with_db[2]:>10.1f}")
+    print(f"{'surcoût de la persistance':<28}{with_db[0] - base[0]:>+10.1f}{with_db[1] - base[1]:>+10.1f}")
+    print(f"Événements écrits : {metrics['written']}, abandonnés : {metrics['dropped']}")
+
+
+if __name__ == '__main__':
+    main()
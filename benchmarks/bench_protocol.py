@@ -0,0 +1,134 @@
+"""Fuzz et débit du décodeur de trames de shared/protocol.py.
+
+1. Fuzz : un flux de trames aléatoires est découpé en morceaux de tailles
+   aléatoires (demi-trames, trames collées) et doit être reconstitué à
+   l'identique ; une trame trop longue doit lever ProtocolError.
+2. Débit : FrameDecoder (recv_into dans un tampon réutilisé) contre l'ancien
+   découpage du client (concaténation de str puis split('\\n', 1)).
+
+Usage : python benchmarks/bench_protocol.py [--frames 200000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared import protocol  # noqa: E402
+
+
+def random_frames(count, rng, blobs=True):
+    frames = []
+    for _ in range(count):
+        kind = rng.random() if blobs else rng.random() * 0.9
+        if kind < 0.4:
+            frames.append(f"MOVE:{rng.randrange(3)}{rng.randrange(3)}".encode())
+        elif kind < 0.9:
+            frames.append(json.dumps({
+                'type': 'game_state',
+                'board': ''.join(rng.choice(' XO') for _ in range(9)),
+                'current_turn': rng.choice([1, 2]),
+                'is_finished': False,
+                'winner': None
+            }).encode())
+        else:
+            size = rng.randrange(0, protocol.MAX_FRAME_SIZE + 1)
+            frames.append(bytes(rng.choice(b'abcXO: {}') for _ in range(size)))
+    return frames
+
+
+def split_stream(stream, rng):
+    """Découpe le flux en morceaux de 1 octet à 3 trames de long"""
+    chunks = []
+    pos = 0
+    while pos < len(stream):
+        size = rng.choice([1, 2, 7, 64, 1024, rng.randrange(1, 16384)])
+        chunks.append(stream[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def decode_chunks(decoder, chunks):
+    """Simule recv_into : chaque morceau est copié dans le tampon du décodeur"""
+    out = []
+    for chunk in chunks:
+        view = memoryview(chunk)
+        while view:
+            buffer = decoder.get_buffer()
+            n = min(len(buffer), len(view))
+            buffer[:n] = view[:n]
+            decoder.buffer_updated(n)
+            view = view[n:]
+            out.extend(decoder.frames())
+    return out
+
+
+def fuzz(rounds, rng):
+    for _ in range(rounds):
+        frames = random_frames(rng.randrange(1, 300), rng)
+        stream = b''.join(protocol.encode_frame(f) for f in frames)
+        decoded = decode_chunks(protocol.FrameDecoder(), split_stream(stream, rng))
+        assert decoded == frames, "trames reconstituées différentes"
+
+    # Trame trop longue, reçue d'un coup ou par morceaux
+    oversized = b'x' * (protocol.MAX_FRAME_SIZE + 1) + b'\n'
+    for chunks in ([oversized], split_stream(oversized, rng)):
+        try:
+            decode_chunks(protocol.FrameDecoder(), chunks)
+        except protocol.ProtocolError:
+            pass
+        else:
+            raise AssertionError("trame trop longue acceptée")
+    print(f"fuzz : {rounds} flux reconstitués, trames trop longues rejetées")
+
+
+def legacy_decode(chunks):
+    """Découpage historique de listen_to_server"""
+    out = []
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.decode()
+        while '\n' in buffer:
+            line, buffer = buffer.split('\n', 1)
+            if line.strip():
+                out.append(line.strip())
+    return out
+
+
+def throughput(count, chunk_size, rng):
+    frames = random_frames(count, rng, blobs=False)
+    stream = b''.join(protocol.encode_frame(f) for f in frames)
+    chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+    start = time.perf_counter()
+    legacy = legacy_decode(chunks)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = decode_chunks(protocol.FrameDecoder(), chunks)
+    decoder_time = time.perf_counter() - start
+
+    assert len(legacy) == len(decoded) == len(frames)
+    mb = len(stream) / 1e6
+    print(f"morceaux de {chunk_size:>6} o : ancien {mb / legacy_time:7.1f} Mo/s, "
+          f"FrameDecoder {mb / decoder_time:7.1f} Mo/s "
+          f"({len(frames) / decoder_time / 1e6:.2f} M trames/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=200000)
+    parser.add_argument('--rounds', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    fuzz(args.rounds, rng)
+    for chunk_size in (1024, 65536):
+        throughput(args.frames, chunk_size, rng)
+
+
+if __name__ == '__main__':
+    main()
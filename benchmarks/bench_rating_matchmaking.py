@@ -0,0 +1,121 @@
+"""Simulation du matchmaking par classement (server/jeu/rating.py).
+
+Horloge simulée : N joueurs sont déjà en file au départ, puis N/10 joueurs
+arrivent chaque seconde pendant --duration secondes ; les classements
+suivent une loi normale (1500, 300). Le matchmaking passe tous les --tick
+secondes, comme le thread du serveur réveillé par les arrivées.
+
+Pour chaque réglage de l'écart initial, affiche la qualité des matchs
+(écart de classement) et le temps d'attente avant appariement, à comparer
+au FIFO (appariement immédiat de deux arrivées quelconques). Mesure aussi le
+coût d'une recherche du plus proche adversaire dans le pool, comparé à un
+parcours de toute la file.
+
+Usage : python benchmarks/bench_rating_matchmaking.py [--players 10000,100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+from jeu import rating  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def arrivals(count, rate, duration, rng):
+    """(date d'arrivée, classement) : count joueurs à t=0 puis rate par seconde"""
+    players = [(0.0, rng.gauss(1500, 300)) for _ in range(count)]
+    for index in range(int(rate * duration)):
+        players.append((index / rate, rng.gauss(1500, 300)))
+    return players
+
+
+def simulate_fifo(players):
+    """Deux arrivées successives forment un match, sans attente"""
+    gaps = [abs(a[1] - b[1]) for a, b in zip(players[0::2], players[1::2])]
+    return gaps, [0.0] * len(gaps), 0.0
+
+
+def simulate_rating(players, tick, initial_gap, widen_by, widen_every):
+    pool = rating.RatingPool(initial_gap, widen_by, widen_every)
+    arrived = {}
+    gaps, waits = [], []
+    cpu = 0.0
+    position = 0
+    now = 0.0
+    end = players[-1][0] + 120.0
+    while now <= end and (position < len(players) or len(pool) > 1):
+        start = time.perf_counter()
+        while position < len(players) and players[position][0] <= now:
+            arrived[position] = players[position][0]
+            pool.add(position, players[position][1], players[position][0])
+            position += 1
+        pairs = pool.pop_pairs(now)
+        cpu += time.perf_counter() - start
+        for first, second, gap in pairs:
+            gaps.append(gap)
+            waits.append(now - arrived.pop(first))
+            waits.append(now - arrived.pop(second))
+        now += tick
+    return gaps, waits, cpu / max(1, len(gaps))
+
+
+def search_costs(count, rng, samples=200):
+    """Coût (µs) d'une recherche du plus proche : pool indexé et parcours"""
+    pool = rating.RatingPool()
+    ratings = [rng.gauss(1500, 300) for _ in range(count)]
+    for index, value in enumerate(ratings):
+        pool.add(index, value, 0.0)
+    probes = rng.sample(range(count), samples)
+
+    start = time.perf_counter()
+    for index in probes:
+        pool.nearest(index)
+    indexed = (time.perf_counter() - start) / samples
+
+    start = time.perf_counter()
+    for index in probes:
+        min((abs(value - ratings[index]), other) for other, value in enumerate(ratings) if other != index)
+    scan = (time.perf_counter() - start) / samples
+    return indexed * 1e6, scan * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', default='10000,100000', help="joueurs déjà en file au départ")
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--tick', type=float, default=0.1)
+    parser.add_argument('--gaps', default='25,50,100', help="écarts initiaux simulés")
+    parser.add_argument('--widen-by', type=float, default=50.0)
+    parser.add_argument('--widen-every', type=float, default=5.0)
+    args = parser.parse_args()
+
+    for count in [int(size) for size in args.players.split(',')]:
+        rng = random.Random(1)
+        players = arrivals(count, count / 10, args.duration, rng)
+        indexed, scan = search_costs(count, rng)
+        print(f"== {count} joueurs en file, {count // 10} arrivées/s pendant {args.duration:.0f} s ==")
+        print(f"plus proche adversaire : pool {indexed:.2f} µs, parcours de la file {scan:.0f} µs")
+        print(f"{'réglage':>22}{'matchs':>9}{'écart p50':>11}{'p90':>7}{'p99':>7}"
+              f"{'attente p50':>13}{'p90':>7}{'p99':>7}{'max':>7}{'CPU/match':>11}")
+        runs = [('fifo', simulate_fifo(players))]
+        for gap in [float(value) for value in args.gaps.split(',')]:
+            runs.append((f"rating ±{gap:.0f} +{args.widen_by:.0f}/{args.widen_every:.0f}s",
+                         simulate_rating(players, args.tick, gap, args.widen_by, args.widen_every)))
+        for name, (gaps, waits, cpu) in runs:
+            print(f"{name:>22}{len(gaps):>9}{percentile(gaps, 50):>11.1f}{percentile(gaps, 90):>7.1f}"
+                  f"{percentile(gaps, 99):>7.1f}{percentile(waits, 50):>12.1f}s{percentile(waits, 90):>6.1f}s"
+                  f"{percentile(waits, 99):>6.1f}s{max(waits):>6.1f}s{cpu * 1e6:>9.2f}µs")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Temps de reprise au démarrage en fonction de la taille de l'historique.
+
+Construit une base avec un historique de matchs terminés (des millions de
+lignes dans turns avec les valeurs par défaut) et quelques matchs en cours
+avec leurs instantanés, puis chronomètre MatchRecorder.load_unfinished() et
+la reconstruction des matchs par server.restore_matches(). Affiche aussi le
+plan des requêtes pour vérifier qu'aucune ne parcourt tout le journal.
+
+Vérifie enfin la reprise elle-même : des matchs joués par server.handle_move
+et interrompus après 1 à 8 coups sont restaurés, et leur plateau, leur
+séquence et le joueur au trait doivent être ceux du match interrompu.
+
+Usage : python benchmarks/bench_recovery.py [--history 300000] [--live 1000]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import server  # noqa: E402
+from jeu import database  # noqa: E402
+from bench_suite import MemoryConnection, reset_server  # noqa: E402
+
+MOVES = [f"{i}{j}" for i in range(3) for j in range(3)]
+# Partie nulle : aucun des 8 premiers coups ne termine le match
+DRAW = ['00', '01', '02', '11', '10', '12', '21', '20', '22']
+
+
+def fill(db, history, live, rng):
+    """history matchs terminés de 7 tours, puis live matchs interrompus"""
+    db.execute("BEGIN")
+    for match_id in range(1, history + 1):
+        db.execute(database.INSERT_MATCH, (match_id, '127.0.0.1', 1, '127.0.0.1', 2, ' ' * 9))
+        db.executemany(database.INSERT_TURN, [(match_id, 1 + k % 2, MOVES[k]) for k in range(7)])
+        db.execute(database.UPDATE_RESULT, ('XXXOO XO ', 1, match_id))
+    for match_id in range(history + 1, history + live + 1):
+        db.execute(database.INSERT_MATCH, (match_id, '127.0.0.1', 1, '127.0.0.1', 2, ' ' * 9))
+        order = rng.sample(range(9), 9)
+        played = [(1 + k % 2, MOVES[cell]) for k, cell in enumerate(order[:4])]
+        db.executemany(database.INSERT_TURN, [(match_id, p, m) for p, m in played])
+        # Instantané après 2 tours : 2 tours restent à rejouer
+        board = [' '] * 9
+        for k, cell in enumerate(order[:2]):
+            board[cell] = 'XO'[k % 2]
+        db.execute(database.SAVE_SNAPSHOT, (match_id, 2, ''.join(board), 1, f"a{match_id}", f"b{match_id}"))
+    db.execute("COMMIT")
+
+
+def check_resume(path):
+    """Joue puis interrompt un match par nombre de coups (1 à 8), le
+    restaure et compare avec l'état au moment de l'arrêt ; retourne les
+    écarts"""
+    reset_server()
+    server.recorder = database.MatchRecorder(path)
+    live = {}
+    for played in range(1, len(DRAW)):
+        p1 = server.PlayerSession(MemoryConnection(), ('127.0.0.1', 1), f"x{played}")
+        p2 = server.PlayerSession(MemoryConnection(), ('127.0.0.1', 2), f"o{played}")
+        match_id, match = server.create_match(p1, p2)
+        match['started'] = True
+        for turn, move in enumerate(DRAW[:played]):
+            server.handle_move(match_id, 1 + turn % 2, move)
+        live[match_id] = (match['seq'], server.GAME_RULES.to_string(match['stones']), match['current_turn'])
+    server.recorder.close()
+
+    reset_server()
+    server.recorder = database.MatchRecorder(path)
+    server.restore_matches()
+    server.recorder.close()
+    errors = []
+    for match_id, expected in live.items():
+        match = server.matches.get(match_id)
+        restored = None if match is None else (match['seq'], server.GAME_RULES.to_string(match['stones']),
+                                                match['current_turn'])
+        if restored != expected:
+            errors.append(f"match {match_id} : restauré {restored}, attendu {expected}")
+    return len(live), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history', type=int, default=300000,
+                        help="matchs terminés dans l'historique (7 tours chacun)")
+    parser.add_argument('--live', type=int, default=1000, help="matchs interrompus à reprendre")
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'recovery.db')
+        db = database.connect(path)
+        start = time.perf_counter()
+        fill(db, args.history, args.live, rng)
+        (turns,) = db.execute("SELECT COUNT(*) FROM turns").fetchone()
+        print(f"Base : {args.history + args.live} matchs, {turns} tours "
+              f"(remplie en {time.perf_counter() - start:.1f} s)")
+        for sql, params in ((database.SELECT_UNFINISHED, ()), (database.SELECT_TURNS_AFTER, (1, 2))):
+            plan = db.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            print("  plan : " + " | ".join(row[-1] for row in plan))
+        db.close()
+
+        server.recorder = database.MatchRecorder(path)
+        start = time.perf_counter()
+        unfinished = server.recorder.load_unfinished()
+        loaded = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            server.restore_matches()
+        rebuilt = time.perf_counter() - start
+        server.recorder.close()
+
+    print(f"Lecture des matchs en cours : {len(unfinished)} en {loaded * 1000:.1f} ms")
+    print(f"Reconstruction (instantané + tours suivants) : {len(server.matches)} en {rebuilt * 1000:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'resume.db')
+        database.connect(path).close()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            checked, errors = check_resume(path)
+    for error in errors:
+        print(f"[!] Reprise incorrecte, {error}")
+    print(f"Reprise : {checked - len(errors)} / {checked} matchs identiques au match interrompu")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
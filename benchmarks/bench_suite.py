@@ -0,0 +1,277 @@
+"""Suite de micro-benchmarks des chemins critiques du serveur.
+
+Chaque benchmark appelle directement les fonctions de server/server.py avec
+des connexions en mémoire (MemoryConnection : la vraie file d'envoi
+d'OutboundConnection, vidée sans socket), sans réseau ni thread :
+check_game_end, handle_move (avec et sans deltas), send_game_state,
+notify_players_match_found, l'appariement de matchmaking() et le rendu de
+la page de monitoring (nouvel instantané et première page) pour 10, 1 000
+et 100 000 matchs.
+
+Le résultat (meilleur temps par opération sur plusieurs répétitions) est
+comparé à une référence enregistrée : un écart au-delà de --threshold est
+signalé et le code de sortie vaut 1, ce qui permet de bloquer un
+déploiement. Une référence mesurée avec une autre version de Python ou sur
+une autre architecture n'est pas comparable : la suite refuse alors la
+comparaison (code de sortie 2) sauf avec --ignore-environment.
+
+Usage :
+    python benchmarks/bench_suite.py                 # compare à baseline.json
+    python benchmarks/bench_suite.py --save          # enregistre la référence
+    python benchmarks/bench_suite.py --filter handle_move --repeat 9
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'server'))
+import server  # noqa: E402
+import monitoring  # noqa: E402
+from timer_wheel import TimerWheel  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, 'baseline.json')
+
+# Partie gagnée par X en 5 coups : (joueur, case)
+GAME = [(1, '00'), (2, '10'), (1, '01'), (2, '11'), (1, '02')]
+
+BENCHMARKS = []
+
+
+def benchmark(name, sizes=(None,)):
+    """Enregistre setup(size) -> (opérations, run) ; setup est rappelé avant
+    chaque répétition, seul run() est chronométré"""
+    def register(setup):
+        for size in sizes:
+            BENCHMARKS.append((name if size is None else f"{name}[{size}]", setup, size))
+        return setup
+    return register
+
+
+class MemoryConnection(server.OutboundConnection):
+    """Connexion sans socket : la file d'envoi est vidée dès le dépôt"""
+
+    def __init__(self, wire_format='json', features=()):
+        super().__init__()
+        self.wire_format = wire_format
+        self.features = set(features)
+        self.sent_bytes = 0
+
+    def fileno(self):
+        return 1
+
+    def _wake_writer(self):
+        with self.outbox_lock:
+            self.sent_bytes += sum(len(data) for _, data in self.outbox)
+            self.outbox.clear()
+
+    def _abort(self):
+        pass
+
+
+def player(pseudo, conn=None, port=0):
+    """Vraie PlayerSession, sur une MemoryConnection par défaut : les autres
+    benchmarks s'en servent plutôt que de copier des sessions factices"""
+    return server.PlayerSession(conn if conn is not None else MemoryConnection(), ('127.0.0.1', port), pseudo)
+
+
+def reset_server():
+    """État vierge : pas de base, de cluster, ni d'échéance en attente"""
+    server.matches.clear()
+    server.queue.clear()
+    server.awaiting_reconnect.clear()
+    server.match_id_counter = 1
+    server.recorder = None
+    server.worker_node = None
+    server.MATCHMAKING_MODE = 'fifo'
+    server.timers = TimerWheel(tick=0.1)
+    server.status_board = monitoring.StatusBoard()
+
+
+def started_match(match_id, features=()):
+    match = server.new_match(match_id, MemoryConnection(features=features), MemoryConnection(features=features),
+                             f"a{match_id}", f"b{match_id}")
+    match['started'] = True
+    server.matches[match_id] = match
+    return match
+
+
+@benchmark('check_game_end')
+def setup_check_game_end(size):
+    rng = random.Random(1)
+    boards = []
+    for _ in range(1000):
+        cells = [' '] * 9
+        for turn, cell in enumerate(rng.sample(range(9), rng.randint(0, 9))):
+            cells[cell] = 'XO'[turn % 2]
+        boards.append(''.join(cells))
+
+    def run():
+        for board in boards:
+            server.check_game_end(board)
+    return len(boards), run
+
+
+def setup_handle_move(features):
+    reset_server()
+    match_ids = [started_match(match_id, features)['match_id'] for match_id in range(1, 201)]
+
+    def run():
+        for match_id in match_ids:
+            for player_number, cell in GAME:
+                server.handle_move(match_id, player_number, cell)
+    return len(match_ids) * len(GAME), run
+
+
+@benchmark('handle_move_state')
+def setup_handle_move_state(size):
+    return setup_handle_move(())
+
+
+@benchmark('handle_move_delta')
+def setup_handle_move_delta(size):
+    return setup_handle_move(('delta',))
+
+
+@benchmark('send_game_state')
+def setup_send_game_state(size):
+    reset_server()
+    match = started_match(1)
+
+    def run():
+        for _ in range(1000):
+            with match['lock']:
+                server.send_game_state(match)
+    return 1000, run
+
+
+@benchmark('notify_players_match_found')
+def setup_notify(size):
+    reset_server()
+    match = started_match(1)
+
+    def run():
+        for _ in range(1000):
+            server.notify_players_match_found(1, match)
+    return 1000, run
+
+
+@benchmark('matchmaking_pairing')
+def setup_pairing(size):
+    reset_server()
+    pairs = 1000
+    with server.queue_lock:
+        for index in range(2 * pairs):
+            server.enqueue_player(player(f"p{index}", port=index))
+
+    def run():
+        with server.queue_lock:
+            server.pair_waiting_players()
+    return pairs, run
+
+
+@benchmark('render_status_page', sizes=(10, 1000, 100000))
+def setup_status_page(size):
+    reset_server()
+    board = server.status_board
+    for match_id in range(1, size + 1):
+        board.match_created(match_id, f"a{match_id}", f"b{match_id}")
+        if match_id % 3 == 0:
+            board.match_status(match_id, monitoring.FINISHED, match_id % 3)
+    server.match_id_counter = size + 1
+    for index in range(50):
+        board.player_queued(index, f"p{index}", ('127.0.0.1', index), 1500.0)
+    # Un événement par tour : l'instantané doit recopier les listes
+    events = iter(range(size + 1, size + 1000))
+
+    def run():
+        board.match_created(next(events), "a", "b")
+        server.render_status_page(board.refresh(server.status_extras))
+    return 1, run
+
+
+def measure(setup, size, repeat):
+    """Temps par opération (µs) de chaque répétition, après un tour à vide ;
+    le ramasse-miettes est suspendu pendant la mesure"""
+    timings = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        setup(size)[1]()
+        for _ in range(repeat):
+            ops, run = setup(size)
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) / ops * 1e6)
+            finally:
+                gc.enable()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--filter', default='', help="ne lancer que les benchmarks dont le nom contient ce texte")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true', help="enregistrer les résultats comme référence")
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help="ralentissement toléré par rapport à la référence (0.20 = 20 %%)")
+    parser.add_argument('--ignore-environment', action='store_true',
+                        help="comparer même si la référence vient d'un autre Python ou d'une autre machine")
+    args = parser.parse_args()
+
+    baseline = {}
+    environment = {'python': platform.python_version(), 'machine': platform.machine()}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            saved = json.load(baseline_file)
+        mismatches = [f"{key} {saved.get(key)} (référence) != {value} (ici)"
+                      for key, value in environment.items() if saved.get(key) != value]
+        if mismatches and not args.ignore_environment:
+            print(f"[!] Référence {args.baseline} non comparable : {', '.join(mismatches)}")
+            print("[!] Enregistrer une référence ici avec --save, ou forcer avec --ignore-environment")
+            sys.exit(2)
+        for mismatch in mismatches:
+            print(f"[!] ATTENTION, environnement différent de la référence : {mismatch}")
+        baseline = saved['results']
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<32}{'meilleur':>12}{'médiane':>12}{'référence':>12}{'écart':>9}")
+    for name, setup, size in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        timings = measure(setup, size, args.repeat)
+        best, median = min(timings), statistics.median(timings)
+        results[name] = {'best_us': round(best, 3), 'median_us': round(median, 3)}
+        line = f"{name:<32}{best:>10.2f}µs{median:>10.2f}µs"
+        reference = baseline.get(name)
+        if reference is not None:
+            change = best / reference['best_us'] - 1
+            flag = ""
+            if change > args.threshold:
+                regressions.append(name)
+                flag = "  RÉGRESSION"
+            line += f"{reference['best_us']:>10.2f}µs{change:>+8.0%}{flag}"
+        print(line)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(dict(environment, results=results), baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f"Référence enregistrée dans {args.baseline}")
+    if regressions:
+        print(f"[!] {len(regressions)} régression(s) au-delà de {args.threshold:.0%} : {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
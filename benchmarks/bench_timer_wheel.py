@@ -0,0 +1,79 @@
+"""Coût des échéances de server/timer_wheel.py selon leur nombre.
+
+Pour N échéances en attente (matchs finis ou inactifs), mesure le coût de
+programmation, d'annulation et d'expiration par échéance, comparé à un
+balayage complet des matchs à chaque seconde (ce qu'aurait fait un thread
+de nettoyage qui parcourt matches). La roue utilise une horloge simulée.
+
+Usage : python benchmarks/bench_timer_wheel.py [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+from timer_wheel import TimerWheel  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def bench_wheel(count, rng):
+    clock = FakeClock()
+    wheel = TimerWheel(tick=0.1, slots=512, clock=clock)
+    expired = []
+    delays = [rng.uniform(1, 300) for _ in range(count)]
+
+    start = time.perf_counter()
+    timers = [wheel.schedule(delay, expired.append, index) for index, delay in enumerate(delays)]
+    schedule_cost = (time.perf_counter() - start) / count
+
+    cancelled = timers[::10]
+    start = time.perf_counter()
+    for timer in cancelled:
+        timer.cancel()
+    cancel_cost = (time.perf_counter() - start) / len(cancelled)
+
+    # Avance de 300 s par pas d'une seconde, comme le thread de la roue
+    start = time.perf_counter()
+    for _ in range(301):
+        clock.now += 1.0
+        wheel.advance()
+    expire_cost = (time.perf_counter() - start) / len(expired)
+    assert len(expired) == count - len(cancelled)
+    return schedule_cost, cancel_cost, expire_cost
+
+
+def bench_scan(count, rng):
+    """Balayage de tous les matchs à chaque seconde (coût par seconde)"""
+    deadlines = {index: rng.uniform(1, 300) for index in range(count)}
+    now = 150.0
+    start = time.perf_counter()
+    due = [match_id for match_id, deadline in deadlines.items() if deadline <= now]
+    assert due
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    print(f"{'échéances':>10}{'programmer':>12}{'annuler':>10}{'expirer':>10}{'balayage/s':>13}")
+    for count in [int(size) for size in args.sizes.split(',')]:
+        schedule_cost, cancel_cost, expire_cost = bench_wheel(count, rng)
+        scan = bench_scan(count, rng)
+        print(f"{count:>10}{schedule_cost * 1e6:>10.2f}µs{cancel_cost * 1e6:>8.2f}µs"
+              f"{expire_cost * 1e6:>8.2f}µs{scan * 1e3:>11.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Comparaison des formats de fil JSON et binaire de shared/protocol.py.
+
+Mesure, pour les messages du chemin chaud (état de jeu complet, delta
+envoyé après chaque coup, commande MOVE du client), la taille sur le fil et
+le coût d'encodage et de décodage.
+
+Usage : python benchmarks/bench_wire_format.py [--count 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared import protocol  # noqa: E402
+
+
+def random_states(count, rng):
+    states = []
+    for _ in range(count):
+        finished = rng.random() < 0.2
+        states.append({
+            'type': 'game_state',
+            'match_id': rng.randrange(1, 1_000_000),
+            'seq': rng.randrange(10),
+            'board': ''.join(rng.choice(' XO') for _ in range(9)),
+            'current_turn': rng.choice([1, 2]),
+            'is_finished': finished,
+            'winner': rng.choice([0, 1, 2]) if finished else None
+        })
+    return states
+
+
+def random_deltas(count, rng):
+    deltas = []
+    for state in random_states(count, rng):
+        delta = dict(state, type='game_delta', cell=rng.randrange(9), symbol=rng.choice('XO'))
+        del delta['board']
+        deltas.append(delta)
+    return deltas
+
+
+def payload(frame, wire_format):
+    """Retire l'encadrement, comme le fait FrameDecoder"""
+    return frame[2:] if wire_format == 'binary' else frame[:-1]
+
+
+def timed(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    states = random_states(args.count, rng)
+    deltas = random_deltas(args.count, rng)
+    moves = [f"MOVE:{rng.randrange(3)}{rng.randrange(3)}" for _ in range(args.count)]
+
+    print(f"{'':28}{'json':>12}{'binary':>12}")
+    results = {}
+    for wire_format in protocol.WIRE_FORMATS:
+        state_frames = [protocol.encode_message(s, wire_format) for s in states]
+        delta_frames = [protocol.encode_message(d, wire_format) for d in deltas]
+        delta_payloads = [payload(f, wire_format) for f in delta_frames]
+        move_frames = [protocol.encode_command(m, wire_format) for m in moves]
+        state_payloads = [payload(f, wire_format) for f in state_frames]
+        move_payloads = [payload(f, wire_format) for f in move_frames]
+        for a, b in zip(states[:1000], state_payloads):
+            assert protocol.decode_message(b, wire_format) == a
+        for a, b in zip(deltas[:1000], delta_payloads):
+            assert protocol.decode_message(b, wire_format) == a
+
+        results[wire_format] = {
+            'état : octets/message': sum(map(len, state_frames)) / len(state_frames),
+            'état : encodage (µs)': timed(lambda s: protocol.encode_message(s, wire_format), states),
+            'état : décodage (µs)': timed(lambda f: protocol.decode_message(f, wire_format), state_payloads),
+            'delta : octets/message': sum(map(len, delta_frames)) / len(delta_frames),
+            'delta : encodage (µs)': timed(lambda d: protocol.encode_message(d, wire_format), deltas),
+            'delta : décodage (µs)': timed(lambda f: protocol.decode_message(f, wire_format), delta_payloads),
+            'MOVE : octets/message': sum(map(len, move_frames)) / len(move_frames),
+            'MOVE : encodage (µs)': timed(lambda m: protocol.encode_command(m, wire_format), moves),
+            'MOVE : décodage (µs)': timed(lambda f: protocol.decode_command(f, wire_format), move_payloads),
+        }
+
+    for key in results['json']:
+        print(f"{key:28}{results['json'][key]:12.2f}{results['binary'][key]:12.2f}")
+
+    # Un coup = 1 commande reçue + 1 état (ou delta) envoyé aux 2 joueurs
+    for wire_format in protocol.WIRE_FORMATS:
+        r = results[wire_format]
+        for update in ('état', 'delta'):
+            wire = r['MOVE : octets/message'] + 2 * r[f'{update} : octets/message']
+            print(f"par coup ({wire_format}, {update}) : {wire:.0f} octets sur le fil")
+
+
+if __name__ == '__main__':
+    main()
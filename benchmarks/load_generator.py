@@ -0,0 +1,238 @@
+"""Générateur de charge : des milliers de joueurs simulés contre le serveur.
+
+Chaque bot est une tâche asyncio qui tient une session du client
+(client/game_logic.py : ClientSession sur un AsyncClient) : il joue un coup
+légal au hasard quand c'est son tour et se remet en file après chaque
+partie ; PONG et RESYNC sont gérés par la session. Tous les bots tournent
+dans ce seul processus, sans thread.
+
+Mesures : connexions par seconde, temps d'attente avant appariement (entrée
+en file ou NEW_GAME -> match_found), aller-retour d'un coup (MOVE -> état ou
+delta qui le contient), parties et coups par seconde, erreurs et
+déconnexions.
+
+Contre un serveur déjà lancé :
+    python benchmarks/load_generator.py --port 12345 --bots 2000
+ou en lançant server/server.py sur un port libre de localhost :
+    python benchmarks/load_generator.py --spawn --server-args="--mode asyncio"
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import shlex
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'client'))
+from shared import protocol  # noqa: E402
+from game_logic import AsyncClient, ClientSession  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Stats:
+    def __init__(self):
+        self.connect_times = []
+        self.connect_failures = 0
+        self.match_waits = []
+        self.move_rtts = []
+        self.games = 0
+        self.moves = 0
+        self.server_errors = 0
+        self.disconnects = 0
+        self.abandons = 0
+        self.resyncs = 0
+        self.protocol_errors = 0
+
+
+class Bot:
+    """Un joueur simulé ; run() se termine à la fin du test ou à la
+    déconnexion"""
+
+    def __init__(self, index, args, stats, rng):
+        self.args = args
+        self.stats = stats
+        self.rng = rng
+        wire_format = args.wire if args.wire != 'mixed' else ('json', 'binary')[index % 2]
+        features = [f for f in args.features.split(',') if f]
+        self.session = ClientSession(f"bot{index}", wire_format, features)
+        self.client = AsyncClient(self.session)
+        self.queued_at = None
+        self.move_sent_at = None
+
+    async def run(self, stop):
+        start = time.perf_counter()
+        try:
+            await self.client.connect(self.args.host, self.args.port)
+        except (OSError, asyncio.TimeoutError):
+            self.stats.connect_failures += 1
+            self.client.close()
+            return
+        self.stats.connect_times.append(time.perf_counter() - start)
+        self.queued_at = time.perf_counter()
+        try:
+            while not stop.is_set():
+                event = await self.client.next_event()
+                if event is None:
+                    if not stop.is_set():
+                        self.stats.disconnects += 1
+                    return
+                await self.handle(event)
+        except protocol.ProtocolError:
+            self.stats.protocol_errors += 1
+        except OSError:
+            if not stop.is_set():
+                self.stats.disconnects += 1
+        finally:
+            self.stats.resyncs += self.session.resyncs
+            self.client.close()
+
+    async def handle(self, event):
+        kind = event['type']
+        if kind == 'match_found':
+            self.stats.match_waits.append(time.perf_counter() - self.queued_at)
+            self.move_sent_at = None
+            await self.client.perform(self.session.ready)
+        elif kind in ('game_state', 'game_delta'):
+            await self.play(event)
+        elif kind == 'error':
+            self.stats.server_errors += 1
+            self.move_sent_at = None
+        elif kind == 'opponent_disconnected':
+            self.stats.abandons += 1
+            await self.requeue()
+
+    async def play(self, state):
+        """Après chaque état : mesure l'aller-retour, rejoue ou se remet en file"""
+        session = self.session
+        if self.move_sent_at is not None and session.pending_move is None:
+            self.stats.move_rtts.append(time.perf_counter() - self.move_sent_at)
+            self.move_sent_at = None
+        if session.is_finished:
+            if state['current_turn'] == session.player_number:
+                # Compté une fois par match, par l'auteur du dernier coup
+                self.stats.games += 1
+            await self.requeue()
+            return
+        if not session.is_my_turn:
+            return
+        if self.args.think:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think))
+        cell = self.rng.choice(session.free_cells())
+        self.move_sent_at = time.perf_counter()
+        self.stats.moves += 1
+        await self.client.perform(session.move, cell // 3, cell % 3)
+
+    async def requeue(self):
+        self.queued_at = time.perf_counter()
+        await self.client.perform(self.session.new_game)
+
+
+async def run_load(args):
+    stats = Stats()
+    stop = asyncio.Event()
+    rng = random.Random(args.seed)
+    tasks = []
+    start = time.perf_counter()
+    # Montée en charge : args.rate connexions par seconde
+    for index in range(args.bots):
+        tasks.append(asyncio.create_task(Bot(index, args, stats, random.Random(rng.random())).run(stop)))
+        delay = start + (index + 1) / args.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    ramp = time.perf_counter() - start
+    await asyncio.sleep(max(0.0, args.duration - ramp))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats, ramp, elapsed
+
+
+def spawn_server(args):
+    """Lance server/server.py sur localhost et attend qu'il accepte"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        args.port = probe.getsockname()[1]
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        http_port = probe.getsockname()[1]
+    args.host = '127.0.0.1'
+    command = [sys.executable, os.path.join(ROOT, 'server', 'server.py'), '--host', args.host,
+               '--port', str(args.port), '--http-port', str(http_port), '--db', '',
+               *shlex.split(args.server_args)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((args.host, args.port), timeout=0.2).close()
+            print(f"Serveur lancé : {' '.join(command[1:])}")
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise SystemExit("Le serveur ne répond pas")
+
+
+def report(args, stats, ramp, elapsed):
+    connected = len(stats.connect_times)
+    print(f"\n== {args.bots} bots, {elapsed:.1f} s ==")
+    print(f"Connexions : {connected} en {ramp:.1f} s ({connected / ramp if ramp else 0:.0f}/s), "
+          f"échecs {stats.connect_failures}, connexion p99 {percentile(stats.connect_times, 99) * 1000:.1f} ms")
+    for name, values in (("Attente d'appariement", stats.match_waits), ("Aller-retour d'un coup", stats.move_rtts)):
+        values = [value * 1000 for value in values]
+        print(f"{name + ' (ms)':<30} p50 {percentile(values, 50):8.2f}  p90 {percentile(values, 90):8.2f}  "
+              f"p99 {percentile(values, 99):8.2f}  max {max(values, default=float('nan')):8.2f}  ({len(values)})")
+    print(f"Parties terminées : {stats.games} ({stats.games / elapsed:.0f}/s), "
+          f"coups : {stats.moves} ({stats.moves / elapsed:.0f}/s)")
+    print(f"Erreurs serveur : {stats.server_errors}, déconnexions : {stats.disconnects}, "
+          f"abandons adverses : {stats.abandons}, resync : {stats.resyncs}, "
+          f"trames invalides : {stats.protocol_errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=12345)
+    parser.add_argument('--bots', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=500.0, help="connexions par seconde pendant la montée")
+    parser.add_argument('--duration', type=float, default=30.0, help="durée totale (s), montée comprise")
+    parser.add_argument('--think', type=float, default=0.0, help="temps de réflexion moyen avant un coup (s)")
+    parser.add_argument('--wire', choices=('json', 'binary', 'mixed'), default='json')
+    parser.add_argument('--features', default='', help="options à négocier, ex. delta,heartbeat")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--spawn', action='store_true', help="lancer server/server.py sur un port libre")
+    parser.add_argument('--server-args', default='', help="arguments du serveur lancé avec --spawn")
+    args = parser.parse_args()
+
+    # Une socket par bot (et autant côté serveur avec --spawn)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if 2 * args.bots + 64 > hard:
+        print(f"[!] Limite de descripteurs ({hard}) trop basse pour {args.bots} bots")
+
+    server = spawn_server(args) if args.spawn else None
+    try:
+        stats, ramp, elapsed = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            os.killpg(server.pid, 15)
+            server.wait()
+    report(args, stats, ramp, elapsed)
+
+
+if __name__ == '__main__':
+    main()
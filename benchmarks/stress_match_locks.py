@@ -0,0 +1,128 @@
+"""Test de charge des verrous par match.
+
+Des threads jouent des coups via server.handle_move sur de nombreux matchs
+simultanés. On compare le débit de coups avec un verrou global autour de
+handle_move (comportement d'avant) et avec les verrous par match.
+
+Par défaut, le coup est le code réel : sous match['lock'], règles, encodage
+des trames et dépôt dans les files d'envoi, tout en Python et donc sous le
+GIL. Les deux structures de verrous y sont proches : le découpage ne paie
+que si du travail fait sous le verrou relâche le GIL.
+
+--critical-section ajoute à chaque envoi une section critique synthétique
+(sleep qui relâche le GIL, tenu sous match['lock'] comme un appel système ou
+une extension C le serait). Elle ne modélise aucun coût du serveur actuel,
+où un envoi n'est qu'un ajout en file : elle mesure la structure des
+verrous, pas le serveur.
+
+Usage : python benchmarks/stress_match_locks.py [--matches 2000] [--seconds 2]
+        [--critical-section 0.0002]
+"""
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import server  # noqa: E402
+from bench_suite import GAME, MemoryConnection, player  # noqa: E402
+
+
+class SlowConnection(MemoryConnection):
+    """Connexion en mémoire dont chaque envoi ajoute cost secondes hors GIL,
+    sous match['lock'] (section critique synthétique ; 0 : code réel)"""
+
+    def __init__(self, cost):
+        super().__init__()
+        self.cost = cost
+
+    def send_message(self, data, kind='message'):
+        if self.cost:
+            time.sleep(self.cost)
+        return super().send_message(data, kind)
+
+
+def create_matches(count, cost):
+    server.matches.clear()
+    match_ids = []
+    with server.queue_lock:
+        for i in range(count):
+            p1 = player(f"a{i}", SlowConnection(cost))
+            p2 = player(f"b{i}", SlowConnection(cost))
+            match_id, match = server.create_match(p1, p2)
+            match['started'] = True
+            match_ids.append(match_id)
+    return match_ids
+
+
+def reset_match(match_id):
+    match = server.matches[match_id]
+    with match['lock']:
+        match['stones'] = [0, 0]
+        match['current_turn'] = 1
+        match['is_finished'] = False
+        match['winner'] = None
+        match['seq'] = 0
+
+
+def run(threads, match_ids, seconds, global_lock):
+    """Chaque thread joue en boucle sur sa part des matchs ; retourne coups/s"""
+    move = server.handle_move
+    if global_lock is not None:
+        def move(match_id, player_number, cell):
+            with global_lock:
+                server.handle_move(match_id, player_number, cell)
+
+    stop = time.perf_counter() + seconds
+    counts = [0] * threads
+
+    def worker(index):
+        mine = match_ids[index::threads]
+        done = 0
+        while time.perf_counter() < stop:
+            for match_id in mine:
+                for player_number, cell in GAME:
+                    move(match_id, player_number, cell)
+                done += len(GAME)
+                reset_match(match_id)
+                if time.perf_counter() >= stop:
+                    break
+        counts[index] = done
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--critical-section', type=float, default=0.0,
+                        help="section critique synthétique par envoi, GIL relâché (s)")
+    parser.add_argument('--threads', default='1,2,4,8,16,32')
+    args = parser.parse_args()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        match_ids = create_matches(args.matches, args.critical_section)
+    if args.critical_section:
+        print(f"{args.matches} matchs, section critique synthétique de "
+              f"{args.critical_section * 1e6:.0f} µs par envoi")
+    else:
+        print(f"{args.matches} matchs, code réel")
+    print(f"{'threads':>8}{'verrou global':>16}{'verrous/match':>16}")
+    for threads in [int(t) for t in args.threads.split(',')]:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            serial = run(threads, match_ids, args.seconds, threading.Lock())
+            parallel = run(threads, match_ids, args.seconds, None)
+        print(f"{threads:>8}{serial:>14.0f}/s{parallel:>14.0f}/s")
+
+
+if __name__ == '__main__':
+    main()
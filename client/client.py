@@ -1,11 +1,92 @@
 import tkinter as tk
 from tkinter import messagebox
-import socket
-import threading
-import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from game_logic import ClientSession, MoveError, ThreadedClient
+from ui_tkinter import BoardView, FrameScheduler
 
 SERVER_IP = '10.31.32.143'
 SERVER_PORT = 12345
+# Format de fil demandé au serveur ('binary' ou 'json', voir shared/protocol.py)
+WIRE_FORMAT = 'binary'
+# Options demandées à la négociation : 'delta' = seulement la case jouée à chaque coup,
+# 'heartbeat' = le serveur vérifie par ping/PONG que le client est toujours là
+WIRE_FEATURES = ('delta', 'heartbeat')
+
+# Profils de taille selon la résolution, précalculés une fois par catégorie
+SIZE_PROFILES = {
+    # Petits écrans (laptops, tablettes)
+    'small': {
+        'title_font': ("Arial Black", 28, "bold"),
+        'title_pady': (0, 15),
+        'main_padx': 20,
+        'main_pady': 20,
+        'status_font': ("Arial", 12),
+        'turn_font': ("Arial", 16, "bold"),
+        'turn_font_big': ("Arial", 20, "bold"),
+        'board_title_font': ("Arial", 14, "bold"),
+        'button_width': 6,
+        'button_height': 3,
+        'button_font': ("Arial", 20, "bold"),
+        'button_padx': 3,
+        'button_pady': 3,
+        'board_pady': 15,
+        'pseudo_font': ("Arial", 12),
+        'pseudo_label_font': ("Arial", 14, "bold"),
+        'connect_font': ("Arial", 12, "bold"),
+        'control_font': ("Arial", 12, "bold"),
+        'control_padx': 20,
+        'control_pady': 10
+    },
+    # Écrans moyens (1366x768 à 1920x1080)
+    'medium': {
+        'title_font': ("Arial Black", 36, "bold"),
+        'title_pady': (0, 20),
+        'main_padx': 30,
+        'main_pady': 30,
+        'status_font': ("Arial", 14),
+        'turn_font': ("Arial", 20, "bold"),
+        'turn_font_big': ("Arial", 24, "bold"),
+        'board_title_font': ("Arial", 16, "bold"),
+        'button_width': 7,
+        'button_height': 3,
+        'button_font': ("Arial", 24, "bold"),
+        'button_padx': 4,
+        'button_pady': 4,
+        'board_pady': 20,
+        'pseudo_font': ("Arial", 14),
+        'pseudo_label_font': ("Arial", 16, "bold"),
+        'connect_font': ("Arial", 13, "bold"),
+        'control_font': ("Arial", 14, "bold"),
+        'control_padx': 25,
+        'control_pady': 12
+    },
+    # Grands écrans (1920x1080+)
+    'large': {
+        'title_font': ("Arial Black", 48, "bold"),
+        'title_pady': (0, 30),
+        'main_padx': 40,
+        'main_pady': 40,
+        'status_font': ("Arial", 16),
+        'turn_font': ("Arial", 24, "bold"),
+        'turn_font_big': ("Arial", 28, "bold"),
+        'board_title_font': ("Arial", 20, "bold"),
+        'button_width': 8,
+        'button_height': 4,
+        'button_font': ("Arial", 28, "bold"),
+        'button_padx': 5,
+        'button_pady': 5,
+        'board_pady': 30,
+        'pseudo_font': ("Arial", 16),
+        'pseudo_label_font': ("Arial", 18, "bold"),
+        'connect_font': ("Arial", 14, "bold"),
+        'control_font': ("Arial", 16, "bold"),
+        'control_padx': 30,
+        'control_pady': 15
+    }
+}
 
 class MatchmakingClient(tk.Tk):
     def __init__(self):
@@ -22,16 +103,17 @@ class MatchmakingClient(tk.Tk):
         self.screen_height = self.winfo_screenheight()
         self.is_small_screen = self.screen_width < 1366 or self.screen_height < 768
         
-        # Variables de jeu
-        self.socket = None
-        self.board_frame = None
-        self.board_buttons = []
-        self.match_id = None
-        self.player_number = None
-        self.my_symbol = None
-        self.opponent_symbol = None
-        self.is_my_turn = False
-        self.game_started = False
+        # Connexion et état du jeu (client/game_logic.py) ; l'interface ne
+        # garde que ses widgets
+        self.session = None
+        self.client = None
+        # Plateau construit au premier match puis réutilisé (ui_tkinter.py)
+        self.board_view = None
+        # Mises à jour venues du réseau et du redimensionnement, regroupées
+        # par image
+        self.scheduler = FrameScheduler(self)
+        # Catégorie de taille appliquée aux widgets
+        self.applied_bucket = None
         
         self.setup_ui()
         
@@ -40,95 +122,37 @@ class MatchmakingClient(tk.Tk):
         self.bind('<F11>', self.toggle_fullscreen)
         self.bind('<Configure>', self.on_window_resize)
 
-    def get_responsive_sizes(self):
-        """Calcule les tailles en fonction de la résolution d'écran"""
+    def size_bucket(self):
+        """Catégorie de taille de la fenêtre : 'small', 'medium' ou 'large'"""
         # Détection de la taille d'écran actuelle
         current_width = self.winfo_width() if self.winfo_width() > 1 else self.screen_width
         current_height = self.winfo_height() if self.winfo_height() > 1 else self.screen_height
         
-        # Définir les tailles selon la résolution
         if current_width < 1366 or current_height < 768:
-            # Petits écrans (laptops, tablettes)
-            return {
-                'title_font': ("Arial Black", 28, "bold"),
-                'title_pady': (0, 15),
-                'main_padx': 20,
-                'main_pady': 20,
-                'status_font': ("Arial", 12),
-                'turn_font': ("Arial", 16, "bold"),
-                'turn_font_big': ("Arial", 20, "bold"),
-                'board_title_font': ("Arial", 14, "bold"),
-                'button_width': 6,
-                'button_height': 3,
-                'button_font': ("Arial", 20, "bold"),
-                'button_padx': 3,
-                'button_pady': 3,
-                'board_pady': 15,
-                'pseudo_font': ("Arial", 12),
-                'pseudo_label_font': ("Arial", 14, "bold"),
-                'connect_font': ("Arial", 12, "bold"),
-                'control_font': ("Arial", 12, "bold"),
-                'control_padx': 20,
-                'control_pady': 10
-            }
+            return 'small'
         elif current_width < 1920 or current_height < 1080:
-            # Écrans moyens (1366x768 à 1920x1080)
-            return {
-                'title_font': ("Arial Black", 36, "bold"),
-                'title_pady': (0, 20),
-                'main_padx': 30,
-                'main_pady': 30,
-                'status_font': ("Arial", 14),
-                'turn_font': ("Arial", 20, "bold"),
-                'turn_font_big': ("Arial", 24, "bold"),
-                'board_title_font': ("Arial", 16, "bold"),
-                'button_width': 7,
-                'button_height': 3,
-                'button_font': ("Arial", 24, "bold"),
-                'button_padx': 4,
-                'button_pady': 4,
-                'board_pady': 20,
-                'pseudo_font': ("Arial", 14),
-                'pseudo_label_font': ("Arial", 16, "bold"),
-                'connect_font': ("Arial", 13, "bold"),
-                'control_font': ("Arial", 14, "bold"),
-                'control_padx': 25,
-                'control_pady': 12
-            }
-        else:
-            # Grands écrans (1920x1080+)
-            return {
-                'title_font': ("Arial Black", 48, "bold"),
-                'title_pady': (0, 30),
-                'main_padx': 40,
-                'main_pady': 40,
-                'status_font': ("Arial", 16),
-                'turn_font': ("Arial", 24, "bold"),
-                'turn_font_big': ("Arial", 28, "bold"),
-                'board_title_font': ("Arial", 20, "bold"),
-                'button_width': 8,
-                'button_height': 4,
-                'button_font': ("Arial", 28, "bold"),
-                'button_padx': 5,
-                'button_pady': 5,
-                'board_pady': 30,
-                'pseudo_font': ("Arial", 16),
-                'pseudo_label_font': ("Arial", 18, "bold"),
-                'connect_font': ("Arial", 14, "bold"),
-                'control_font': ("Arial", 16, "bold"),
-                'control_padx': 30,
-                'control_pady': 15
-            }
+            return 'medium'
+        return 'large'
+
+    def get_responsive_sizes(self):
+        """Profil de taille correspondant à la résolution actuelle"""
+        return SIZE_PROFILES[self.size_bucket()]
 
     def on_window_resize(self, event=None):
         """Appelé lors du redimensionnement de la fenêtre"""
         if event and event.widget == self:
-            # Mettre à jour les tailles si nécessaire
-            self.update_ui_sizes()
+            # Un déplacement de bord produit une rafale d'événements : une
+            # seule mise à jour des tailles par image
+            self.scheduler.schedule(self.update_ui_sizes, key='layout')
 
     def update_ui_sizes(self):
-        """Met à jour les tailles des éléments UI"""
-        sizes = self.get_responsive_sizes()
+        """Met à jour les tailles des éléments UI (seulement si la catégorie
+        de taille a changé)"""
+        bucket = self.size_bucket()
+        if bucket == self.applied_bucket:
+            return
+        self.applied_bucket = bucket
+        sizes = self.sizes = SIZE_PROFILES[bucket]
         
         # Mettre à jour les fonts existantes
         try:
@@ -144,20 +168,16 @@ class MatchmakingClient(tk.Tk):
                 self.connect_button.config(font=sizes['connect_font'])
             
             # Mettre à jour les boutons du plateau s'ils existent
-            if self.board_buttons:
-                for row in self.board_buttons:
-                    for button in row:
-                        button.config(
-                            font=sizes['button_font'],
-                            width=sizes['button_width'],
-                            height=sizes['button_height']
-                        )
+            if self.board_view:
+                self.board_view.set_sizes(sizes)
         except:
             pass  # Ignorer les erreurs si les éléments n'existent pas encore
 
     def setup_ui(self):
         """Configure l'interface utilisateur principale"""
-        sizes = self.get_responsive_sizes()
+        # Profil de taille courant, recalculé au redimensionnement
+        self.applied_bucket = self.size_bucket()
+        sizes = self.sizes = SIZE_PROFILES[self.applied_bucket]
         
         # Frame principal avec gradient simulé
         self.main_frame = tk.Frame(self, bg='#1a1a2e')
@@ -314,97 +334,70 @@ class MatchmakingClient(tk.Tk):
         # Animation de connexion
         self.connect_button.config(state=tk.DISABLED, text="🔄 CONNEXION...", bg="#666666")
         
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Négociation de WIRE_FORMAT puis envoi du pseudo ; les messages du
+        # serveur arrivent ensuite par on_server_event (thread de lecture)
+        self.session = ClientSession(pseudo, WIRE_FORMAT, WIRE_FEATURES)
+        self.client = ThreadedClient(self.session, self.on_server_event, self.on_connection_lost)
         try:
-            self.socket.connect((SERVER_IP, SERVER_PORT))
-            self.socket.sendall(pseudo.encode())
+            self.client.connect(SERVER_IP, SERVER_PORT)
+            print(f"[DEBUG] Format de fil : {self.session.wire_format}")
             self.status_label.config(text="🔍 Recherche d'un adversaire en cours...", fg="#00d4aa")
             
             # Cacher le formulaire de connexion
             self.connection_frame.pack_forget()
-            
-            # Écoute des messages du serveur
-            threading.Thread(target=self.listen_to_server, daemon=True).start()
         except Exception as e:
             messagebox.showerror("Erreur de connexion", f"Impossible de se connecter au serveur : {e}")
-            self.socket = None
+            self.client = None
             self.connect_button.config(state=tk.NORMAL, text="🚀 SE CONNECTER", bg="#00d4aa")
 
-    def listen_to_server(self):
-        """Thread qui écoute les messages du serveur"""
-        buffer = ""
-        try:
-            while True:
-                data = self.socket.recv(1024).decode()
-                if not data:
-                    break
-                
-                buffer += data
-                
-                # Traiter chaque ligne complète
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if line.strip():
-                        self.process_server_message(line.strip())
-                        
-        except Exception as e:
-            self.after(0, lambda: messagebox.showerror("Erreur", f"Connexion perdue : {e}"))
-            self.socket = None
-        finally:
-            self.after(0, self.disconnect)
+    def on_connection_lost(self, error):
+        """Fin du thread de lecture (appelé depuis ce thread)"""
+        if error is not None:
+            self.scheduler.schedule(lambda: messagebox.showerror("Erreur", f"Connexion perdue : {error}"))
+        self.scheduler.schedule(self.disconnect, key='connection')
 
-    def process_server_message(self, message):
-        """Traite les messages reçus du serveur"""
-        print(f"[DEBUG] Message serveur reçu: {message}")
-        try:
-            # Essayer de parser comme JSON
-            data = json.loads(message)
+    def on_server_event(self, data):
+        """Traite les messages du serveur, déjà appliqués à la session (thread
+        de lecture : l'interface n'est modifiée que via le scheduler, et une
+        rafale de coups ne redessine le plateau qu'une fois par image)"""
+        print(f"[DEBUG] Message serveur reçu: {data}")
+        session = self.session
+        schedule = self.scheduler.schedule
+        
+        if data['type'] == 'match_found':
+            print(f"[DEBUG] Nouveau match: ID={session.match_id}, Player={session.player_number}, Symbol={session.my_symbol}")
             
-            if data['type'] == 'match_found':
-                # Nouveau match trouvé - réinitialiser complètement
-                self.match_id = data['match_id']
-                self.player_number = data['player_number']
-                self.my_symbol = 'X' if self.player_number == 1 else 'O'
-                self.opponent_symbol = 'O' if self.player_number == 1 else 'X'
-                self.is_my_turn = False
-                self.game_started = False
-                
-                print(f"[DEBUG] Nouveau match: ID={self.match_id}, Player={self.player_number}, Symbol={self.my_symbol}")
-                
-                self.after(0, lambda: self.status_label.config(
-                    text=f"⚔️ Match trouvé! Vous jouez avec les {self.my_symbol} (Joueur {self.player_number})",
-                    fg="#00ffcc"))
-                self.after(0, self.create_game_board)
-                
-            elif data['type'] == 'game_state':
-                # Vérifier que c'est bien pour notre match actuel
-                if self.game_started:
-                    print(f"[DEBUG] État de jeu: tour={data.get('current_turn')}, fini={data.get('is_finished')}")
-                    self.after(0, lambda: self.update_game_state(data))
-                
-            elif data['type'] == 'new_game_accepted':
-                self.after(0, lambda: self.status_label.config(text="🔍 " + data['message'], fg="#00d4aa"))
-                
-            elif data['type'] == 'opponent_disconnected':
-                self.after(0, lambda: messagebox.showinfo("Déconnexion", data['message']))
-                self.after(0, self.show_game_controls)
-                
-            elif data['type'] == 'error':
-                # Afficher toutes les erreurs pour le debug
-                print(f"[DEBUG] Erreur du serveur: {data['message']}")
-                self.after(0, lambda: messagebox.showwarning("Erreur serveur", data['message']))
-                
-        except json.JSONDecodeError:
-            # Message non-JSON (ancien format)
-            self.after(0, lambda: self.status_label.config(text=message, fg="#00d4aa"))
+            # Match repris après un redémarrage du serveur : l'état complet suit le READY
+            title = "♻️ Match repris!" if data.get('resumed') else "⚔️ Match trouvé!"
+            text = f"{title} Vous jouez avec les {session.my_symbol} (Joueur {session.player_number})"
+            schedule(lambda: self.status_label.config(text=text, fg="#00ffcc"), key='status')
+            schedule(self.create_game_board, key='match')
+            
+        elif data['type'] in ('game_state', 'game_delta'):
+            # Le plateau est redessiné depuis l'état de la session, qui
+            # contient déjà tous les coups reçus
+            schedule(self.render_game, key='board')
+            
+        elif data['type'] == 'new_game_accepted':
+            schedule(lambda: self.status_label.config(text="🔍 " + data['message'], fg="#00d4aa"), key='status')
+            
+        elif data['type'] == 'opponent_disconnected':
+            schedule(lambda: messagebox.showinfo("Déconnexion", data['message']))
+            schedule(self.show_game_controls, key='controls')
+            
+        elif data['type'] == 'error':
+            # Afficher toutes les erreurs pour le debug
+            print(f"[DEBUG] Erreur du serveur: {data['message']}")
+            schedule(lambda: messagebox.showwarning("Erreur serveur", data['message']))
+            
+        elif data['type'] == 'text':
+            # Message texte brut (attente d'un adversaire)
+            schedule(lambda: self.status_label.config(text=data['message'], fg="#00d4aa"), key='status')
 
     def create_game_board(self):
-        """Crée le plateau de jeu avec un design moderne"""
-        sizes = self.get_responsive_sizes()
-        
-        # Détruire l'ancien plateau s'il existe
-        if self.board_frame:
-            self.board_frame.destroy()
+        """Affiche le plateau de jeu pour un nouveau match : construit au
+        premier match, simplement vidé ensuite"""
+        sizes = self.sizes
         
         # Cacher les boutons de contrôle
         self.hide_game_controls()
@@ -412,157 +405,77 @@ class MatchmakingClient(tk.Tk):
         # Afficher le conteneur de jeu
         self.game_container.pack(pady=sizes['board_pady'])
         
-        # Réinitialiser les variables de jeu
-        self.board_buttons = []
-        self.is_my_turn = False
-        
-        # Frame principale du plateau avec effet de profondeur
-        self.board_frame = tk.Frame(
-            self.game_container,
-            bg="#16213e",
-            relief=tk.RAISED,
-            bd=8
-        )
-        self.board_frame.pack(pady=sizes['board_pady'])
+        if self.board_view is None:
+            self.board_view = BoardView(self.game_container, sizes, self.make_move)
+            self.board_view.frame.pack(pady=sizes['board_pady'])
+        else:
+            self.board_view.reset()
         
-        # Titre du plateau
-        board_title = tk.Label(
-            self.board_frame,
-            text="🎯 PLATEAU DE JEU",
-            font=sizes['board_title_font'],
-            fg="#00d4aa",
-            bg="#16213e"
-        )
-        board_title.pack(pady=(15, 10))
-        
-        # Frame spécifique pour la grille 3x3
-        grid_frame = tk.Frame(self.board_frame, bg="#16213e")
-        grid_frame.pack(pady=15)
-        
-        # Créer la grille 3x3 avec des boutons stylés
-        for i in range(3):
-            row = []
-            for j in range(3):
-                button = tk.Button(
-                    grid_frame,
-                    text=" ",
-                    width=sizes['button_width'],
-                    height=sizes['button_height'],
-                    font=sizes['button_font'],
-                    command=lambda r=i, c=j: self.make_move(r, c),
-                    bg="#2d3561",
-                    fg="#ffffff",
-                    relief=tk.RAISED,
-                    bd=3,
-                    cursor="hand2",
-                    activebackground="#3d4571"
-                )
-                button.grid(row=i, column=j, padx=sizes['button_padx'], pady=sizes['button_pady'], sticky="nsew")
-                
-                # Effet hover pour les cases
-                button.bind("<Enter>", lambda e, b=button: self.on_button_hover(b, True))
-                button.bind("<Leave>", lambda e, b=button: self.on_button_hover(b, False))
-                
-                row.append(button)
-            self.board_buttons.append(row)
-        
-        # Configuration pour que la grille s'étende uniformément
-        for i in range(3):
-            grid_frame.grid_rowconfigure(i, weight=1)
-            grid_frame.grid_columnconfigure(i, weight=1)
-        
-        # Espacement en bas du plateau
-        bottom_spacer = tk.Label(self.board_frame, text="", bg="#16213e")
-        bottom_spacer.pack(pady=15)
-        
-        self.game_started = True
-        print(f"[DEBUG] Plateau de jeu créé pour le match {self.match_id}")
+        print(f"[DEBUG] Plateau de jeu prêt pour le match {self.session.match_id}")
 
-    def on_button_hover(self, button, entering):
-        """Effet hover pour les boutons du plateau"""
-        if button['text'] == ' ' and self.is_my_turn:
-            if entering:
-                button.config(bg="#4d5591", relief=tk.RAISED)
-            else:
-                button.config(bg="#2d3561", relief=tk.RAISED)
+        # Prévenir le serveur que le plateau est prêt : il enverra l'état initial
+        try:
+            self.client.perform(self.session.ready)
+        except Exception as e:
+            print(f"[ERROR] Erreur envoi READY: {e}")
 
-    def update_game_state(self, state):
-        """Met à jour l'interface selon l'état du jeu reçu du serveur"""
-        if not self.game_started:
+    def render_game(self):
+        """Affiche le dernier état connu du match (seules les cases
+        modifiées sont reconfigurées)"""
+        state = self.client.snapshot() if self.client else None
+        if state is None or self.board_view is None:
             return
         
-        sizes = self.get_responsive_sizes()
-        
-        print(f"[DEBUG] Mise à jour état: tour={state.get('current_turn')}, mon_numéro={self.player_number}")
-        
-        # Mettre à jour le plateau - CORRECTION: board est une string, pas un tableau 2D
-        board = state['board']
-        for i in range(3):
-            for j in range(3):
-                index = i * 3 + j  # Calculer l'index dans la string
-                symbol = board[index] if index < len(board) else ' '
-                button = self.board_buttons[i][j]
-                button['text'] = symbol if symbol != ' ' else ' '
-                
-                # Colorer les cases selon le joueur avec des couleurs modernes
-                if symbol == 'X':
-                    button.config(bg="#e74c3c", fg="#ffffff", font=sizes['button_font'])  # Rouge moderne
-                elif symbol == 'O':
-                    button.config(bg="#3498db", fg="#ffffff", font=sizes['button_font'])  # Bleu moderne
-                else:
-                    button.config(bg="#2d3561", fg="#ffffff", font=sizes['button_font'])
+        print(f"[DEBUG] Mise à jour état: tour={state['current_turn']}, seq={state['seq']}, mon_numéro={self.session.player_number}")
         
+        self.board_view.show_board(state['board'])
+        self.update_turn(state, self.sizes)
+
+    def update_turn(self, state, sizes):
+        """Met à jour le statut du tour et l'activation des cases"""
         # Mettre à jour le statut du tour - CORRECTION: s'assurer que la comparaison fonctionne
         current_turn = state.get('current_turn')
         is_finished = state.get('is_finished', False)
+        player_number = self.session.player_number
         
-        self.is_my_turn = (current_turn == self.player_number and not is_finished)
+        is_my_turn = (current_turn == player_number and not is_finished)
         
-        print(f"[DEBUG] Tour actuel: {current_turn}, Mon numéro: {self.player_number}, C'est mon tour: {self.is_my_turn}, Fini: {is_finished}")
+        print(f"[DEBUG] Tour actuel: {current_turn}, Mon numéro: {player_number}, C'est mon tour: {is_my_turn}, Fini: {is_finished}")
         
         if is_finished:
             # Partie terminée - Afficher le résultat avec style
             winner = state.get('winner')
             if winner == 0:
                 self.turn_label.config(text="🤝 MATCH NUL!", fg="#ff9800", font=sizes['turn_font_big'])
-            elif winner == self.player_number:
+            elif winner == player_number:
                 self.turn_label.config(text="🏆 VICTOIRE!", fg="#4CAF50", font=sizes['turn_font_big'])
             else:
                 self.turn_label.config(text="💀 DÉFAITE", fg="#f44336", font=sizes['turn_font_big'])
             
             # Désactiver tous les boutons du plateau
-            for row in self.board_buttons:
-                for button in row:
-                    button.config(state=tk.DISABLED, cursor="")
+            self.board_view.set_playable(False)
             
             # Afficher les boutons de contrôle
             self.show_game_controls()
             
         else:
             # Partie en cours
-            if self.is_my_turn:
+            if is_my_turn:
                 self.turn_label.config(
-                    text=f"🎯 VOTRE TOUR ({self.my_symbol})",
+                    text=f"🎯 VOTRE TOUR ({self.session.my_symbol})",
                     fg="#00ffcc",
                     font=sizes['turn_font']
                 )
                 # Activer les boutons vides
-                for row in self.board_buttons:
-                    for button in row:
-                        if button['text'] == ' ':
-                            button.config(state=tk.NORMAL, cursor="hand2")
-                        else:
-                            button.config(state=tk.DISABLED, cursor="")
+                self.board_view.set_playable(True)
             else:
                 self.turn_label.config(
-                    text=f"⏳ TOUR ADVERSAIRE ({self.opponent_symbol})",
+                    text=f"⏳ TOUR ADVERSAIRE ({self.session.opponent_symbol})",
                     fg="#ff6b6b",
                     font=sizes['turn_font']
                 )
                 # Désactiver tous les boutons
-                for row in self.board_buttons:
-                    for button in row:
-                        button.config(state=tk.DISABLED, cursor="")
+                self.board_view.set_playable(False)
 
     def show_game_controls(self):
         """Affiche les boutons Rejouer et Quitter"""
@@ -576,41 +489,28 @@ class MatchmakingClient(tk.Tk):
 
     def make_move(self, i, j):
         """Envoie un coup au serveur"""
-        print(f"[DEBUG] Tentative de coup: ({i},{j}), Mon tour: {self.is_my_turn}, Match ID: {self.match_id}")
-        
-        if not self.is_my_turn:
-            messagebox.showwarning("Pas votre tour", "Attendez votre tour!")
-            return
-        
-        if not self.match_id:
-            messagebox.showerror("Erreur", "Aucun match en cours!")
-            return
+        print(f"[DEBUG] Tentative de coup: ({i},{j}), Mon tour: {self.session.is_my_turn}, Match ID: {self.session.match_id}")
         
-        if self.board_buttons[i][j]['text'] != ' ':
-            messagebox.showwarning("Case occupée", "Cette case est déjà occupée!")
-            return
-        
-        # Effet visuel temporaire
-        self.board_buttons[i][j].config(bg="#00d4aa")
-        
-        # Envoyer le coup au serveur
-        move_message = f"MOVE:{i}{j}"
         try:
-            self.socket.sendall(move_message.encode())
-            print(f"[DEBUG] Coup envoyé: {move_message}")
-            # Désactiver temporairement tous les boutons
-            for row in self.board_buttons:
-                for button in row:
-                    button.config(state=tk.DISABLED, cursor="")
+            self.client.perform(self.session.move, i, j)
+        except MoveError as e:
+            messagebox.showwarning("Coup impossible", str(e))
+            return
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible d'envoyer le coup : {e}")
             print(f"[ERROR] Erreur envoi coup: {e}")
+            return
+        
+        print(f"[DEBUG] Coup envoyé: MOVE:{i}{j}")
+        # Effet visuel temporaire et cases désactivées jusqu'à la réponse
+        self.board_view.highlight(i * 3 + j)
+        self.board_view.set_playable(False)
 
     def request_new_game(self):
         """Demande une nouvelle partie au serveur"""
         try:
             # Envoyer la demande de nouvelle partie au serveur
-            self.socket.sendall(b"NEW_GAME")
+            self.client.perform(self.session.new_game)
             print("[DEBUG] Demande de nouvelle partie envoyée au serveur")
             
             # Réinitialiser l'interface
@@ -623,23 +523,14 @@ class MatchmakingClient(tk.Tk):
 
     def reset_game_ui(self):
         """Réinitialise l'interface utilisateur pour une nouvelle partie"""
-        if self.board_frame:
-            self.board_frame.destroy()
-        
-        # Cacher le conteneur de jeu
+        # Cacher le conteneur de jeu ; le plateau est gardé pour le prochain match
         self.game_container.pack_forget()
+        if self.board_view:
+            self.board_view.reset()
         
         # Cacher les boutons de contrôle
         self.hide_game_controls()
         
-        self.board_buttons = []
-        self.match_id = None
-        self.player_number = None
-        self.my_symbol = None
-        self.opponent_symbol = None
-        self.is_my_turn = False
-        self.game_started = False
-        
         self.turn_label.config(text="", font=("Arial", 24, "bold"))
 
     def quit_game(self):
@@ -648,12 +539,9 @@ class MatchmakingClient(tk.Tk):
 
     def disconnect(self):
         """Déconnecte le client proprement"""
-        if self.socket:
-            try:
-                self.socket.close()
-            except:
-                pass
-            self.socket = None
+        if self.client:
+            self.client.close()
+            self.client = None
         
         # Réafficher le formulaire de connexion
         self.connection_frame.pack(pady=20)
@@ -661,11 +549,10 @@ class MatchmakingClient(tk.Tk):
         self.status_label.config(text="❌ Déconnecté du serveur", fg="#ff6b6b")
         self.turn_label.config(text="")
         
-        if self.board_frame:
-            self.board_frame.destroy()
-        
         # Cacher le conteneur de jeu
         self.game_container.pack_forget()
+        if self.board_view:
+            self.board_view.reset()
         
         # Cacher les boutons de contrôle
         self.hide_game_controls()
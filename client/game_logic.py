@@ -0,0 +1,390 @@
+"""Cœur du client de jeu, indépendant de l'interface et des E/S.
+
+ClientSession tient l'état d'une connexion au serveur (négociation du
+format, match, plateau, séquence) sans jamais toucher une socket : on lui
+passe les octets reçus, elle retourne les messages à présenter et accumule
+les octets à envoyer (réponses PONG et RESYNC comprises). Les commandes du
+joueur (ready, move, new_game) passent par elle et sont vérifiées avant
+l'envoi.
+
+Deux pilotes relient une session au réseau :
+- ThreadedClient : socket bloquante et un thread de lecture, pour
+  l'interface Tk ;
+- AsyncClient : socket non bloquante sur la boucle asyncio courante, sans
+  thread, pour tenir des milliers de sessions dans un processus (bots,
+  générateur de charge).
+"""
+import asyncio
+import socket
+import threading
+from collections import deque
+
+from shared import protocol
+
+
+class MoveError(Exception):
+    """Coup refusé avant l'envoi (pas de match, pas le tour, case occupée)"""
+
+
+class ClientSession:
+    """État d'un joueur connecté, sans E/S.
+
+    Utilisation :
+        session.start()                     # puis envoyer data_to_send()
+        events = session.receive_data(data) # ou get_buffer/buffer_updated
+        session.move(1, 1)                  # puis envoyer data_to_send()
+
+    Les événements sont les messages du serveur (dicts) qui concernent
+    l'interface : 'match_found', 'game_state', 'game_delta' (déjà appliqués
+    à board), 'new_game_accepted', 'opponent_disconnected', 'error', 'text'.
+    Les ping, les deltas hors séquence et les états d'un autre match sont
+    traités ici et ne produisent pas d'événement.
+    """
+
+    def __init__(self, pseudo, wire_format='json', features=()):
+        self.pseudo = pseudo
+        self.requested_format = wire_format
+        self.requested_features = tuple(features)
+        # Format et options retenus par le serveur
+        self.wire_format = 'json'
+        self.features = set()
+        self.decoder = protocol.FrameDecoder()
+        self.outgoing = bytearray()
+        self.connected = False
+        self.handshaking = False
+        self.resyncs = 0
+        self.reset_match()
+
+    def reset_match(self):
+        """Oublie le match en cours (nouvelle partie, déconnexion)"""
+        self.match_id = None
+        self.player_number = None
+        self.my_symbol = None
+        self.opponent_symbol = None
+        # Plateau (liste de 9 symboles) et séquence du dernier état appliqué
+        self.board = None
+        self.seq = None
+        self.current_turn = None
+        self.is_finished = False
+        self.winner = None
+        # READY envoyé : les états du match sont attendus
+        self.game_started = False
+        # Séquence qui confirmera le dernier coup envoyé
+        self.pending_move = None
+
+    # -- Octets entrants et sortants --
+
+    def start(self):
+        """À appeler une fois connecté : négociation du format ou, en json
+        sans option, envoi direct du pseudo"""
+        if self.requested_format != 'json' or self.requested_features:
+            self.handshaking = True
+            self.outgoing += protocol.encode_handshake(self.requested_format, self.requested_features)
+        else:
+            self._send_pseudo()
+
+    def data_to_send(self):
+        """Octets à écrire sur la connexion (vide la file)"""
+        data = bytes(self.outgoing)
+        self.outgoing.clear()
+        return data
+
+    def get_buffer(self):
+        """Zone où recevoir directement (recv_into), voir FrameDecoder"""
+        return self.decoder.get_buffer()
+
+    def buffer_updated(self, nbytes):
+        """Signale nbytes octets reçus dans get_buffer() ; retourne les
+        événements produits"""
+        self.decoder.buffer_updated(nbytes)
+        events = []
+        # Trame par trame : la réponse de négociation change le découpage
+        for frame in iter(self.decoder.next_frame, None):
+            if self.handshaking:
+                self._handshake_received(frame)
+            elif frame.strip():
+                event = self.handle_message(protocol.decode_message(frame, self.wire_format))
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def receive_data(self, data):
+        """Comme buffer_updated, pour des octets déjà lus"""
+        events = []
+        view = memoryview(data)
+        while view:
+            buffer = self.get_buffer()
+            nbytes = min(len(buffer), len(view))
+            buffer[:nbytes] = view[:nbytes]
+            view = view[nbytes:]
+            events.extend(self.buffer_updated(nbytes))
+        return events
+
+    def _handshake_received(self, frame):
+        reply = frame.decode().strip()
+        if reply.startswith(protocol.HANDSHAKE_REPLY_PREFIX):
+            self.wire_format, self.features = protocol.parse_handshake(reply, protocol.HANDSHAKE_REPLY_PREFIX)
+            self.decoder.set_framing(protocol.framing_for(self.wire_format))
+        self.handshaking = False
+        self._send_pseudo()
+
+    def _send_pseudo(self):
+        self.outgoing += protocol.encode_text(self.pseudo, self.wire_format)
+        self.connected = True
+
+    def _send(self, command):
+        self.outgoing += protocol.encode_command(command, self.wire_format)
+
+    # -- Messages du serveur --
+
+    def handle_message(self, data):
+        """Applique un message décodé ; retourne l'événement à présenter ou
+        None"""
+        kind = data['type']
+        if kind == 'match_found':
+            self.reset_match()
+            self.match_id = data['match_id']
+            self.player_number = data['player_number']
+            self.my_symbol = 'X' if self.player_number == 1 else 'O'
+            self.opponent_symbol = 'O' if self.player_number == 1 else 'X'
+            return data
+        if kind == 'game_state':
+            # Seulement pour le match en cours, une fois le plateau prêt
+            if not self.game_started or data.get('match_id', self.match_id) != self.match_id:
+                return None
+            self.board = list(data['board'])
+            self.seq = data.get('seq')
+            self._apply_status(data)
+            return data
+        if kind == 'game_delta':
+            if not self.game_started or data['match_id'] != self.match_id:
+                return None
+            return self._apply_delta(data)
+        if kind == 'ping':
+            # Battement de cœur : réponse immédiate
+            self._send("PONG")
+            return None
+        if kind == 'error':
+            # Coup refusé par le serveur : le joueur peut rejouer
+            self.pending_move = None
+        return data
+
+    def _apply_delta(self, delta):
+        """Applique un coup s'il suit le dernier état connu, sinon demande
+        l'état complet (delta perdu ou arrivé avant l'état initial)"""
+        if self.seq is not None and delta['seq'] <= self.seq:
+            return None  # déjà appliqué
+        if self.seq is None or delta['seq'] != self.seq + 1:
+            self.resync()
+            return None
+        self.board[delta['cell']] = delta['symbol']
+        self.seq = delta['seq']
+        self._apply_status(delta)
+        return delta
+
+    def _apply_status(self, state):
+        self.current_turn = state.get('current_turn')
+        self.is_finished = state.get('is_finished', False)
+        self.winner = state.get('winner')
+        if self.pending_move is not None and self.seq is not None and self.seq >= self.pending_move:
+            self.pending_move = None
+
+    @property
+    def is_my_turn(self):
+        return (self.board is not None and self.current_turn == self.player_number
+                and not self.is_finished and self.pending_move is None)
+
+    def view(self):
+        """État affichable du match en cours (plateau en texte), None avant
+        l'état initial"""
+        if not self.game_started or self.board is None:
+            return None
+        return {
+            'match_id': self.match_id,
+            'seq': self.seq,
+            'board': ''.join(self.board),
+            'current_turn': self.current_turn,
+            'is_finished': self.is_finished,
+            'winner': self.winner
+        }
+
+    def free_cells(self):
+        """Indices (0-8) des cases vides"""
+        if self.board is None:
+            return []
+        return [index for index, symbol in enumerate(self.board) if symbol == ' ']
+
+    # -- Commandes du joueur --
+
+    def ready(self):
+        """Plateau prêt : le serveur enverra l'état initial"""
+        self.game_started = True
+        self._send("READY")
+
+    def move(self, i, j):
+        """Joue la case (i, j) ; MoveError si le coup est impossible"""
+        if not self.match_id:
+            raise MoveError("Aucun match en cours!")
+        if not self.is_my_turn:
+            raise MoveError("Attendez votre tour!")
+        if self.board[i * 3 + j] != ' ':
+            raise MoveError("Cette case est déjà occupée!")
+        self.pending_move = self.seq + 1
+        self._send(f"MOVE:{i}{j}")
+
+    def new_game(self):
+        """Quitte le match et se remet en file"""
+        self.reset_match()
+        self._send("NEW_GAME")
+
+    def resync(self):
+        self.resyncs += 1
+        self._send("RESYNC")
+
+
+class ThreadedClient:
+    """Session sur une socket bloquante.
+
+    Un thread lit les messages et appelle on_event(event) pour chacun, puis
+    on_disconnect(erreur ou None) à la fin, depuis ce thread. Les commandes
+    passent par perform() : session et socket sont partagées avec le thread
+    de lecture (PONG, RESYNC).
+    """
+
+    def __init__(self, session, on_event, on_disconnect):
+        self.session = session
+        self.on_event = on_event
+        self.on_disconnect = on_disconnect
+        self.sock = None
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def connect(self, host, port, timeout=5):
+        """Connexion et négociation (bloquantes), puis lancement du thread
+        de lecture"""
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        try:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.session.start()
+            self._flush()
+            events = []
+            while not self.session.connected:
+                received = self._receive()
+                if received is None:
+                    raise ConnectionError("Connexion fermée pendant la négociation")
+                events.extend(received)
+            self._flush()
+            self.sock.settimeout(None)
+        except Exception:
+            self.close()
+            raise
+        threading.Thread(target=self._listen, args=(events,), daemon=True).start()
+
+    def perform(self, action, *args):
+        """Exécute une commande de la session et envoie ce qu'elle produit"""
+        with self.lock:
+            result = action(*args)
+            self._flush()
+        return result
+
+    def snapshot(self):
+        """session.view() cohérente avec le thread de lecture"""
+        with self.lock:
+            return self.session.view()
+
+    def close(self):
+        self.closed = True
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def _receive(self):
+        """Événements d'une lecture, None si le serveur a fermé"""
+        nbytes = self.sock.recv_into(self.session.get_buffer())
+        if not nbytes:
+            return None
+        with self.lock:
+            return self.session.buffer_updated(nbytes)
+
+    def _flush(self):
+        data = self.session.data_to_send()
+        if data:
+            self.sock.sendall(data)
+
+    def _listen(self, events):
+        error = None
+        try:
+            while events is not None:
+                for event in events:
+                    self.on_event(event)
+                events = self._receive()
+                with self.lock:
+                    self._flush()
+        except Exception as e:
+            # Socket fermée par close() : déconnexion voulue, pas une erreur
+            if not self.closed:
+                error = e
+        finally:
+            self.close()
+            self.on_disconnect(error)
+
+
+class AsyncClient:
+    """Session sur une socket non bloquante de la boucle asyncio courante :
+    aucune ressource par session en dehors de la socket et de son tampon"""
+
+    def __init__(self, session):
+        self.session = session
+        self.loop = None
+        self.sock = None
+        self.events = deque()
+
+    async def connect(self, host, port):
+        """Connexion et négociation"""
+        self.loop = asyncio.get_running_loop()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            await self.loop.sock_connect(self.sock, (host, port))
+            self.session.start()
+            await self.flush()
+            while not self.session.connected:
+                if not await self._receive():
+                    raise ConnectionError("Connexion fermée pendant la négociation")
+        except BaseException:
+            self.close()
+            raise
+
+    async def next_event(self):
+        """Prochain événement de la session (None à la déconnexion) ; les
+        réponses automatiques (PONG, RESYNC) partent au passage"""
+        while not self.events:
+            if not await self._receive():
+                return None
+        return self.events.popleft()
+
+    async def perform(self, action, *args):
+        """Exécute une commande de la session et envoie ce qu'elle produit"""
+        result = action(*args)
+        await self.flush()
+        return result
+
+    async def flush(self):
+        data = self.session.data_to_send()
+        if data:
+            await self.loop.sock_sendall(self.sock, data)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+
+    async def _receive(self):
+        nbytes = await self.loop.sock_recv_into(self.sock, self.session.get_buffer())
+        if not nbytes:
+            return False
+        self.events.extend(self.session.buffer_updated(nbytes))
+        await self.flush()
+        return True
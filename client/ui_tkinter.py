@@ -0,0 +1,168 @@
+"""Widgets Tk du client, séparés de l'état du jeu (game_logic.py).
+
+BoardView construit le plateau une seule fois et le réutilise d'un match à
+l'autre. Il garde pour chaque case les options déjà appliquées (texte,
+couleur, état, curseur) : un état de jeu ne reconfigure que les cases qui
+changent, au lieu des neuf boutons à chaque message.
+
+FrameScheduler regroupe les mises à jour demandées par le thread de lecture
+et par les redimensionnements : au plus un passage par image, où seule la
+dernière demande de chaque sorte (plateau, statut, mise en page) est
+appliquée.
+"""
+import itertools
+import threading
+import time
+import tkinter as tk
+
+# Durée d'une image de l'interface (~60 par seconde)
+FRAME_INTERVAL_MS = 16
+
+BOARD_BG = "#16213e"
+EMPTY_BG = "#2d3561"
+HOVER_BG = "#4d5591"
+PENDING_BG = "#00d4aa"
+# Couleur d'une case selon son symbole (rouge et bleu modernes)
+SYMBOL_BG = {'X': "#e74c3c", 'O': "#3498db", ' ': EMPTY_BG}
+
+
+class BoardView:
+    """Plateau 3x3 : on_click(i, j) est appelé au clic sur une case"""
+
+    def __init__(self, parent, sizes, on_click):
+        # Frame principale du plateau avec effet de profondeur
+        self.frame = tk.Frame(parent, bg=BOARD_BG, relief=tk.RAISED, bd=8)
+        self.title_label = tk.Label(
+            self.frame,
+            text="🎯 PLATEAU DE JEU",
+            font=sizes['board_title_font'],
+            fg="#00d4aa",
+            bg=BOARD_BG
+        )
+        self.title_label.pack(pady=(15, 10))
+
+        # Frame spécifique pour la grille 3x3
+        grid_frame = tk.Frame(self.frame, bg=BOARD_BG)
+        grid_frame.pack(pady=15)
+
+        self.buttons = []
+        for index in range(9):
+            button = tk.Button(
+                grid_frame,
+                text=" ",
+                fg="#ffffff",
+                relief=tk.RAISED,
+                bd=3,
+                activebackground="#3d4571",
+                command=lambda i=index // 3, j=index % 3: on_click(i, j)
+            )
+            button.grid(row=index // 3, column=index % 3, sticky="nsew")
+
+            # Effet hover pour les cases
+            button.bind("<Enter>", lambda e, i=index: self.on_hover(i, True))
+            button.bind("<Leave>", lambda e, i=index: self.on_hover(i, False))
+            self.buttons.append(button)
+
+        # Configuration pour que la grille s'étende uniformément
+        for i in range(3):
+            grid_frame.grid_rowconfigure(i, weight=1)
+            grid_frame.grid_columnconfigure(i, weight=1)
+
+        # Espacement en bas du plateau
+        tk.Label(self.frame, text="", bg=BOARD_BG).pack(pady=15)
+
+        # Options appliquées à chaque case, et profil de taille courant
+        self.rendered = [{} for _ in self.buttons]
+        self.sizes_key = None
+        self.set_sizes(sizes)
+        self.reset()
+
+    def configure_cell(self, index, **options):
+        """N'applique que les options qui diffèrent de l'affichage actuel"""
+        rendered = self.rendered[index]
+        changed = {key: value for key, value in options.items() if rendered.get(key) != value}
+        if changed:
+            self.buttons[index].config(**changed)
+            rendered.update(changed)
+
+    def set_cell(self, index, symbol):
+        self.configure_cell(index, text=symbol, bg=SYMBOL_BG[symbol])
+
+    def show_board(self, board):
+        """Affiche un plateau complet (9 symboles)"""
+        for index, symbol in enumerate(board):
+            self.set_cell(index, symbol)
+
+    def set_playable(self, playable):
+        """Active les cases vides si playable, désactive tout sinon"""
+        for index, rendered in enumerate(self.rendered):
+            enabled = playable and rendered['text'] == ' '
+            self.configure_cell(index, state=tk.NORMAL if enabled else tk.DISABLED,
+                                cursor="hand2" if enabled else "")
+
+    def highlight(self, index):
+        """Case jouée, en attente de la réponse du serveur"""
+        self.configure_cell(index, bg=PENDING_BG)
+
+    def reset(self):
+        """Plateau vide et inactif, prêt pour un nouveau match"""
+        self.show_board(' ' * 9)
+        self.set_playable(False)
+
+    def on_hover(self, index, entering):
+        rendered = self.rendered[index]
+        if rendered['text'] == ' ' and rendered['state'] == tk.NORMAL:
+            self.configure_cell(index, bg=HOVER_BG if entering else EMPTY_BG)
+
+    def set_sizes(self, sizes):
+        """Applique un profil de taille (get_responsive_sizes) s'il a changé"""
+        key = (sizes['button_font'], sizes['button_width'], sizes['button_height'],
+               sizes['button_padx'], sizes['button_pady'], sizes['board_title_font'])
+        if key == self.sizes_key:
+            return
+        self.sizes_key = key
+        self.title_label.config(font=sizes['board_title_font'])
+        for button in self.buttons:
+            button.config(font=sizes['button_font'], width=sizes['button_width'], height=sizes['button_height'])
+            button.grid_configure(padx=sizes['button_padx'], pady=sizes['button_pady'])
+
+
+class FrameScheduler:
+    """Mises à jour de l'interface regroupées par image.
+
+    schedule(callback, key) peut être appelé depuis n'importe quel thread :
+    les demandes qui partagent une clé se remplacent (seule la dernière
+    s'exécute), celles sans clé s'exécutent toutes, dans l'ordre. Un seul
+    after() est programmé par image, au plus tôt FRAME_INTERVAL_MS après la
+    précédente.
+    """
+
+    def __init__(self, widget, interval_ms=FRAME_INTERVAL_MS):
+        self.widget = widget
+        self.interval = interval_ms / 1000
+        self.lock = threading.Lock()
+        # clé -> callback, dans l'ordre de la première demande
+        self.pending = {}
+        self.anonymous = itertools.count()
+        self.frame_requested = False
+        self.last_frame = 0.0
+
+    def schedule(self, callback, key=None):
+        with self.lock:
+            self.pending[next(self.anonymous) if key is None else key] = callback
+            if self.frame_requested:
+                return
+            self.frame_requested = True
+            delay = max(0.0, self.last_frame + self.interval - time.monotonic())
+        self.widget.after(int(delay * 1000), self._run_frame)
+
+    def _run_frame(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.frame_requested = False
+            self.last_frame = time.monotonic()
+        for callback in pending.values():
+            try:
+                callback()
+            except Exception as e:
+                print(f"[ERROR] Mise à jour de l'interface : {e}")
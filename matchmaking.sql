@@ -30,3 +30,28 @@ CREATE TABLE queue (
     pseudo TEXT NOT NULL,
     entry_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- Instantanés périodiques des matchs en cours (reprise après un arrêt) :
+-- état après les seq premiers tours du match
+CREATE TABLE match_snapshots (
+    match_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    board TEXT NOT NULL,
+    current_turn INTEGER NOT NULL,
+    player1_pseudo TEXT NOT NULL,
+    player2_pseudo TEXT NOT NULL,
+    FOREIGN KEY (match_id) REFERENCES matches (id)
+);
+
+-- Classement Elo des joueurs (matchmaking par niveau)
+CREATE TABLE ratings (
+    pseudo TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL
+);
+
+-- Tours d'un match dans l'ordre, sans parcourir tout le journal
+CREATE INDEX idx_turns_match ON turns (match_id, id);
+
+-- Matchs non terminés (index partiel : ne grossit pas avec l'historique)
+CREATE INDEX idx_matches_unfinished ON matches (id) WHERE is_finished = 0;
@@ -0,0 +1,317 @@
+"""Mode multi-processus : plusieurs workers derrière un même port.
+
+Chaque worker est un processus complet (moteur threads ou asyncio, roue de
+temporisation, page de monitoring) qui écoute sur le même port TCP grâce à
+SO_REUSEPORT : le noyau répartit les connexions entrantes entre eux, et les
+coups de matchs différents s'exécutent sur plusieurs cœurs.
+
+Le matchmaking est centralisé dans un processus coordinateur : les workers
+lui annoncent les joueurs qui entrent en file ou la quittent, et il forme
+les paires (ordre d'arrivée ou classement, comme le serveur seul). Le match
+est tenu par le worker du joueur 1 ; si le joueur 2 est connecté à un autre
+worker, celui-ci relaie ses commandes au worker du match, qui lui renvoie
+les messages à transmettre (déjà encodés dans son format de fil).
+
+Les processus communiquent par sockets Unix (multiprocessing.connection,
+authentifiées par une clé tirée au démarrage) dans un répertoire privé.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from multiprocessing.connection import Client, Listener
+
+from shared import protocol
+from jeu import rating
+
+COORDINATOR = 'coordinator'
+
+log = logging.getLogger('server.cluster')
+
+
+def socket_path(socket_dir, name):
+    return os.path.join(socket_dir, f"{name}.sock")
+
+
+class Link:
+    """Connexion sortante vers un autre processus.
+
+    send() peut être appelé depuis n'importe quel thread et ne bloque
+    jamais : un thread d'écriture ouvre la connexion (en attendant que le
+    processus écoute), puis vide la file. Un appelant qui tient un verrou
+    du jeu n'attend donc jamais le réseau, et deux workers qui se relaient
+    des messages ne peuvent pas s'interbloquer sur des tampons pleins.
+    """
+
+    def __init__(self, socket_dir, name, authkey, timeout=10.0):
+        self.name = name
+        self.outbox = deque()
+        self.wakeup = threading.Condition()
+        threading.Thread(target=self._writer, args=(socket_dir, authkey, timeout), daemon=True).start()
+
+    def send(self, *message):
+        with self.wakeup:
+            self.outbox.append(message)
+            self.wakeup.notify()
+
+    def _open(self, socket_dir, authkey, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return Client(socket_path(socket_dir, self.name), family='AF_UNIX', authkey=authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _writer(self, socket_dir, authkey, timeout):
+        try:
+            self.connection = self._open(socket_dir, authkey, timeout)
+        except OSError as e:
+            log.error("Impossible de joindre %s : %s", self.name, e)
+            return
+        while True:
+            with self.wakeup:
+                while not self.outbox:
+                    self.wakeup.wait()
+                message = self.outbox.popleft()
+            try:
+                self.connection.send(message)
+            except OSError as e:
+                log.warning("Lien inter-processus coupé : %s", e)
+                return
+
+
+def serve_links(listener, handler, name):
+    """Accepte les connexions entrantes : un thread lecteur par processus
+    pair, qui traite ses messages dans l'ordre d'envoi"""
+
+    def read(connection):
+        try:
+            while True:
+                message = connection.recv()
+                try:
+                    handler(*message)
+                except Exception as e:
+                    log.error("Erreur sur le message %s (%s) : %s", message[0], name, e)
+        except (EOFError, OSError):
+            pass
+
+    def accept():
+        while True:
+            connection = listener.accept()
+            threading.Thread(target=read, args=(connection,), daemon=True).start()
+
+    threading.Thread(target=accept, name=f'{name}-links', daemon=True).start()
+
+
+def connect(socket_dir, name, authkey, timeout=10.0):
+    """Lien vers un processus ; la connexion s'ouvre sur le thread d'écriture
+    du lien, connect() rend la main tout de suite"""
+    return Link(socket_dir, name, authkey, timeout)
+
+
+class WorkerNode:
+    """Côté worker : liens vers le coordinateur et les autres workers, et
+    identifiants des sessions locales connues du coordinateur"""
+
+    def __init__(self, index, socket_dir, authkey, handler):
+        self.index = index
+        self.socket_dir = socket_dir
+        self.authkey = authkey
+        self.listener = Listener(socket_path(socket_dir, f"worker-{index}"), family='AF_UNIX', authkey=authkey)
+        serve_links(self.listener, handler, f"worker-{index}")
+        self.links = {}
+        self.links_lock = threading.Lock()
+        # sid -> session locale (en file ou en match)
+        self.sessions = {}
+        self.next_sid = 0
+        self.sessions_lock = threading.Lock()
+
+    def register(self, session):
+        """Donne à la session un identifiant valable dans tout le cluster"""
+        with self.sessions_lock:
+            self.next_sid += 1
+            session.sid = self.next_sid
+            self.sessions[session.sid] = session
+
+    def unregister(self, session):
+        with self.sessions_lock:
+            self.sessions.pop(session.sid, None)
+
+    def session(self, sid):
+        with self.sessions_lock:
+            return self.sessions.get(sid)
+
+    def _link(self, name):
+        with self.links_lock:
+            link = self.links.get(name)
+            if link is None:
+                link = self.links[name] = connect(self.socket_dir, name, self.authkey)
+            return link
+
+    def send_coordinator(self, *message):
+        self._link(COORDINATOR).send(*message)
+
+    def send_worker(self, index, *message):
+        self._link(f"worker-{index}").send(*message)
+
+    def describe(self, session, arrived):
+        """Ce que le coordinateur et le worker du match savent d'un joueur"""
+        return {
+            'worker': self.index,
+            'sid': session.sid,
+            'pseudo': session.pseudo,
+            'addr': tuple(session.addr[:2]),
+            'wire_format': session.conn.wire_format,
+            'features': sorted(session.conn.features),
+            'arrived': arrived
+        }
+
+
+class RemoteConnection:
+    """Connexion d'un joueur tenu par un autre worker, vue du worker du match.
+
+    Mêmes méthodes d'envoi qu'OutboundConnection : les trames déjà encodées
+    partent par le lien inter-processus et le worker du joueur les met dans
+    la file d'envoi réelle (politique client lent comprise).
+    """
+
+    def __init__(self, node, player):
+        self.node = node
+        self.worker = player['worker']
+        self.sid = player['sid']
+        self.wire_format = player['wire_format']
+        self.features = set(player['features'])
+        self.closed = False
+
+    def fileno(self):
+        return 0
+
+    def send_message(self, data, kind='message'):
+        self.node.send_worker(self.worker, 'deliver', self.sid, data, kind)
+        return True
+
+    def send(self, message, kind='message'):
+        return self.send_message(protocol.encode_message(message, self.wire_format), kind)
+
+    def send_update(self, delta, snapshot):
+        # needs_snapshot est connu du worker du joueur : l'état complet
+        # accompagne le delta, il n'est transmis au client que si besoin
+        delta = delta if 'delta' in self.features else None
+        self.node.send_worker(self.worker, 'update', self.sid, delta, snapshot())
+        return True
+
+
+class Coordinator:
+    """Processus de matchmaking du cluster.
+
+    Les joueurs en file sont identifiés par (worker, sid). Le classement
+    de chaque pseudo est tenu ici, seul endroit qui voit tous les résultats :
+    chaque joueur mis en file est renvoyé à son worker avec son classement
+    ('rated'), que la page de monitoring du worker affiche.
+    """
+
+    def __init__(self, socket_dir, authkey, mode, pool, next_match_id, recorder=None):
+        self.socket_dir = socket_dir
+        self.authkey = authkey
+        self.mode = mode
+        self.queue = OrderedDict()
+        self.pool = pool
+        self.ratings = rating.RatingTable()
+        self.recorder = recorder
+        if recorder is not None:
+            self.ratings.load(recorder.load_ratings())
+        self.next_match_id = next_match_id
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.links = {}
+        self.links_lock = threading.Lock()
+        self.listener = Listener(socket_path(socket_dir, COORDINATOR), family='AF_UNIX', authkey=authkey)
+
+    def run(self):
+        serve_links(self.listener, self.handle, COORDINATOR)
+        log.info("Coordinateur de matchmaking prêt (%s)", self.mode)
+        if self.mode == 'rating':
+            self.pair_by_rating()
+        else:
+            self.pair_fifo()
+
+    def handle(self, op, *args):
+        if op == 'enqueue':
+            self.enqueue(args[0])
+        elif op == 'dequeue':
+            with self.lock:
+                self.remove(tuple(args))
+        elif op == 'cancel':
+            # Appariement annulé par le worker du match : les joueurs
+            # encore là reprennent leur place avec leur ancienneté
+            for player in args[0]:
+                self.enqueue(player, front=True)
+        elif op == 'result':
+            for pseudo, value, games in self.ratings.record_game(*args):
+                if self.recorder is not None:
+                    self.recorder.record_rating(pseudo, value, games)
+
+    def enqueue(self, player, front=False):
+        key = (player['worker'], player['sid'])
+        value = self.ratings.get(player['pseudo'])
+        with self.lock:
+            self.queue[key] = player
+            if front:
+                self.queue.move_to_end(key, last=False)
+            if self.mode == 'rating':
+                self.pool.add(key, value, player['arrived'])
+            self.changed.notify()
+        self.link(player['worker']).send('rated', player['sid'], value)
+
+    def link(self, worker):
+        with self.links_lock:
+            link = self.links.get(worker)
+            if link is None:
+                link = self.links[worker] = connect(self.socket_dir, f"worker-{worker}", self.authkey)
+            return link
+
+    def remove(self, key):
+        """Retire un joueur de la file (lock tenu) ; retourne sa description"""
+        player = self.queue.pop(key, None)
+        if player is not None and self.mode == 'rating':
+            self.pool.remove(key)
+        return player
+
+    def pair_fifo(self):
+        while True:
+            with self.changed:
+                while len(self.queue) < 2:
+                    self.changed.wait()
+                pairs = []
+                while len(self.queue) >= 2:
+                    pairs.append((self.queue.popitem(last=False)[1], self.queue.popitem(last=False)[1]))
+            for first, second in pairs:
+                self.create(first, second)
+
+    def pair_by_rating(self):
+        while True:
+            with self.changed:
+                due = self.pool.next_due()
+                while due is None or due > time.monotonic():
+                    self.changed.wait(None if due is None else due - time.monotonic())
+                    due = self.pool.next_due()
+                pairs = []
+                for key1, key2, _ in self.pool.pop_pairs(time.monotonic()):
+                    first, second = self.queue.pop(key1), self.queue.pop(key2)
+                    if second['arrived'] < first['arrived']:
+                        first, second = second, first
+                    pairs.append((first, second))
+            for first, second in pairs:
+                self.create(first, second)
+
+    def create(self, first, second):
+        """Confie le match au worker du joueur 1"""
+        match_id = self.next_match_id
+        self.next_match_id += 1
+        worker = first['worker']
+        log.info("Match %s : %s (worker %s) vs %s (worker %s)",
+                 match_id, first['pseudo'], worker, second['pseudo'], second['worker'])
+        self.link(worker).send('create', match_id, first, second)
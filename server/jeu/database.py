@@ -0,0 +1,276 @@
+"""Persistance SQLite des matchs et des tours (schéma de matchmaking.sql).
+
+Le serveur ne touche jamais la base sur le chemin d'un coup : les méthodes
+record_*() déposent un événement brut (sorte, arguments) dans une file
+bornée et rendent la main. Un thread écrivain vide la file par lots, chaque
+lot étant une seule transaction (group commit) en mode WAL ; c'est lui qui
+encode les plateaux et construit les paramètres des requêtes. Si la file est
+pleine, l'événement est abandonné et compté plutôt que de ralentir les
+joueurs.
+
+Au redémarrage, load_unfinished() retrouve les matchs non terminés à partir
+de leur dernier instantané (match_snapshots) et des seuls tours joués depuis,
+grâce aux index : le coût ne dépend pas de la taille de l'historique.
+"""
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from jeu import game_logic
+
+log = logging.getLogger('server.db')
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'matchmaking.sql')
+
+# Requêtes préparées, réutilisées via le cache de requêtes de sqlite3
+INSERT_MATCH = ("INSERT OR REPLACE INTO matches "
+                "(id, player1_ip, player1_port, player2_ip, player2_port, board, is_finished, winner) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, NULL)")
+INSERT_TURN = "INSERT INTO turns (match_id, player, move) VALUES (?, ?, ?)"
+UPDATE_RESULT = "UPDATE matches SET board = ?, is_finished = 1, winner = ? WHERE id = ?"
+SAVE_SNAPSHOT = ("INSERT OR REPLACE INTO match_snapshots "
+                 "(match_id, seq, board, current_turn, player1_pseudo, player2_pseudo) "
+                 "VALUES (?, ?, ?, ?, ?, ?)")
+DELETE_SNAPSHOT = "DELETE FROM match_snapshots WHERE match_id = ?"
+SAVE_RATING = "INSERT OR REPLACE INTO ratings (pseudo, rating, games) VALUES (?, ?, ?)"
+SELECT_RATINGS = "SELECT pseudo, rating, games FROM ratings"
+
+SELECT_UNFINISHED = (
+    "SELECT m.id, m.board, s.seq, s.board, s.current_turn, s.player1_pseudo, s.player2_pseudo "
+    "FROM matches AS m INDEXED BY idx_matches_unfinished "
+    "LEFT JOIN match_snapshots AS s ON s.match_id = m.id "
+    "WHERE m.is_finished = 0")
+# Tours postérieurs à l'instantané (les seq premiers sont déjà dans son plateau)
+SELECT_TURNS_AFTER = "SELECT player, move FROM turns WHERE match_id = ? ORDER BY id LIMIT -1 OFFSET ?"
+
+# Sortes d'événements de la file
+MATCH, TURN, SNAPSHOT, RESULT, RATING = range(5)
+
+
+def load_schema(path=SCHEMA_PATH):
+    """Schéma de matchmaking.sql, rejouable sur une base existante.
+
+    sqlite_sequence est une table interne créée par SQLite lui-même : sa
+    déclaration (issue d'un .schema) est retirée.
+    """
+    with open(path, encoding='utf-8') as schema_file:
+        statements = schema_file.read().split(';')
+    kept = [statement for statement in statements
+            if 'CREATE TABLE sqlite_sequence' not in statement]
+    return ';'.join(kept).replace('CREATE TABLE ', 'CREATE TABLE IF NOT EXISTS ') \
+        .replace('CREATE INDEX ', 'CREATE INDEX IF NOT EXISTS ')
+
+
+def connect(path):
+    """Connexion configurée pour l'écriture groupée"""
+    db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    # En WAL, NORMAL ne synchronise qu'aux checkpoints : un commit reste atomique
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(load_schema())
+    return db
+
+
+class MatchRecorder:
+    """Écrivain en arrière-plan (write-behind) des matchs et des tours.
+
+    max_pending borne la file d'événements ; batch_size borne le nombre
+    d'événements par transaction ; après un réveil, l'écrivain laisse
+    flush_interval secondes aux événements suivants pour rejoindre le lot.
+    Le dépôt d'un événement ne prend aucun verrou partagé avec l'écrivain
+    (deque.append est atomique) : un coup n'attend jamais qu'un lot soit
+    écrit.
+
+    Un plateau est passé tel quel, en chaîne ou en pierres (tuple, copie à
+    faire par l'appelant) : board_format le met en chaîne sur le thread
+    écrivain. Chaque événement, même s'il donne plusieurs requêtes, est
+    accepté ou abandonné en entier et écrit dans une seule transaction.
+    """
+
+    def __init__(self, path, max_pending=10000, batch_size=1000, flush_interval=0.05,
+                 board_format=game_logic.TIC_TAC_TOE.to_string):
+        self.path = path
+        self.board_format = board_format
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.events = deque()
+        # Levé par le premier dépôt après que l'écrivain a vidé la file
+        self.wakeup = threading.Event()
+        self.db = connect(path)
+        self.stats_lock = threading.Lock()
+        # Réveille flush() après chaque lot
+        self.progress = threading.Condition(self.stats_lock)
+        self.stopping = False
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.max_commit_ms = 0.0
+        self.total_commit_ms = 0.0
+        self.writer = threading.Thread(target=self._writer, name='db-writer', daemon=True)
+        self.writer.start()
+
+    def next_match_id(self):
+        """Premier identifiant de match libre (à appeler avant le démarrage)"""
+        (max_id,) = self.db.execute("SELECT MAX(id) FROM matches").fetchone()
+        return (max_id or 0) + 1
+
+    def load_unfinished(self):
+        """Matchs non terminés, à appeler avant le démarrage.
+
+        Pour chacun : {'match_id', 'board', 'snapshot', 'turns'}, où snapshot
+        vaut None si le match n'en a pas, sinon (seq, plateau, joueur au
+        trait, pseudo 1, pseudo 2), et turns liste les (joueur, coup) joués
+        après l'instantané.
+        """
+        unfinished = []
+        for match_id, board, seq, snap_board, current_turn, pseudo1, pseudo2 in \
+                self.db.execute(SELECT_UNFINISHED).fetchall():
+            snapshot = None
+            turns = []
+            if seq is not None:
+                snapshot = (seq, snap_board, current_turn, pseudo1, pseudo2)
+                turns = self.db.execute(SELECT_TURNS_AFTER, (match_id, seq)).fetchall()
+            unfinished.append({'match_id': match_id, 'board': board,
+                               'snapshot': snapshot, 'turns': turns})
+        return unfinished
+
+    def load_ratings(self):
+        """Classements enregistrés : (pseudo, classement, parties), à appeler
+        avant le démarrage"""
+        return self.db.execute(SELECT_RATINGS).fetchall()
+
+    def record_match(self, match_id, player1_addr, player2_addr, board):
+        return self._put((MATCH, (match_id, player1_addr, player2_addr, board)))
+
+    def record_snapshot(self, match_id, seq, board, current_turn, pseudo1, pseudo2):
+        """Point de reprise : état du match après ses seq premiers tours"""
+        return self._put((SNAPSHOT, (match_id, seq, board, current_turn, pseudo1, pseudo2)))
+
+    def record_turn(self, match_id, player_number, move):
+        return self._put((TURN, (match_id, player_number, move)))
+
+    def record_result(self, match_id, board, winner):
+        """Fin de match : winner 1/2, 0 pour un nul, None pour un abandon.
+        L'instantané est supprimé dans la même transaction"""
+        return self._put((RESULT, (match_id, board, winner)))
+
+    def record_rating(self, pseudo, rating, games):
+        return self._put((RATING, (pseudo, rating, games)))
+
+    def _put(self, event):
+        if len(self.events) >= self.max_pending:
+            with self.stats_lock:
+                self.dropped += 1
+                if self.dropped == 1:
+                    log.warning("File de persistance pleine : événements abandonnés")
+            return False
+        self.events.append(event)
+        if not self.wakeup.is_set():
+            self.wakeup.set()
+        return True
+
+    def metrics(self):
+        """Compteurs de l'écrivain (pour le monitoring)"""
+        with self.stats_lock:
+            return {
+                'pending': len(self.events),
+                'max_pending': self.max_pending,
+                'written': self.written,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'last_batch_size': self.last_batch_size,
+                'avg_commit_ms': self.total_commit_ms / self.batches if self.batches else 0.0,
+                'max_commit_ms': self.max_commit_ms
+            }
+
+    def flush(self, timeout=None):
+        """Attend que tous les événements déjà déposés soient écrits"""
+        target = len(self.events)
+        with self.progress:
+            target += self.written + self.failed
+            return self.progress.wait_for(
+                lambda: self.written + self.failed >= target or not self.writer.is_alive(), timeout)
+
+    def close(self):
+        """Écrit ce qui reste puis arrête l'écrivain"""
+        self.stopping = True
+        self.wakeup.set()
+        self.writer.join()
+        self.db.close()
+
+    def _writer(self):
+        while True:
+            self.wakeup.wait()
+            if not self.stopping:
+                time.sleep(self.flush_interval)
+            self.wakeup.clear()
+            # Tout dépôt postérieur au clear() relèvera wakeup
+            while self.events:
+                batch = []
+                while self.events and len(batch) < self.batch_size:
+                    batch.append(self.events.popleft())
+                self._write_batch(batch)
+            if self.stopping:
+                return
+
+    def _board(self, board):
+        return board if isinstance(board, str) else self.board_format(board)
+
+    def _statements(self, batch):
+        """(requête, paramètres) des événements d'un lot, dans l'ordre"""
+        statements = []
+        for kind, args in batch:
+            if kind == TURN:
+                statements.append((INSERT_TURN, args))
+            elif kind == SNAPSHOT:
+                match_id, seq, board, current_turn, pseudo1, pseudo2 = args
+                statements.append((SAVE_SNAPSHOT, (match_id, seq, self._board(board),
+                                                   current_turn, pseudo1, pseudo2)))
+            elif kind == RESULT:
+                match_id, board, winner = args
+                statements.append((DELETE_SNAPSHOT, (match_id,)))
+                statements.append((UPDATE_RESULT, (self._board(board), winner, match_id)))
+            elif kind == MATCH:
+                match_id, player1_addr, player2_addr, board = args
+                statements.append((INSERT_MATCH, (match_id, *player1_addr[:2], *player2_addr[:2],
+                                                  self._board(board))))
+            else:
+                statements.append((SAVE_RATING, args))
+        return statements
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+        try:
+            self.db.execute("BEGIN")
+            try:
+                # Les suites de requêtes identiques partent en un executemany,
+                # dans l'ordre d'arrivée (un match est créé avant ses tours)
+                statements = self._statements(batch)
+                for sql, group in itertools.groupby(statements, key=lambda statement: statement[0]):
+                    self.db.executemany(sql, [params for _, params in group])
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            log.error("Erreur d'écriture en base (%d événements perdus) : %s", len(batch), e)
+            with self.progress:
+                self.failed += len(batch)
+                self.progress.notify_all()
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.progress:
+            self.written += len(batch)
+            self.batches += 1
+            self.last_batch_size = len(batch)
+            self.total_commit_ms += elapsed
+            self.max_commit_ms = max(self.max_commit_ms, elapsed)
+            self.progress.notify_all()
@@ -0,0 +1,113 @@
+"""Moteur de jeu à bitboards : morpion N×N, k pions alignés pour gagner.
+
+Les pierres de chaque joueur sont un entier dont le bit i correspond à la
+case i (ligne * size + colonne). Toutes les lignes gagnantes sont
+précalculées en masques : une victoire se teste par quelques ET binaires
+(seulement les masques qui passent par la case jouée), un match nul par le
+nombre de bits posés.
+"""
+
+EMPTY = ' '
+SYMBOLS = {1: 'X', 2: 'O'}
+
+
+def win_masks(size, k):
+    """Masques de toutes les suites de k cases alignées sur un plateau size×size"""
+    masks = []
+    directions = ((0, 1), (1, 0), (1, 1), (1, -1))
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col in directions:
+                end_row = row + d_row * (k - 1)
+                end_col = col + d_col * (k - 1)
+                if not (0 <= end_row < size and 0 <= end_col < size):
+                    continue
+                mask = 0
+                for step in range(k):
+                    mask |= 1 << ((row + d_row * step) * size + col + d_col * step)
+                masks.append(mask)
+    return masks
+
+
+class Rules:
+    """Règles d'un plateau size×size où il faut aligner k pions"""
+
+    def __init__(self, size=3, k=3):
+        if not 1 <= k <= size:
+            raise ValueError(f"Alignement de {k} impossible sur un plateau {size}×{size}")
+        self.size = size
+        self.k = k
+        self.cells = size * size
+        self.win_masks = tuple(win_masks(size, k))
+        # Pour chaque case, les seuls masques à tester après y avoir joué
+        self.masks_by_cell = tuple(
+            tuple(mask for mask in self.win_masks if mask >> cell & 1)
+            for cell in range(self.cells)
+        )
+
+    def is_win(self, stones, cell=None):
+        """Vrai si stones contient une ligne gagnante (passant par cell si donné)"""
+        masks = self.win_masks if cell is None else self.masks_by_cell[cell]
+        for mask in masks:
+            if stones & mask == mask:
+                return True
+        return False
+
+    def is_full(self, stones):
+        """stones : union des pierres des deux joueurs"""
+        return stones.bit_count() == self.cells
+
+    def play(self, stones, player_number, cell):
+        """Pose une pierre pour player_number (1 ou 2) sur cell.
+
+        stones est la liste [pierres du joueur 1, pierres du joueur 2],
+        modifiée sur place. Retourne (partie finie, gagnant) comme
+        game_end() : gagnant 1 ou 2, 0 pour un nul, None si la partie continue.
+        Lève ValueError si la case est hors plateau ou occupée.
+        """
+        if not 0 <= cell < self.cells:
+            raise ValueError(f"Case {cell} hors du plateau")
+        bit = 1 << cell
+        if (stones[0] | stones[1]) & bit:
+            raise ValueError(f"Case {cell} déjà occupée")
+        mine = stones[player_number - 1] = stones[player_number - 1] | bit
+        for mask in self.masks_by_cell[cell]:
+            if mine & mask == mask:
+                return True, player_number
+        if (stones[0] | stones[1]).bit_count() == self.cells:
+            return True, 0
+        return False, None
+
+    def game_end(self, stones):
+        """(partie finie, gagnant) d'une position quelconque"""
+        for player_number in (1, 2):
+            if self.is_win(stones[player_number - 1]):
+                return True, player_number
+        if self.is_full(stones[0] | stones[1]):
+            return True, 0
+        return False, None
+
+    def is_free(self, stones, cell):
+        return 0 <= cell < self.cells and not (stones[0] | stones[1]) >> cell & 1
+
+    def to_string(self, stones):
+        """Plateau en chaîne ' '/'X'/'O' (format du protocole)"""
+        x, o = stones
+        return ''.join(
+            SYMBOLS[1] if x >> cell & 1 else SYMBOLS[2] if o >> cell & 1 else EMPTY
+            for cell in range(self.cells)
+        )
+
+    def from_string(self, board):
+        """Liste [pierres X, pierres O] d'un plateau en chaîne"""
+        stones = [0, 0]
+        for cell, symbol in enumerate(board):
+            if symbol == SYMBOLS[1]:
+                stones[0] |= 1 << cell
+            elif symbol == SYMBOLS[2]:
+                stones[1] |= 1 << cell
+        return stones
+
+
+# Morpion classique, utilisé par le serveur
+TIC_TAC_TOE = Rules(3, 3)
@@ -0,0 +1,201 @@
+"""Classement Elo des joueurs et file d'attente indexée par classement.
+
+RatingTable garde le classement de chaque pseudo et le met à jour à la fin
+d'un match (victoire, défaite ou nul).
+
+RatingPool remplace la file FIFO quand le matchmaking tient compte du
+niveau : les joueurs en attente sont rangés dans des seaux de BUCKET_WIDTH
+points, chacun trié par (classement, ordre d'arrivée), et les clés des seaux
+non vides sont elles-mêmes triées. L'adversaire le plus proche d'un joueur
+est donc son voisin dans son seau ou l'extrémité du seau non vide voisin :
+quelques bisect, O(log n). L'écart accepté s'élargit avec l'attente ; chaque
+joueur est recherché à son arrivée puis à chaque élargissement, jamais à
+chaque passage du matchmaking.
+"""
+import bisect
+import heapq
+import itertools
+import math
+import operator
+import threading
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+# Clé de tri des seaux : (classement, ordre d'arrivée)
+_rank = operator.itemgetter(0, 1)
+
+
+def expected_score(rating, opponent_rating):
+    """Probabilité de victoire attendue (nul compté pour moitié)"""
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+
+def updated_ratings(rating1, rating2, winner, k=K_FACTOR):
+    """Nouveaux classements après un match : winner 1/2, 0 pour un nul"""
+    score1 = {1: 1.0, 2: 0.0, 0: 0.5}[winner]
+    delta = k * (score1 - expected_score(rating1, rating2))
+    return rating1 + delta, rating2 - delta
+
+
+class RatingTable:
+    """Classement par pseudo ; son verrou est une feuille (jamais d'appel
+    extérieur sous ce verrou), il peut être pris sous un verrou de match"""
+
+    def __init__(self, initial=INITIAL_RATING, k=K_FACTOR):
+        self.initial = initial
+        self.k = k
+        self.ratings = {}
+        self.games = {}
+        self.lock = threading.Lock()
+
+    def load(self, rows):
+        """rows : (pseudo, classement, parties) lus en base au démarrage"""
+        with self.lock:
+            for pseudo, rating, games in rows:
+                self.ratings[pseudo] = rating
+                self.games[pseudo] = games
+
+    def get(self, pseudo):
+        with self.lock:
+            return self.ratings.get(pseudo, self.initial)
+
+    def record_game(self, pseudo1, pseudo2, winner):
+        """Met à jour les deux joueurs ; retourne [(pseudo, classement, parties)]"""
+        with self.lock:
+            rating1, rating2 = updated_ratings(self.ratings.get(pseudo1, self.initial),
+                                               self.ratings.get(pseudo2, self.initial), winner, self.k)
+            changed = []
+            for pseudo, rating in ((pseudo1, rating1), (pseudo2, rating2)):
+                self.ratings[pseudo] = rating
+                self.games[pseudo] = self.games.get(pseudo, 0) + 1
+                changed.append((pseudo, rating, self.games[pseudo]))
+            return changed
+
+    def __len__(self):
+        with self.lock:
+            return len(self.ratings)
+
+
+class RatingPool:
+    """Joueurs en attente indexés par classement (à protéger par l'appelant).
+
+    L'écart accepté pour un joueur vaut initial_gap, plus widen_by toutes
+    les widen_every secondes d'attente, au plus max_gap (None : sans borne,
+    tout joueur finit par être apparié).
+    """
+
+    BUCKET_WIDTH = 25.0
+
+    def __init__(self, initial_gap=50.0, widen_by=50.0, widen_every=5.0, max_gap=None):
+        self.initial_gap = initial_gap
+        self.widen_by = widen_by
+        self.widen_every = widen_every
+        self.max_gap = max_gap
+        # session -> (classement, ordre d'arrivée, arrivée)
+        self.entries = {}
+        # numéro de seau -> liste triée de (classement, ordre d'arrivée, session)
+        self.buckets = {}
+        self.bucket_keys = []
+        # Tas des prochaines recherches : (échéance, ordre d'arrivée, session)
+        self.due = []
+        self.arrivals = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, session):
+        return session in self.entries
+
+    def add(self, session, rating, now):
+        """Ajoute un joueur ; il sera recherché au prochain pop_pairs()"""
+        self.remove(session)
+        order = next(self.arrivals)
+        self.entries[session] = (rating, order, now)
+        key = math.floor(rating / self.BUCKET_WIDTH)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = []
+            bisect.insort(self.bucket_keys, key)
+        bisect.insort(bucket, (rating, order, session), key=_rank)
+        heapq.heappush(self.due, (now, order, session))
+
+    def remove(self, session):
+        """Retire un joueur ; retourne False s'il n'était pas en attente"""
+        entry = self.entries.pop(session, None)
+        if entry is None:
+            return False
+        rating, order, _ = entry
+        key = math.floor(rating / self.BUCKET_WIDTH)
+        bucket = self.buckets[key]
+        del bucket[bisect.bisect_left(bucket, (rating, order), key=_rank)]
+        if not bucket:
+            del self.buckets[key]
+            del self.bucket_keys[bisect.bisect_left(self.bucket_keys, key)]
+        # Son éventuelle échéance dans due sera ignorée (ordre d'arrivée périmé)
+        return True
+
+    def widenings(self, waited):
+        """Nombre d'élargissements après waited secondes d'attente"""
+        # La marge évite qu'un arrondi place une échéance avant son élargissement
+        return math.floor(waited / self.widen_every + 1e-9)
+
+    def window(self, waited):
+        """Écart de classement accepté après waited secondes d'attente"""
+        gap = self.initial_gap + self.widen_by * self.widenings(waited)
+        return gap if self.max_gap is None else min(gap, self.max_gap)
+
+    def nearest(self, session):
+        """(écart, adversaire) le plus proche en classement, ou None.
+
+        À écart égal, le joueur arrivé le premier est choisi.
+        """
+        rating, order, _ = self.entries[session]
+        key = math.floor(rating / self.BUCKET_WIDTH)
+        bucket = self.buckets[key]
+        index = bisect.bisect_left(bucket, (rating, order), key=_rank)
+        candidates = []
+        if index > 0:
+            candidates.append(bucket[index - 1])
+        if index + 1 < len(bucket):
+            candidates.append(bucket[index + 1])
+        # Seaux non vides voisins : seule leur extrémité la plus proche compte
+        position = bisect.bisect_left(self.bucket_keys, key)
+        if position > 0 and index == 0:
+            candidates.append(self.buckets[self.bucket_keys[position - 1]][-1])
+        if position + 1 < len(self.bucket_keys) and index + 1 == len(bucket):
+            candidates.append(self.buckets[self.bucket_keys[position + 1]][0])
+        if not candidates:
+            return None
+        other_rating, _, other = min(candidates, key=lambda item: (abs(item[0] - rating), item[1]))
+        return abs(other_rating - rating), other
+
+    def pop_pairs(self, now):
+        """Retire et retourne les paires (joueur, adversaire, écart) trouvées.
+
+        Seuls les joueurs arrivés ou dont l'écart s'est élargi depuis leur
+        dernière recherche sont examinés, par ordre d'échéance.
+        """
+        pairs = []
+        while self.due and self.due[0][0] <= now:
+            _, order, session = heapq.heappop(self.due)
+            entry = self.entries.get(session)
+            if entry is None or entry[1] != order:
+                continue
+            waited = now - entry[2]
+            found = self.nearest(session)
+            if found is not None and found[0] <= self.window(waited):
+                gap, other = found
+                self.remove(session)
+                self.remove(other)
+                pairs.append((session, other, gap))
+                continue
+            if self.max_gap is None or self.window(waited) < self.max_gap:
+                # Prochaine recherche au prochain élargissement
+                steps = self.widenings(waited) + 1
+                heapq.heappush(self.due, (entry[2] + steps * self.widen_every, order, session))
+        return pairs
+
+    def next_due(self):
+        """Date de la prochaine recherche prévue, ou None"""
+        return self.due[0][0] if self.due else None
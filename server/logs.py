@@ -0,0 +1,177 @@
+"""Journalisation du serveur : niveaux, écriture hors des chemins critiques,
+échantillonnage par catégorie et mémoire des derniers événements.
+
+Chaque module écrit dans le logger de sa catégorie ('server.net',
+'server.move'...) avec le module standard logging et des arguments en
+style % : un message de niveau désactivé ne coûte qu'un test, et un message
+actif n'est formaté ni écrit par le thread qui l'émet. Celui-ci ne fait que
+déposer l'enregistrement dans une file bornée (QueueHandler, sans attente :
+file pleine = événement abandonné et compté) ; un thread d'écriture
+(QueueListener) le formate avec les préfixes habituels ([+], [!], [DEBUG])
+sur la sortie standard et le garde dans un tampon circulaire, consultable à
+la demande (page /logs du port de monitoring).
+
+Les arguments d'un message sont formatés plus tard, dans le thread
+d'écriture : il faut passer des valeurs qui ne changeront plus (nombres,
+chaînes, dicts construits pour l'envoi), pas un match ou une session.
+
+Sans setup() (benchmarks, imports), logging garde son comportement par
+défaut : seuls les avertissements et erreurs s'affichent, sur stderr.
+"""
+import atexit
+import itertools
+import logging
+import logging.handlers
+import queue
+import sys
+from collections import deque
+
+ROOT = 'server'
+# Catégories, utilisables dans --log-sample
+CATEGORIES = ('net', 'match', 'move', 'matchmaking', 'cluster', 'db', 'timers')
+LEVELS = ('debug', 'info', 'warning', 'error')
+
+# Préfixes historiques des messages, selon le niveau
+PREFIXES = {logging.DEBUG: '[DEBUG]', logging.INFO: '[+]', logging.WARNING: '[!]', logging.ERROR: '[!]'}
+
+QUEUE_MAX_RECORDS = 10000
+RING_SIZE = 2000
+
+_handler = None
+_listener = None
+_ring = None
+
+
+def get_logger(category=None):
+    return logging.getLogger(ROOT if category is None else f"{ROOT}.{category}")
+
+
+class PrefixFormatter(logging.Formatter):
+    """Message précédé du préfixe de son niveau ; avec timestamps=True,
+    aussi de l'heure et de la catégorie (tampon circulaire)"""
+
+    def __init__(self, timestamps=False):
+        super().__init__('%(asctime)s %(name)s %(prefix)s %(message)s' if timestamps else '%(prefix)s %(message)s')
+
+    def format(self, record):
+        record.prefix = PREFIXES.get(record.levelno, '[!]')
+        return super().format(record)
+
+
+class SamplingFilter(logging.Filter):
+    """Ne garde qu'un message DEBUG sur N par catégorie (rates :
+    {'move': 100, ...}) ; les autres niveaux passent toujours"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {f"{ROOT}.{category}": rate for category, rate in rates.items() if rate > 1}
+        # itertools.count : incrément atomique, sans verrou
+        self.counters = {name: itertools.count() for name in self.rates}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or next(self.counters[record.name]) % rate == 0
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Dépôt sans attente ni formatage dans une file bornée"""
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatage repoussé au thread d'écriture ; seule une exception
+        # est mise en texte ici, sa trace n'étant plus valable ensuite
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RingBufferHandler(logging.Handler):
+    """Garde les dernières lignes formatées (thread d'écriture seulement)"""
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.lines = deque(maxlen=capacity)
+        self.setFormatter(PrefixFormatter(timestamps=True))
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def parse_sampling(text):
+    """'move=100,net=10' -> {'move': 100, 'net': 10}"""
+    rates = {}
+    for item in filter(None, text.split(',')):
+        category, _, rate = item.partition('=')
+        if category not in CATEGORIES or not rate.isdigit():
+            raise ValueError(f"Échantillonnage invalide : {item} (catégories : {', '.join(CATEGORIES)})")
+        rates[category] = int(rate)
+    return rates
+
+
+def setup(level='info', ring_level=None, sampling=None, ring_size=RING_SIZE, max_records=QUEUE_MAX_RECORDS):
+    """Installe la file et le thread d'écriture du processus courant.
+
+    level : niveau affiché sur la sortie standard ; ring_level : niveau
+    gardé dans le tampon circulaire (par défaut le même), par exemple
+    'debug' pour conserver le détail récent sans l'afficher. À rappeler
+    dans un processus issu d'un fork : le thread d'écriture n'y existe plus.
+    """
+    global _handler, _listener, _ring
+    stream_level = getattr(logging, level.upper())
+    ring_level = getattr(logging, (ring_level or level).upper())
+
+    root = get_logger()
+    if _handler is not None:
+        # Après un fork, l'ancien thread d'écriture n'existe plus : on
+        # l'abandonne avec sa file
+        root.removeHandler(_handler)
+    else:
+        atexit.register(flush)
+
+    record_queue = queue.Queue(max_records)
+    _handler = NonBlockingQueueHandler(record_queue)
+    _handler.addFilter(SamplingFilter(sampling or {}))
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setLevel(stream_level)
+    stream.setFormatter(PrefixFormatter())
+    _ring = RingBufferHandler(ring_size)
+    _ring.setLevel(ring_level)
+    _listener = logging.handlers.QueueListener(record_queue, stream, _ring, respect_handler_level=True)
+
+    root.setLevel(min(stream_level, ring_level))
+    root.propagate = False
+    root.addHandler(_handler)
+    _listener.start()
+
+
+def flush():
+    """Écrit les messages en attente (arrêt du serveur)"""
+    if _listener is not None and _listener._thread is not None:
+        try:
+            _listener.stop()
+        except queue.Full:
+            pass
+
+
+def dump():
+    """Dernières lignes du tampon circulaire, plus anciennes d'abord"""
+    lines = []
+    if _ring is not None:
+        # emit() tient le verrou du handler
+        with _ring.lock:
+            lines = list(_ring.lines)
+    if _handler is not None and _handler.dropped:
+        lines.append(f"[!] {_handler.dropped} message(s) abandonné(s), file de journalisation pleine")
+    return lines
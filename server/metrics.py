@@ -0,0 +1,251 @@
+"""Mesures du serveur : histogrammes de latence et compteurs de débit.
+
+Les étapes du parcours d'un joueur sont chronométrées avec
+time.perf_counter() (ou time.monotonic() quand le début est déjà noté
+ailleurs, comme l'arrivée en file) et rangées dans des histogrammes à
+intervalles fixes : une observation coûte une recherche dichotomique et
+trois additions sous le verrou de l'histogramme, sans allocation.
+
+Les mesures sont lues par le port de monitoring :
+- /metrics : format texte Prometheus (histogrammes cumulés, compteurs) ;
+- /metrics.json : les mêmes données avec p50/p90/p99 estimés et les débits
+  (coups/s, matchs/s) des dernières secondes.
+"""
+import itertools
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+# Bornes supérieures des intervalles (secondes), de 1 µs à 2 min : couvre
+# une attente de verrou comme une longue attente en file
+LATENCY_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025,
+                   0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Verrous : une acquisition chronométrée sur LOCK_SAMPLE_EVERY
+LOCK_SAMPLE_EVERY = 16
+
+# Fenêtre des débits de /metrics.json, en relevés (un par seconde)
+RATE_WINDOW = 10
+
+_metrics = []
+_started = time.monotonic()
+# (instant, {compteur: total}) relevés par sample_rates()
+_rate_samples = deque(maxlen=RATE_WINDOW + 1)
+# Nom de verrou -> numéro d'acquisition (itertools.count : incrément
+# atomique, sans verrou)
+_lock_tickets = defaultdict(itertools.count)
+
+
+class Histogram:
+    """Distribution de durées (secondes) sur LATENCY_BUCKETS"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.buckets = buckets
+        # Un intervalle de plus pour les valeurs au-delà de la dernière borne
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def since(self, start):
+        """Observe la durée écoulée depuis start (time.perf_counter())"""
+        self.observe(time.perf_counter() - start)
+
+    def read(self):
+        with self.lock:
+            return list(self.counts), self.count, self.sum
+
+    def quantile(self, q, counts, count):
+        """Estimation d'un quantile par interpolation dans son intervalle
+        (comme histogram_quantile de Prometheus) ; None sans observation"""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class Counter:
+    """Total croissant (coups joués, matchs créés...)"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.value = 0
+        self.lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+class TimedLock:
+    """Verrou qui mesure l'attente avant acquisition et la durée de
+    détention (utilisable avec with, comme threading.Lock).
+
+    Une acquisition sur LOCK_SAMPLE_EVERY, tous verrous du même nom
+    confondus, est chronométrée : les autres ne coûtent qu'un incrément.
+    Seul le détenteur écrit acquired_at : une instance suffit pour tous les
+    threads.
+    """
+
+    def __init__(self, name, lock=None):
+        self.lock = lock if lock is not None else threading.Lock()
+        self.wait = LOCK_WAIT[name]
+        self.hold = LOCK_HOLD[name]
+        self.tickets = _lock_tickets[name]
+        self.acquired_at = None
+
+    def __enter__(self):
+        if next(self.tickets) % LOCK_SAMPLE_EVERY:
+            self.lock.acquire()
+            self.acquired_at = None
+            return self
+        start = time.perf_counter()
+        self.lock.acquire()
+        self.acquired_at = now = time.perf_counter()
+        self.wait.observe(now - start)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.acquired_at is not None:
+            self.hold.observe(time.perf_counter() - self.acquired_at)
+        self.lock.release()
+
+    def locked(self):
+        return self.lock.locked()
+
+
+def format_labels(labels, extra=None):
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in items) + '}'
+
+
+def format_bound(bound):
+    return repr(float(bound)) if bound != float('inf') else '+Inf'
+
+
+def sample_rates():
+    """Relève les compteurs (appelé chaque seconde par la roue de
+    temporisation du serveur)"""
+    totals = {}
+    for metric in _metrics:
+        if metric.kind == 'counter':
+            with metric.lock:
+                totals[metric.name] = metric.value
+    _rate_samples.append((time.monotonic(), totals))
+
+
+def rates():
+    """Débit moyen par seconde de chaque compteur sur la fenêtre relevée"""
+    samples = list(_rate_samples)
+    if len(samples) < 2:
+        return {}
+    (first_time, first), (last_time, last) = samples[0], samples[-1]
+    elapsed = last_time - first_time
+    return {name: round((total - first.get(name, 0)) / elapsed, 3) for name, total in last.items()}
+
+
+def to_prometheus():
+    """Texte d'exposition Prometheus (version 0.0.4)"""
+    lines = []
+    described = set()
+    for metric in _metrics:
+        if metric.name not in described:
+            described.add(metric.name)
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if metric.kind == 'counter':
+            with metric.lock:
+                value = metric.value
+            lines.append(f"{metric.name}{format_labels(metric.labels)} {value}")
+            continue
+        counts, count, total = metric.read()
+        cumulative = 0
+        for bound, bucket_count in zip(metric.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            lines.append(f"{metric.name}_bucket{format_labels(metric.labels, ('le', format_bound(bound)))} {cumulative}")
+        lines.append(f"{metric.name}_sum{format_labels(metric.labels)} {total!r}")
+        lines.append(f"{metric.name}_count{format_labels(metric.labels)} {count}")
+    return '\n'.join(lines) + '\n'
+
+
+def to_json():
+    """Résumé des mesures : totaux, quantiles estimés (secondes) et débits"""
+    histograms = []
+    counters = {}
+    for metric in _metrics:
+        if metric.kind == 'counter':
+            with metric.lock:
+                counters[metric.name] = metric.value
+            continue
+        counts, count, total = metric.read()
+        summary = {
+            'name': metric.name,
+            'labels': metric.labels,
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else None
+        }
+        for q in QUANTILES:
+            summary[f"p{round(q * 100)}"] = metric.quantile(q, counts, count)
+        summary['buckets'] = {format_bound(bound): bucket_count
+                              for bound, bucket_count in zip(metric.buckets + (float('inf'),), counts)}
+        histograms.append(summary)
+    return {
+        'uptime': time.monotonic() - _started,
+        'counters': counters,
+        'rates_per_second': rates(),
+        'histograms': histograms
+    }
+
+
+# Étapes du parcours d'un joueur
+QUEUE_WAIT = Histogram('queue_wait_seconds', "Attente en file, de l'arrivée à l'appariement")
+MATCH_START = Histogram('match_start_seconds', "Délai entre la création d'un match et l'envoi de l'état initial")
+HANDLE_MOVE = Histogram('handle_move_seconds', "Traitement d'un coup (handle_move)")
+BROADCAST = {
+    kind: Histogram('broadcast_seconds', "Encodage et mise en file d'un envoi aux deux joueurs", {'kind': kind})
+    for kind in ('state', 'delta')
+}
+LOCK_WAIT = {
+    name: Histogram('lock_wait_seconds', "Attente avant acquisition d'un verrou (échantillon)", {'lock': name})
+    for name in ('registry', 'match')
+}
+LOCK_HOLD = {
+    name: Histogram('lock_hold_seconds', "Durée de détention d'un verrou (échantillon)", {'lock': name})
+    for name in ('registry', 'match')
+}
+
+MOVES = Counter('moves_total', "Coups joués")
+MATCHES_CREATED = Counter('matches_created_total', "Matchs créés")
+MATCHES_FINISHED = Counter('matches_finished_total', "Matchs terminés par une victoire ou une égalité")
@@ -0,0 +1,319 @@
+"""Vue de la page de monitoring, tenue à jour au fil des événements.
+
+Le serveur signale à StatusBoard chaque changement visible sur la page
+(match créé, terminé, retiré ; joueur entré en file ou sorti) : la vue et ses
+compteurs sont mis à jour en O(1) sous un verrou propre, toujours pris en
+dernier et jamais tenu en même temps qu'un autre. Les signalements peuvent
+donc se faire sous n'importe quel verrou du serveur.
+
+Une requête HTTP ne parcourt plus les matchs : snapshot() fige, au plus une
+fois par intervalle, un instantané versionné (compteurs et copies des
+listes) partagé par tous les visiteurs, et chaque page des listes n'y est
+rendue qu'une fois. Ni queue_lock, ni registry_lock, ni verrou de match ne
+sont pris pour servir la page.
+
+EventStream pousse les changements aux tableaux de bord ouverts
+(Server-Sent Events) : chaque changement est un événement numéroté par la
+version de la vue, encodé une seule fois par un thread de diffusion qui
+envoie le même tampon à tous les abonnés. Un nouvel abonné reçoit d'abord
+un instantané, puis les événements qui l'ont suivi.
+"""
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Âge maximal (s) de l'instantané servi
+SNAPSHOT_INTERVAL = 2.0
+# Lignes par page des listes de matchs et de joueurs en attente
+PAGE_SIZE = 50
+
+# Diffusion en direct : période de regroupement des événements (s),
+# événements gardés pour les nouveaux abonnés, lots en attente tolérés par
+# abonné avant de le déconnecter (il se reconnecte avec un instantané neuf),
+# période des statistiques et des commentaires de maintien (s)
+BROADCAST_INTERVAL = 0.05
+HISTORY_SIZE = 10000
+SUBSCRIBER_MAX_BATCHES = 200
+STATS_INTERVAL = SNAPSHOT_INTERVAL
+KEEPALIVE_INTERVAL = 15.0
+KEEPALIVE = b": keepalive\n\n"
+
+# États d'un match sur la page
+IN_PROGRESS = 'in_progress'
+FINISHED = 'finished'
+RECONNECTING = 'reconnecting'
+STATUSES = (IN_PROGRESS, FINISHED, RECONNECTING)
+
+
+def page_count(total, size=PAGE_SIZE):
+    return max(1, -(-total // size))
+
+
+class Snapshot:
+    """État figé de la vue, à ne pas modifier.
+
+    matches : (match_id, pseudo 1, pseudo 2, état, gagnant) ;
+    waiting : (clé, pseudo, adresse, classement), dans l'ordre de la file ;
+    extra : statistiques fournies par l'appelant de snapshot().
+    """
+
+    def __init__(self, serial, version, counts, matches, waiting, extra):
+        self.serial = serial
+        self.version = version
+        self.taken_at = time.monotonic()
+        self.counts = counts
+        self.matches = matches
+        self.waiting = waiting
+        self.extra = extra
+        # Pages déjà rendues (clé choisie par l'appelant -> octets)
+        self.rendered = {}
+
+    def page(self, items, number):
+        """(lignes, numéro, nombre de pages) de la page demandée, ramenée
+        entre la première et la dernière"""
+        pages = page_count(len(items))
+        number = min(max(number, 1), pages)
+        start = (number - 1) * PAGE_SIZE
+        return items[start:start + PAGE_SIZE], number, pages
+
+    def event(self):
+        """Événement 'snapshot' (état initial d'un abonné), encodé une fois"""
+        data = self.rendered.get('event')
+        if data is None:
+            data = self.rendered['event'] = encode_event('snapshot', {
+                'version': self.version,
+                'counts': self.counts,
+                'matches': self.matches,
+                'waiting': self.waiting,
+                'extra': self.extra
+            }, self.version)
+        return data
+
+
+class StatusBoard:
+    """Matchs et file d'attente tels qu'affichés par la page de monitoring"""
+
+    def __init__(self, interval=SNAPSHOT_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.matches = {}
+        # session -> (clé, pseudo, adresse, classement), dans l'ordre de la
+        # file ; la clé (id de la session) identifie le joueur dans les
+        # événements
+        self.waiting = OrderedDict()
+        self.counts = dict.fromkeys(STATUSES, 0)
+        # Incrémentée à chaque changement de la vue
+        self.version = 0
+        # (version, sorte, données) à diffuser, si un EventStream est branché
+        self.events = None
+        self.current = None
+        self.serial = 0
+        # Un seul thread construit l'instantané suivant
+        self.refresh_lock = threading.Lock()
+
+    # -- Signalements du serveur --
+
+    def _changed(self, kind, data):
+        """Nouvelle version de la vue (self.lock tenu) ; simple ajout à la
+        file de diffusion, encodée plus tard par EventStream"""
+        self.version += 1
+        if self.events is not None:
+            self.events.append((self.version, kind, data))
+
+    def _set_match(self, summary):
+        """Remplace la ligne d'un match (self.lock tenu)"""
+        previous = self.matches.get(summary[0])
+        if previous is not None:
+            self.counts[previous[3]] -= 1
+        self.matches[summary[0]] = summary
+        self.counts[summary[3]] += 1
+
+    def match_created(self, match_id, pseudo1, pseudo2, status=IN_PROGRESS):
+        summary = (match_id, pseudo1, pseudo2, status, None)
+        with self.lock:
+            self._set_match(summary)
+            self._changed('match_created', summary)
+
+    def match_status(self, match_id, status, winner=None):
+        """Nouvel état d'un match encore affiché (fin de partie, reprise)"""
+        with self.lock:
+            previous = self.matches.get(match_id)
+            if previous is not None:
+                self._set_match(previous[:3] + (status, winner))
+                self._changed('match_finished' if status == FINISHED else 'match_updated',
+                              {'match_id': match_id, 'status': status, 'winner': winner})
+
+    def match_removed(self, match_id):
+        with self.lock:
+            previous = self.matches.pop(match_id, None)
+            if previous is not None:
+                self.counts[previous[3]] -= 1
+                self._changed('match_removed', {'match_id': match_id})
+
+    def player_queued(self, session, pseudo, addr, rating, front=False):
+        entry = (id(session), pseudo, addr, rating)
+        with self.lock:
+            self.waiting[session] = entry
+            if front:
+                self.waiting.move_to_end(session, last=False)
+            self._changed('queue_join', {'player': entry, 'front': front})
+
+    def player_left(self, session):
+        with self.lock:
+            entry = self.waiting.pop(session, None)
+            if entry is not None:
+                self._changed('queue_leave', {'key': entry[0]})
+
+    # -- Lecture --
+
+    def snapshot(self, collect=None):
+        """Instantané de moins de self.interval secondes.
+
+        collect() fournit les autres statistiques de la page (lues sans
+        verrou du jeu). Pendant qu'un thread construit le suivant, les
+        autres servent l'instantané courant ; les listes ne sont recopiées
+        que si la vue a changé depuis.
+        """
+        current = self.current
+        if current is not None and time.monotonic() - current.taken_at < self.interval:
+            return current
+        if not self.refresh_lock.acquire(blocking=current is None):
+            return current
+        try:
+            current = self.current
+            if current is not None and time.monotonic() - current.taken_at < self.interval:
+                return current
+            return self._take(collect)
+        finally:
+            self.refresh_lock.release()
+
+    def refresh(self, collect=None):
+        """Nouvel instantané immédiat (benchmarks)"""
+        with self.refresh_lock:
+            return self._take(collect)
+
+    def _take(self, collect):
+        current = self.current
+        with self.lock:
+            version = self.version
+            counts = dict(self.counts)
+            if current is not None and current.version == version:
+                matches, waiting = current.matches, current.waiting
+            else:
+                matches, waiting = tuple(self.matches.values()), tuple(self.waiting.values())
+        self.serial += 1
+        self.current = Snapshot(self.serial, version, counts, matches, waiting,
+                                collect() if collect is not None else {})
+        return self.current
+
+
+def encode_event(kind, data, version=None):
+    """Trame Server-Sent Events ; id (la version de la vue) permet au
+    tableau de bord d'écarter ce que son instantané contient déjà"""
+    head = f"id: {version}\n" if version is not None else ""
+    return f"{head}event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscriber:
+    """Tableau de bord abonné : lots d'événements encodés, dans l'ordre"""
+
+    def __init__(self):
+        self.batches = queue.Queue(SUBSCRIBER_MAX_BATCHES)
+        # Abonné trop lent, retiré de la diffusion
+        self.dropped = False
+
+    def next_batch(self):
+        """Prochain lot à écrire, ou un commentaire de maintien après
+        KEEPALIVE_INTERVAL sans événement"""
+        try:
+            return self.batches.get(timeout=KEEPALIVE_INTERVAL)
+        except queue.Empty:
+            return KEEPALIVE
+
+
+class EventStream:
+    """Diffusion des changements d'un StatusBoard aux tableaux de bord.
+
+    Le thread de diffusion relève les changements toutes les
+    BROADCAST_INTERVAL secondes, encode chacun une fois et dépose le même
+    lot d'octets dans la file de chaque abonné ; les gestionnaires HTTP ne
+    font qu'écrire ces lots. Sans abonné, les changements sont écartés sans
+    être encodés.
+    """
+
+    def __init__(self, board, collect=None):
+        self.board = board
+        self.collect = collect
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        # (version, trame) des derniers événements diffusés
+        self.history = deque(maxlen=HISTORY_SIZE)
+        with board.lock:
+            board.events = deque()
+            # history contient tous les événements de version supérieure
+            self.complete_from = board.version
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def subscribe(self):
+        """Nouvel abonné ; retourne (abonné, octets à lui envoyer d'abord :
+        instantané puis événements qui l'ont suivi)"""
+        subscriber = Subscriber()
+        snapshot = self.board.snapshot(self.collect)
+        with self.lock:
+            if snapshot.version < self.complete_from:
+                # Instantané plus ancien que l'historique : on en prend un
+                # neuf (les événements qu'il contient déjà seront ignorés
+                # par le tableau de bord grâce à leur id)
+                snapshot = self.board.refresh(self.collect)
+            backlog = [data for version, data in self.history if version > snapshot.version]
+            self.subscribers.add(subscriber)
+        return subscriber, b''.join([snapshot.event()] + backlog)
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def stats(self):
+        """Événement 'stats' : compteurs et statistiques de collect()"""
+        with self.board.lock:
+            counts = dict(self.board.counts)
+            waiting = len(self.board.waiting)
+        return encode_event('stats', {'counts': counts, 'waiting': waiting,
+                                      'extra': self.collect() if self.collect is not None else {}})
+
+    def _run(self):
+        events = self.board.events
+        last_stats = 0.0
+        while True:
+            time.sleep(BROADCAST_INTERVAL)
+            pending = [events.popleft() for _ in range(len(events))]
+            if not self.subscribers:
+                with self.lock:
+                    if not self.subscribers:
+                        if pending:
+                            self.history.clear()
+                            self.complete_from = pending[-1][0]
+                        continue
+            encoded = [(version, encode_event(kind, data, version)) for version, kind, data in pending]
+            now = time.monotonic()
+            if now - last_stats >= STATS_INTERVAL:
+                last_stats = now
+                encoded.append((None, self.stats()))
+            if not encoded:
+                continue
+            batch = b''.join(data for _, data in encoded)
+            with self.lock:
+                for version, data in encoded:
+                    if version is None:
+                        continue
+                    if len(self.history) == self.history.maxlen:
+                        self.complete_from = self.history[0][0]
+                    self.history.append((version, data))
+                for subscriber in list(self.subscribers):
+                    try:
+                        subscriber.batches.put_nowait(batch)
+                    except queue.Full:
+                        subscriber.dropped = True
+                        self.subscribers.discard(subscriber)
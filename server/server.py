@@ -1,425 +1,1936 @@
-from http.server import SimpleHTTPRequestHandler, HTTPServer
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from collections import OrderedDict, deque
+import abc
+import argparse
+import asyncio
+import json
+import multiprocessing
+import multiprocessing.connection
+import selectors
+import shutil
 import socket
+import tempfile
 import threading
 import time
 import signal
 import sys
-import json
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared import protocol
+from jeu import game_logic
+from jeu import database
+from jeu import rating
+from timer_wheel import TimerWheel
+import cluster
+import logs
+import metrics
+import monitoring
 
 HOST = '10.31.32.143'
 PORT = 12345
 HTTP_PORT = 8080
 
-queue = []
+# Journalisation par catégorie (voir logs.py) : le détail de chaque message
+# et de chaque coup est au niveau DEBUG
+log = logs.get_logger()
+net_log = logs.get_logger('net')
+match_log = logs.get_logger('match')
+move_log = logs.get_logger('move')
+matchmaking_log = logs.get_logger('matchmaking')
+# (niveau affiché, niveau du tampon de /logs, échantillonnage), repris par
+# les processus du cluster
+LOG_CONFIG = ('info', None, {})
+
+# Moteurs de connexion disponibles : un thread de lecture par client et un
+# thread d'écriture partagé (historique), ou une boucle d'événements asyncio
+# unique pour toutes les connexions
+SERVER_MODES = ('threads', 'asyncio')
+MODE = 'threads'
+# Envoi sans attente du thread d'écriture partagé (None sous Windows)
+SEND_NOWAIT = getattr(socket, 'MSG_DONTWAIT', None)
+
+# File d'attente : sessions dans l'ordre d'arrivée -> date d'entrée en file.
+# L'OrderedDict donne l'ajout, le retrait d'un joueur et l'appariement en O(1).
+queue = OrderedDict()
 matches = {}
 match_id_counter = 1
-lock = threading.Lock()
+
+# Verrous, toujours pris dans cet ordre et jamais l'inverse :
+#   queue_lock -> registry_lock -> match['lock']
+# - queue_lock protège la file d'attente (matchmaking) ;
+# - registry_lock protège le dictionnaire matches et match_id_counter ;
+# - match['lock'] protège le plateau et l'état d'un seul match.
+# On ne tient jamais deux verrous de match à la fois : les coups de matchs
+# différents s'exécutent ainsi en parallèle.
+# registry_lock et les verrous de match mesurent attente et détention
+# (metrics.TimedLock) ; queue_lock sert aussi à la condition de matchmaking()
+# et reste un verrou simple.
+queue_lock = threading.Lock()
+registry_lock = metrics.TimedLock('registry')
+# Réveille matchmaking() dès qu'un joueur entre dans la file
+queue_changed = threading.Condition(queue_lock)
+
+# Files d'envoi : nombre maximal de messages en attente par connexion, et
+# politique appliquée à un client trop lent quand sa file est pleine :
+# - 'drop' : le nouveau message est abandonné ;
+# - 'coalesce' : les anciens états de jeu en attente sont remplacés par le dernier ;
+# - 'disconnect' : le client est déconnecté.
+SLOW_CLIENT_POLICIES = ('drop', 'coalesce', 'disconnect')
+OUTBOX_MAX_MESSAGES = 64
+SLOW_CLIENT_POLICY = 'coalesce'
+
+# Appariement : 'fifo' (ordre d'arrivée) ou 'rating' (classements Elo
+# proches, écart accepté élargi avec l'attente ; voir jeu/rating.py)
+MATCHMAKING_MODES = ('fifo', 'rating')
+MATCHMAKING_MODE = 'fifo'
+# Classement de chaque pseudo, mis à jour à chaque fin de match dans les
+# deux modes ; son verrou est une feuille
+ratings = rating.RatingTable()
+# En mode 'rating', les joueurs de queue y sont aussi indexés (queue_lock)
+rating_pool = rating.RatingPool()
+
+# Mode --workers N (voir cluster.py) : ce processus est un des workers,
+# le coordinateur forme les paires et un match est tenu par le worker de son
+# joueur 1. None quand le serveur tourne en un seul processus.
+WORKERS = 1
+worker_node = None
+
+# Délai maximal d'attente des READY avant d'envoyer l'état initial d'un match
+MATCH_START_TIMEOUT = 2.0
+
+# Échéances de tous les matchs (démarrage, expiration, reconnexion) sur une
+# seule roue de temporisation et un seul thread ; son verrou peut être pris
+# sous n'importe quel autre
+timers = TimerWheel(tick=0.1)
+
+# Battements de cœur (clients ayant négocié 'heartbeat') : un client muet
+# depuis HEARTBEAT_INTERVAL secondes reçoit un ping, et il est déconnecté
+# après HEARTBEAT_TIMEOUT secondes sans aucune trame (PONG compris)
+HEARTBEAT_INTERVAL = 10.0
+HEARTBEAT_TIMEOUT = 30.0
+# Les autres clients (sans 'heartbeat', anciens clients) ne peuvent pas être
+# sondés : seul leur silence compte. Ils se taisent légitimement en file ou
+# pendant le coup adverse, d'où un délai bien plus long, celui après lequel
+# un match sans coup est de toute façon abandonné.
+IDLE_CLIENT_TIMEOUT = 300.0
+# Sessions déconnectées faute de réponse (registry_lock)
+reaped_sessions = 0
+
+# Un match terminé reste consultable FINISHED_MATCH_TTL secondes, un match
+# sans aucun coup depuis IDLE_MATCH_TIMEOUT secondes est abandonné
+FINISHED_MATCH_TTL = 60.0
+IDLE_MATCH_TIMEOUT = 300.0
+# Matchs retirés de matches par expiration (registry_lock)
+evictions = {'finished': 0, 'idle': 0}
+
+# Règles des matchs : plateau 3×3, 3 pions alignés (voir jeu/game_logic.py)
+GAME_RULES = game_logic.TIC_TAC_TOE
+
+# Base SQLite des matchs et des tours (chaîne vide : pas de persistance).
+# recorder écrit en arrière-plan : voir jeu/database.py
+DB_PATH = 'matchmaking.db'
+recorder = None
+# Un instantané du match est enregistré tous les SNAPSHOT_INTERVAL coups :
+# au redémarrage, seuls les tours suivants sont rejoués
+SNAPSHOT_INTERVAL = 4
+
+# Période (s) du relevé des compteurs de débit (voir metrics.rates)
+METRICS_SAMPLE_INTERVAL = 1.0
+
+# Matchs restaurés au démarrage : ils attendent que leurs joueurs se
+# reconnectent avec le même pseudo, au plus RECONNECT_TIMEOUT secondes.
+RECONNECT_TIMEOUT = 120.0
+# pseudo -> (match_id, player_number) des places à reprendre (registry_lock)
+awaiting_reconnect = {}
+
+# Vue de la page de monitoring : chaque changement de matches ou de la file
+# lui est signalé, les requêtes HTTP ne lisent qu'elle (voir monitoring.py)
+status_board = monitoring.StatusBoard()
+# Diffusion en direct de status_board (page /), créée par run_services()
+event_stream = None
 
 def check_game_end(board):
     """Vérifie si le jeu est terminé et retourne (is_over, winner)"""
-    # Vérifier les lignes
-    for i in range(0, 9, 3):
-        if board[i] == board[i+1] == board[i+2] != ' ':
-            return True, 1 if board[i] == 'X' else 2
-    
-    # Vérifier les colonnes
-    for i in range(3):
-        if board[i] == board[i+3] == board[i+6] != ' ':
-            return True, 1 if board[i] == 'X' else 2
-    
-    # Vérifier les diagonales
-    if board[0] == board[4] == board[8] != ' ':
-        return True, 1 if board[0] == 'X' else 2
-    if board[2] == board[4] == board[6] != ' ':
-        return True, 1 if board[2] == 'X' else 2
-    
-    # Vérifier si match nul
-    if ' ' not in board:
-        return True, 0
-    
-    return False, None
+    return GAME_RULES.game_end(GAME_RULES.from_string(board))
 
-def send_game_state(match):
-    """Envoie l'état du jeu à tous les joueurs du match"""
-    state = {
+def game_state(match):
+    """Copie de l'état du jeu d'un match (à appeler avec match['lock'] tenu)"""
+    return {
         'type': 'game_state',
-        'board': match['board'],
+        'match_id': match['match_id'],
+        'seq': match['seq'],
+        'board': GAME_RULES.to_string(match['stones']),
         'current_turn': match['current_turn'],
         'is_finished': match['is_finished'],
         'winner': match['winner']
     }
+
+def send_game_state(match, state=None):
+    """Envoie l'état du jeu à tous les joueurs du match"""
+    start = time.perf_counter()
+    if state is None:
+        state = game_state(match)
+    move_log.debug("Envoi état de jeu: %s", state)
     
-    message = json.dumps(state)
-    print(f"[DEBUG] Envoi état de jeu: {message}")
-    
-    try:
-        match['player1_conn'].sendall(message.encode() + b'\n')
-    except:
-        print("[!] Impossible d'envoyer à player1")
+    # Encodé une seule fois par format de fil, puis mis en file d'envoi :
+    # ne bloque jamais sur le réseau
+    frames = {}
+    for player_number in (1, 2):
+        conn = match[f'player{player_number}_conn']
+        data = frames.get(conn.wire_format)
+        if data is None:
+            data = frames[conn.wire_format] = protocol.encode_message(state, conn.wire_format)
+        if not conn.send_message(data, kind='state'):
+            net_log.warning("Impossible d'envoyer à player%d", player_number)
+    metrics.BROADCAST['state'].since(start)
+
+def send_game_delta(match, delta):
+    """Envoie un coup joué aux deux joueurs (match['lock'] tenu).
+
+    Les clients qui ont négocié 'delta' reçoivent seulement la case jouée ;
+    les autres, ou ceux dont un delta a été perdu, reçoivent l'état complet.
+    Chaque trame est encodée au plus une fois par format.
+    """
+    start = time.perf_counter()
+    move_log.debug("Envoi delta: %s", delta)
+    deltas = {}
+    snapshots = {}
+
+    def snapshot(wire_format):
+        if wire_format not in snapshots:
+            snapshots[wire_format] = protocol.encode_message(game_state(match), wire_format)
+        return snapshots[wire_format]
+
+    for player_number in (1, 2):
+        conn = match[f'player{player_number}_conn']
+        data = deltas.get(conn.wire_format)
+        if data is None:
+            data = deltas[conn.wire_format] = protocol.encode_message(delta, conn.wire_format)
+        if not conn.send_update(data, lambda: snapshot(conn.wire_format)):
+            net_log.warning("Impossible d'envoyer à player%d", player_number)
+    metrics.BROADCAST['delta'].since(start)
+
+class OutboundConnection(abc.ABC):
+    """Connexion dont les envois passent par une file bornée.
+
+    send_message() ne fait que déposer le message et ne bloque jamais ; un
+    writer propre au moteur (thread ou tâche asyncio) vide la file. Quand un
+    client ne lit plus assez vite, SLOW_CLIENT_POLICY s'applique. Chaque
+    moteur fournit _wake_writer() et _abort() : une sous-classe qui en
+    oublie une ne peut pas être instanciée.
+    """
+
+    def __init__(self):
+        self.wire_format = 'json'
+        self.features = set()
+        # Un delta a été perdu : le prochain coup part en état complet
+        self.needs_snapshot = False
+        self.outbox = deque()
+        self.outbox_lock = threading.Lock()
+        self.closed = False
+        self.dropped = 0
+        # Dernière trame reçue du client (voir check_heartbeat)
+        self.last_seen = time.monotonic()
+
+    def send_message(self, data, kind='message'):
+        """Met un message en file d'envoi ; retourne False s'il est abandonné"""
+        with self.outbox_lock:
+            if self.closed:
+                return False
+            if len(self.outbox) >= OUTBOX_MAX_MESSAGES and not self._make_room(kind):
+                self.dropped += 1
+                if kind == 'delta':
+                    self.needs_snapshot = True
+                return False
+            self.outbox.append((kind, data))
+            if kind == 'state':
+                self.needs_snapshot = False
+        self._wake_writer()
+        return True
+
+    def send(self, message, kind='message'):
+        """Encode un message (dict) dans le format négocié et le met en file"""
+        return self.send_message(protocol.encode_message(message, self.wire_format), kind)
+
+    def send_update(self, delta, snapshot):
+        """Envoie un coup : le delta si le client suit le flux, sinon l'état
+        complet renvoyé par snapshot() (appelé seulement si nécessaire)"""
+        if 'delta' in self.features and not self.needs_snapshot:
+            if self.send_message(delta, kind='delta'):
+                return True
+        return self.send_message(snapshot(), kind='state')
+
+    def _make_room(self, kind):
+        """Applique la politique client lent (outbox_lock tenu)"""
+        if SLOW_CLIENT_POLICY == 'coalesce' and kind in ('state', 'delta'):
+            # Les états en attente sont périmés : seul le dernier compte.
+            # Un delta ne remplace pas ceux qu'il suit : l'appelant enverra
+            # l'état complet à sa place (voir send_update).
+            kept = deque(entry for entry in self.outbox if entry[0] not in ('state', 'delta'))
+            discarded = len(self.outbox) - len(kept)
+            self.dropped += discarded
+            self.outbox = kept
+            if kind == 'delta' and discarded:
+                return False
+            return len(self.outbox) < OUTBOX_MAX_MESSAGES
+        if SLOW_CLIENT_POLICY == 'disconnect':
+            net_log.warning("Client trop lent, déconnexion")
+            self._close_outbox()
+        return False
+
+    def abort(self):
+        """Ferme la connexion sans envoyer ce qui reste en file (client
+        muet, trop lent) ; son gestionnaire, débloqué, fera le nettoyage"""
+        with self.outbox_lock:
+            self._close_outbox()
+
+    def _close_outbox(self):
+        """Vide et ferme la file, puis débloque writer et lecteur
+        (outbox_lock tenu)"""
+        self.closed = True
+        self.outbox.clear()
+        self._abort()
+
+    def _next_message(self):
+        with self.outbox_lock:
+            if self.outbox:
+                return self.outbox.popleft()[1]
+            return None
+
+    @abc.abstractmethod
+    def _wake_writer(self):
+        """Signale au writer du moteur que la file n'est pas vide"""
+
+    @abc.abstractmethod
+    def _abort(self):
+        """Débloque la lecture et l'écriture de la socket (outbox_lock tenu)"""
+
+class SocketWriter:
+    """Thread d'écriture unique du moteur threads, partagé par toutes les
+    connexions.
+
+    Les sockets restent bloquantes pour le recv() de leur gestionnaire ; ce
+    thread vide leurs files avec des send() MSG_DONTWAIT, qui n'écrivent que
+    ce que le noyau accepte. Une socket au tampon d'envoi plein est confiée
+    au sélecteur et reprise quand elle redevient accessible en écriture : un
+    client lent ne retient ni le thread ni les autres clients. Sans
+    MSG_DONTWAIT (Windows), chaque envoi attend ce signal du sélecteur.
+
+    Seul ce thread touche au sélecteur et ferme les sockets : un descripteur
+    réutilisé par une nouvelle connexion n'y est jamais encore inscrit.
+    """
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        # Connexions à vider ou à fermer, déposées par n'importe quel thread
+        self.pending = deque()
+        # Un octet sur cette paire réveille le sélecteur ; woken évite d'en
+        # écrire un par message
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.wakeup_send.setblocking(False)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ)
+        self.woken = False
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def wake(self, conn):
+        """Signale une connexion à vider (nouveau message) ou fermée"""
+        self.pending.append(conn)
+        if not self.woken:
+            self.woken = True
+            try:
+                self.wakeup_send.send(b'\0')
+            except BlockingIOError:
+                pass  # un réveil attend déjà
+
+    def _run(self):
+        while True:
+            for key, _ in self.selector.select():
+                if key.data is None:
+                    try:
+                        self.wakeup_recv.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    # Après la lecture des octets de réveil et avant le
+                    # relevé de pending : un dépôt qui voit encore woken à
+                    # True est traité ci-dessous, les suivants réécrivent
+                    self.woken = False
+                else:
+                    self._flush(key.data, writable=True)
+            while self.pending:
+                self._flush(self.pending.popleft())
+
+    def _flush(self, conn, writable=False):
+        """Envoie ce que la socket accepte, puis la surveille si elle n'a pas
+        tout pris ; retire et ferme les connexions fermées"""
+        if conn.closed:
+            self._unwatch(conn)
+            if conn.released:
+                conn.sock.close()
+            return
+        while True:
+            data = conn.unsent
+            if data is None:
+                data = conn._next_message()
+                if data is None:
+                    self._unwatch(conn)
+                    return
+                data = memoryview(data)
+            if SEND_NOWAIT is None and not writable:
+                conn.unsent = data
+                self._watch(conn)
+                return
+            try:
+                sent = conn.sock.send(data, SEND_NOWAIT or 0)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                conn.unsent = None
+                conn.abort()
+                return
+            writable = False
+            if sent < len(data):
+                conn.unsent = data[sent:]
+                self._watch(conn)
+                return
+            conn.unsent = None
+
+    def _watch(self, conn):
+        if not conn.watched:
+            self.selector.register(conn.sock, selectors.EVENT_WRITE, conn)
+            conn.watched = True
+
+    def _unwatch(self, conn):
+        if conn.watched:
+            self.selector.unregister(conn.sock)
+            conn.watched = False
+
+class ThreadedConnection(OutboundConnection):
+    """Socket bloquante du moteur threads : le thread du gestionnaire lit,
+    le SocketWriter partagé écrit"""
+
+    def __init__(self, sock):
+        super().__init__()
+        self.sock = sock
+        # État tenu par le thread d'écriture : reste de la trame en cours,
+        # socket inscrite au sélecteur
+        self.unsent = None
+        self.watched = False
+        # close() appelé : le thread d'écriture fermera la socket
+        self.released = False
+
+    def fileno(self):
+        return -1 if self.closed else self.sock.fileno()
+
+    def _wake_writer(self):
+        socket_writer.wake(self)
+
+    def _abort(self):
+        # Débloque le recv() du gestionnaire, qui fera le nettoyage
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        socket_writer.wake(self)
+
+    def close(self):
+        with self.outbox_lock:
+            self.closed = True
+            self.released = True
+        socket_writer.wake(self)
+
+# Thread d'écriture du moteur threads, démarré par start_server()
+socket_writer = SocketWriter()
+
+class AsyncioConnection(OutboundConnection):
+    """Socket non bloquante du moteur asyncio : une tâche vide la file avec
+    sock_sendall(), qui n'avance qu'au rythme du client.
+
+    Les envois peuvent venir d'autres threads (matchmaking) : le réveil de la
+    tâche passe toujours par call_soon_threadsafe.
+    """
+
+    def __init__(self, sock, loop):
+        super().__init__()
+        self.sock = sock
+        self.loop = loop
+        self.has_data = asyncio.Event()
+        self.writer_task = loop.create_task(self._writer())
+
+    def _wake_writer(self):
+        self.loop.call_soon_threadsafe(self.has_data.set)
+
+    async def _writer(self):
+        try:
+            while not self.closed:
+                await self.has_data.wait()
+                self.has_data.clear()
+                data = self._next_message()
+                while data is not None and not self.closed:
+                    await self.loop.sock_sendall(self.sock, data)
+                    data = self._next_message()
+        except OSError:
+            self.close()
+
+    def fileno(self):
+        return -1 if self.closed else self.sock.fileno()
+
+    def _abort(self):
+        self.loop.call_soon_threadsafe(self._shutdown)
+
+    def _shutdown(self):
+        # Termine le sock_recv_into du gestionnaire, qui fera le nettoyage
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        with self.outbox_lock:
+            self.closed = True
+        self.loop.call_soon_threadsafe(self._close_in_loop)
+
+    def _close_in_loop(self):
+        self.has_data.set()
+        self.sock.close()
+
+def handle_handshake(conn, decoder, frame):
+    """Traite la trame de négociation PROTO:<format>[,options] si c'en est une.
+
+    Le choix est confirmé en format texte, puis la connexion et le décodeur
+    passent au format retenu (json si le format demandé est inconnu). Seules
+    les options connues du serveur sont confirmées.
+    """
+    text = frame.decode(errors='replace').strip()
+    if not text.startswith(protocol.HANDSHAKE_PREFIX):
+        return False
+    wire_format, features = protocol.parse_handshake(text)
+    conn.send_message(protocol.encode_handshake(wire_format, sorted(features),
+                                                protocol.HANDSHAKE_REPLY_PREFIX))
+    conn.wire_format = wire_format
+    conn.features = features
+    decoder.set_framing(protocol.framing_for(wire_format))
+    net_log.debug("Format de fil négocié : %s %s", wire_format, sorted(features))
+    return True
+
+class PlayerSession:
+    """Joueur connecté : sa connexion, son pseudo et le match qui lui est attribué.
+
+    matchmaking() renseigne directement match_id/player_number : le
+    gestionnaire du client lit ces champs à chaque commande, et personne n'a
+    besoin de parcourir les matchs pour retrouver celui d'une connexion.
+    """
+
+    def __init__(self, conn, addr, pseudo):
+        self.conn = conn
+        self.addr = addr
+        self.pseudo = pseudo
+        self.match_id = None
+        self.player_number = None
+        # Mode --workers : identifiant dans le cluster, et worker qui tient
+        # le match quand ce n'est pas celui-ci
+        self.sid = None
+        self.owner = None
+        # Entrée en file (time.monotonic()), pour la mesure de l'attente
+        self.queued_at = None
+
+    def assign_match(self, match_id, player_number):
+        """Appelé par matchmaking() (queue_lock tenu) quand le joueur est apparié"""
+        self.match_id = match_id
+        self.player_number = player_number
+        match_log.debug("Joueur %s assigné au match %s comme joueur %s", self.pseudo, match_id, player_number)
+
+    def leave_match(self):
+        """Oublie le match courant avant un retour en file d'attente"""
+        self.match_id = None
+        self.player_number = None
+        self.owner = None
+
+def watch_session(session):
+    """Programme la surveillance d'une session : battements de cœur si elle
+    a négocié 'heartbeat', sinon simple délai de silence (IDLE_CLIENT_TIMEOUT).
+
+    Chaque session a au plus une échéance sur la roue partagée : le coût par
+    connexion est constant et aucun thread n'est créé.
+    """
+    if 'heartbeat' in session.conn.features:
+        timers.schedule(HEARTBEAT_INTERVAL, check_heartbeat, session)
+    else:
+        timers.schedule(IDLE_CLIENT_TIMEOUT, check_heartbeat, session)
+
+def check_heartbeat(session):
+    """Échéance de surveillance : ping si le client est muet, déconnexion
+    s'il l'est depuis HEARTBEAT_TIMEOUT, sinon report de l'échéance. Un
+    client sans 'heartbeat' ne reçoit aucun ping : il est déconnecté après
+    IDLE_CLIENT_TIMEOUT secondes sans trame."""
+    conn = session.conn
+    if conn.closed or conn.fileno() == -1:
+        return
+    silent = time.monotonic() - conn.last_seen
+    if 'heartbeat' not in conn.features:
+        if silent >= IDLE_CLIENT_TIMEOUT:
+            reap_session(session, silent)
+        else:
+            timers.schedule(IDLE_CLIENT_TIMEOUT - silent, check_heartbeat, session)
+        return
+    if silent >= HEARTBEAT_TIMEOUT:
+        reap_session(session, silent)
+        return
+    if silent >= HEARTBEAT_INTERVAL:
+        conn.send({'type': 'ping'}, kind='ping')
+        delay = min(HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT - silent)
+    else:
+        delay = HEARTBEAT_INTERVAL - silent
+    timers.schedule(delay, check_heartbeat, session)
+
+def reap_session(session, silent):
+    """Déconnecte une session sans réponse (connexion à moitié ouverte).
+
+    Elle quitte tout de suite la file d'attente pour ne pas être appariée ;
+    la fermeture de la socket réveille son gestionnaire, qui libère son match
+    via cleanup_player().
+    """
+    global reaped_sessions
+    net_log.warning("%s ne répond plus depuis %.0f s, déconnexion", session.pseudo, silent)
+    with queue_lock:
+        dequeue_player(session)
+    with registry_lock:
+        reaped_sessions += 1
+    session.conn.abort()
+
+def dispatch_command(session, data):
+    """Traite une commande du client, en file d'attente comme en match.
+
+    Le gestionnaire lit la connexion en permanence : les PONG arrivent même
+    pendant l'attente d'un adversaire, et une déconnexion est vue aussitôt.
+    """
+    if data == "PONG":
+        return
+    net_log.debug("Données reçues de %s: %s", session.pseudo, data)
     
-    try:
-        match['player2_conn'].sendall(message.encode() + b'\n')
-    except:
-        print("[!] Impossible d'envoyer à player2")
-
-def handle_client(conn, addr):
-    global queue
-    print(f"[+] Connexion de {addr}")
-    player_match_id = None
-    player_number = None
-    player_pseudo = None
+    # Traiter les différents types de messages
+    if data == "PING":
+        session.conn.send_message(protocol.encode_text("PONG", session.conn.wire_format))
+    elif session.owner is not None and not data.startswith("NEW_GAME"):
+        # Match tenu par un autre worker : c'est lui qui traite la commande
+        worker_node.send_worker(session.owner, 'command', session.match_id, session.player_number, data)
+    elif data.startswith("MOVE:"):
+        handle_move(session.match_id, session.player_number, data[5:].strip())
+    elif data.startswith("READY"):
+        handle_ready(session)
+    elif data.startswith("NEW_GAME"):
+        handle_new_game_request(session)
+    elif data.startswith("RESYNC"):
+        handle_resync(session)
+
+def client_flow(conn, addr, decoder):
+    """Déroulement d'une connexion de jeu, commun aux deux moteurs.
+
+    Générateur : chaque yield attend la trame suivante (None à la
+    déconnexion), que le moteur lit avec sa propre primitive et renvoie par
+    send() ; une erreur de lecture lui est transmise par throw(). La
+    négociation, le pseudo, la file, les commandes et le nettoyage ne sont
+    écrits qu'ici.
+    """
+    net_log.info("Connexion de %s", addr)
+    session = None
     
     try:
-        pseudo = conn.recv(1024).decode()
-        print(f"[DEBUG] Message brut reçu : {pseudo}")
+        frame = yield
+        if frame is not None and handle_handshake(conn, decoder, frame):
+            frame = yield
+        if frame is None:
+            return
+        pseudo = protocol.decode_command(frame, conn.wire_format)
+        net_log.debug("Message brut reçu : %s", pseudo)
 
         if pseudo.startswith("GET") or pseudo.startswith("POST"):
-            print(f"[!] Requête HTTP détectée sur le serveur socket")
-            conn.close()
+            net_log.warning("Requête HTTP détectée sur le serveur socket")
             return
 
-        print(f"[+] Pseudo reçu : {pseudo}")
-        player_pseudo = pseudo
+        net_log.info("Pseudo reçu : %s", pseudo)
+        session = PlayerSession(conn, addr, pseudo)
+        watch_session(session)
 
-        with lock:
-            queue.append((addr[0], addr[1], pseudo, conn))
-            print(f"[DEBUG] File d'attente actuelle : {len(queue)} joueur(s)")
+        # Un joueur d'un match restauré reprend sa place, les autres attendent
+        if not resume_match(session):
+            with queue_lock:
+                enqueue_player(session)
+                matchmaking_log.debug("File d'attente actuelle : %d joueur(s)", len(queue))
 
-        conn.sendall(b"En attente d'un adversaire...\n")
+            conn.send_message(protocol.encode_text("En attente d'un adversaire...", conn.wire_format))
 
-        # Boucle principale de gestion du client
+        # Boucle principale de gestion du client : une commande par trame
         while True:
-            # Attendre d'être assigné à un match
-            while player_match_id is None:
-                with lock:
-                    for match_id, match in matches.items():
-                        if match['player1_conn'] == conn:
-                            player_match_id = match_id
-                            player_number = 1
-                            break
-                        elif match['player2_conn'] == conn:
-                            player_match_id = match_id
-                            player_number = 2
-                            break
-                time.sleep(0.1)
-
-            print(f"[DEBUG] Joueur {pseudo} assigné au match {player_match_id} comme joueur {player_number}")
-
-            # Boucle de jeu pour ce match
-            while player_match_id is not None:
-                try:
-                    data = conn.recv(1024).decode()
-                    if not data:
-                        print(f"[!] Déconnexion de {addr}")
-                        return
-                    
-                    print(f"[DEBUG] Données reçues de {pseudo}: {data}")
-                    
-                    # Traiter les différents types de messages
-                    if data.startswith("MOVE:"):
-                        move_data = data[5:].strip()
-                        handle_move(player_match_id, player_number, move_data)
-                    elif data.startswith("NEW_GAME"):
-                        # Nettoyer l'ancien match s'il existe
-                        with lock:
-                            if player_match_id in matches:
-                                print(f"[DEBUG] Nettoyage de l'ancien match {player_match_id} pour {pseudo}")
-                                del matches[player_match_id]
-                        
-                        handle_new_game_request(conn, player_pseudo, addr)
-                        # Réinitialiser les variables pour le nouveau match
-                        player_match_id = None
-                        player_number = None
-                        break  # Sortir de la boucle de jeu pour attendre un nouveau match
-                    
-                except Exception as e:
-                    print(f"[!] Erreur lors du traitement des données de {addr} : {e}")
-                    break
+            frame = yield
+            if frame is None:
+                net_log.warning("Déconnexion de %s", addr)
+                return
+            conn.last_seen = time.monotonic()
+            dispatch_command(session, protocol.decode_command(frame, conn.wire_format))
                 
     except Exception as e:
-        print(f"[!] Erreur avec {addr} : {e}")
+        net_log.error("Erreur avec %s : %s", addr, e)
     finally:
-        # Nettoyer la connexion
-        with lock:
-            # Retirer de la queue si encore dedans
-            queue[:] = [(ip, port, p, c) for ip, port, p, c in queue if c != conn]
-            
-            # Gérer la déconnexion en plein match
-            if player_match_id and player_match_id in matches:
-                match = matches[player_match_id]
-                other_conn = match['player2_conn'] if player_number == 1 else match['player1_conn']
-                try:
-                    disconnect_message = json.dumps({
-                        'type': 'opponent_disconnected',
-                        'message': 'Votre adversaire s\'est déconnecté'
-                    })
-                    other_conn.sendall(disconnect_message.encode() + b'\n')
-                except:
-                    pass
-                del matches[player_match_id]
-        
+        if session is not None:
+            cleanup_player(session)
         conn.close()
 
-def handle_new_game_request(conn, pseudo, addr):
+def handle_client(sock, addr):
+    """Moteur threads : client_flow nourri par des lectures bloquantes"""
+    decoder = protocol.FrameDecoder()
+    flow = client_flow(ThreadedConnection(sock), addr, decoder)
+    next(flow)
+    # Le premier message peut venir d'un ancien client, sans délimiteur
+    recv = protocol.recv_first_frame
+    try:
+        while True:
+            try:
+                frame = recv(sock, decoder)
+            except Exception as e:
+                flow.throw(e)
+            else:
+                recv = protocol.recv_frame
+                flow.send(frame)
+    except StopIteration:
+        pass
+    finally:
+        flow.close()
+
+def cleanup_player(session):
+    """Retire un joueur déconnecté de la file et de son match éventuel"""
+    with queue_lock:
+        # Retirer de la queue si encore dedans
+        dequeue_player(session)
+    if session.owner is not None:
+        worker_node.send_worker(session.owner, 'disconnect', session.match_id, session.player_number)
+    if worker_node is not None:
+        worker_node.unregister(session)
+    
+    # Gérer la déconnexion en plein match
+    with registry_lock:
+        match = matches.pop(session.match_id, None)
+    if match is not None:
+        status_board.match_removed(match['match_id'])
+        record_abandon(match)
+        other_conn = match['player2_conn'] if session.player_number == 1 else match['player1_conn']
+        try:
+            other_conn.send({
+                'type': 'opponent_disconnected',
+                'message': 'Votre adversaire s\'est déconnecté'
+            })
+        except Exception:
+            pass
+
+def handle_new_game_request(session):
     """Gère une demande de nouvelle partie"""
+    pseudo = session.pseudo
     try:
-        print(f"[+] {pseudo} demande une nouvelle partie")
+        matchmaking_log.info("%s demande une nouvelle partie", pseudo)
         
-        with lock:
+        # Nettoyer l'ancien match s'il existe
+        if session.owner is not None:
+            worker_node.send_worker(session.owner, 'leave', session.match_id, session.player_number)
+        with registry_lock:
+            match = matches.pop(session.match_id, None)
+        if match is not None:
+            match_log.debug("Nettoyage de l'ancien match %s pour %s", session.match_id, pseudo)
+            status_board.match_removed(match['match_id'])
+            record_abandon(match)
+        
+        with queue_lock:
             # Ajouter le joueur à la file d'attente pour une nouvelle partie
-            queue.append((addr[0], addr[1], pseudo, conn))
-            print(f"[DEBUG] {pseudo} ajouté à la file d'attente pour une nouvelle partie")
+            session.leave_match()
+            enqueue_player(session)
+            matchmaking_log.debug("%s ajouté à la file d'attente pour une nouvelle partie", pseudo)
         
         # Confirmer que la demande a été reçue
-        response = json.dumps({
+        session.conn.send({
             'type': 'new_game_accepted',
             'message': 'En attente d\'un adversaire...'
         })
-        conn.sendall(response.encode() + b'\n')
         
     except Exception as e:
-        print(f"[!] Erreur lors de la gestion de nouvelle partie pour {pseudo}: {e}")
+        matchmaking_log.error("Erreur lors de la gestion de nouvelle partie pour %s: %s", pseudo, e)
 
 def handle_move(match_id, player_number, move):
     """Gère un coup joué par un joueur"""
+    start = time.perf_counter()
     try:
         i, j = int(move[0]), int(move[1])
         
-        with lock:
+        with registry_lock:
             match = matches.get(match_id)
-            if not match:
-                print(f"[!] Match {match_id} introuvable")
-                return
+        if not match:
+            move_log.warning("Match %s introuvable", match_id)
+            return
+        
+        with match['lock']:
+            move_log.debug("Move reçu: Match %s, Joueur %s, Tour actuel: %s", match_id, player_number, match['current_turn'])
             
-            print(f"[DEBUG] Move reçu: Match {match_id}, Joueur {player_number}, Tour actuel: {match['current_turn']}")
+            # Ignorer les coups envoyés avant l'état initial
+            if not match['started']:
+                move_log.warning("Coup reçu avant le démarrage du match %s", match_id)
+                return
             
             # Vérifier si la partie est finie
             if match['is_finished']:
-                print(f"[!] Tentative de jouer sur un match terminé {match_id}")
+                move_log.warning("Tentative de jouer sur un match terminé %s", match_id)
                 return  # Ne pas envoyer d'erreur, juste ignorer
             
             # Vérifier si c'est le tour du joueur
             if match['current_turn'] != player_number:
-                print(f"[!] Mauvais tour: attendu {match['current_turn']}, reçu {player_number}")
+                move_log.warning("Mauvais tour: attendu %s, reçu %s", match['current_turn'], player_number)
                 player_conn = match['player1_conn'] if player_number == 1 else match['player2_conn']
-                error_message = json.dumps({
+                player_conn.send({
                     'type': 'error',
                     'message': 'Ce n\'est pas votre tour!'
                 })
-                player_conn.sendall(error_message.encode() + b'\n')
                 return
             
-            board = list(match['board'])
-            index = i * 3 + j
+            index = i * GAME_RULES.size + j
+            if not (0 <= i < GAME_RULES.size and 0 <= j < GAME_RULES.size):
+                move_log.warning("Case %s,%s hors du plateau", i, j)
+                return
             
             # Vérifier si la case est vide
-            if board[index] != ' ':
-                print(f"[!] Case {i},{j} déjà occupée")
+            if not GAME_RULES.is_free(match['stones'], index):
+                move_log.warning("Case %s,%s déjà occupée", i, j)
                 player_conn = match['player1_conn'] if player_number == 1 else match['player2_conn']
-                error_message = json.dumps({
+                player_conn.send({
                     'type': 'error',
                     'message': 'Case déjà occupée!'
                 })
-                player_conn.sendall(error_message.encode() + b'\n')
                 return
             
-            # Jouer le coup
-            board[index] = 'X' if player_number == 1 else 'O'
-            match['board'] = ''.join(board)
-            
-            # Vérifier si la partie est terminée
-            is_over, winner = check_game_end(match['board'])
+            # Jouer le coup ; seuls les alignements passant par la case sont testés
+            symbol = game_logic.SYMBOLS[player_number]
+            is_over, winner = GAME_RULES.play(match['stones'], player_number, index)
+            match['seq'] += 1
+            match['last_activity'] = time.monotonic()
+            metrics.MOVES.inc()
+            if is_over:
+                metrics.MATCHES_FINISHED.inc()
+                status_board.match_status(match_id, monitoring.FINISHED, winner)
+                timers.schedule(FINISHED_MATCH_TTL, cleanup_finished_match, match_id)
+                update_ratings(match, winner)
             match['is_finished'] = is_over
             match['winner'] = winner
             
             # Changer de tour seulement si la partie n'est pas terminée
             if not is_over:
                 match['current_turn'] = 2 if player_number == 1 else 1
-                print(f"[DEBUG] Tour changé vers joueur {match['current_turn']}")
+                move_log.debug("Tour changé vers joueur %s", match['current_turn'])
             else:
-                print(f"[DEBUG] Partie terminée, gagnant: {winner}")
+                move_log.debug("Partie terminée, gagnant: %s", winner)
+            
+            if recorder is not None:
+                # Simple mise en file : l'écriture se fait hors du chemin du
+                # coup. L'instantané suit le changement de tour : il porte
+                # le joueur qui doit jouer ensuite.
+                # Pierres copiées telles quelles : l'écrivain encode le plateau
+                recorder.record_turn(match_id, player_number, f"{i}{j}")
+                if is_over:
+                    recorder.record_result(match_id, tuple(match['stones']), winner)
+                elif match['seq'] % SNAPSHOT_INTERVAL == 0:
+                    record_snapshot(match)
             
-            # Envoyer l'état du jeu mis à jour aux deux joueurs
-            send_game_state(match)
+            # Envoyer le coup aux deux joueurs : la mise en file ne bloque
+            # pas, et le verrou garantit l'ordre des numéros de séquence
+            send_game_delta(match, {
+                'type': 'game_delta',
+                'match_id': match_id,
+                'seq': match['seq'],
+                'cell': index,
+                'symbol': symbol,
+                'current_turn': match['current_turn'],
+                'is_finished': is_over,
+                'winner': winner
+            })
             
-            print(f"[+] Coup joué: Match {match_id}, Joueur {player_number}, Position ({i},{j})")
+            move_log.debug("Coup joué: Match %s, Joueur %s, Position (%s,%s)", match_id, player_number, i, j)
             
     except Exception as e:
-        print(f"[!] Erreur dans handle_move : {e}")
-        import traceback
-        traceback.print_exc()
+        move_log.exception("Erreur dans handle_move : %s", e)
+    finally:
+        metrics.HANDLE_MOVE.since(start)
+
+def update_ratings(match, winner):
+    """Met à jour le classement des deux joueurs d'un match terminé"""
+    if worker_node is not None:
+        # Le coordinateur tient les classements de tout le cluster
+        worker_node.send_coordinator('result', match['player1_pseudo'], match['player2_pseudo'], winner)
+        return
+    for pseudo, value, games in ratings.record_game(match['player1_pseudo'], match['player2_pseudo'], winner):
+        if recorder is not None:
+            recorder.record_rating(pseudo, value, games)
+
+def record_abandon(match):
+    """Enregistre en base la fin d'un match quitté avant son terme"""
+    if recorder is None:
+        return
+    with match['lock']:
+        if match['is_finished']:
+            return
+        stones = tuple(match['stones'])
+    recorder.record_result(match['match_id'], stones, None)
 
 def cleanup_finished_match(match_id):
-    """Nettoie un match terminé après un délai"""
-    with lock:
-        if match_id in matches:
-            print(f"[+] Nettoyage du match terminé {match_id}")
-            del matches[match_id]
+    """Nettoie un match terminé après FINISHED_MATCH_TTL (échéance programmée
+    par handle_move)"""
+    with registry_lock:
+        if matches.pop(match_id, None) is not None:
+            evictions['finished'] += 1
+            status_board.match_removed(match_id)
+            match_log.info("Nettoyage du match terminé %s", match_id)
+
+def check_idle_match(match_id):
+    """Échéance d'inactivité d'un match.
+
+    Les coups ne font que mettre à jour match['last_activity'] : s'il y a eu
+    un coup depuis la programmation, l'échéance est simplement reportée. Un
+    match a donc au plus une échéance d'inactivité en attente.
+    """
+    with registry_lock:
+        match = matches.get(match_id)
+    if match is None:
+        return
+    with match['lock']:
+        if match['is_finished']:
+            return
+        idle_for = time.monotonic() - match['last_activity']
+    if idle_for < IDLE_MATCH_TIMEOUT:
+        timers.schedule(IDLE_MATCH_TIMEOUT - idle_for, check_idle_match, match_id)
+        return
+    
+    with registry_lock:
+        if matches.pop(match_id, None) is None:
+            return
+        evictions['idle'] += 1
+    status_board.match_removed(match_id)
+    match_log.warning("Match %s abandonné après %.0f s sans coup", match_id, idle_for)
+    record_abandon(match)
+    for player_number in (1, 2):
+        conn = match[f'player{player_number}_conn']
+        if conn is not None:
+            conn.send({
+                'type': 'opponent_disconnected',
+                'message': 'Partie abandonnée (inactivité)'
+            })
 
 def notify_players_match_found(match_id, match):
-    """Notifie les deux joueurs qu'un match a été trouvé"""
+    """Notifie les deux joueurs qu'un match a été trouvé.
+
+    Appelé sans verrou : l'état initial ne part qu'après les deux READY
+    (voir handle_ready) ou à l'expiration de MATCH_START_TIMEOUT.
+    """
     try:
         # Notifier le joueur 1
-        message1 = json.dumps({
+        match['player1_conn'].send({
             'type': 'match_found',
             'match_id': match_id,
             'player_number': 1,
             'opponent': match['player2_pseudo']
         })
-        match['player1_conn'].sendall(message1.encode() + b'\n')
         
         # Notifier le joueur 2
-        message2 = json.dumps({
+        match['player2_conn'].send({
             'type': 'match_found',
             'match_id': match_id,
             'player_number': 2,
             'opponent': match['player1_pseudo']
         })
-        match['player2_conn'].sendall(message2.encode() + b'\n')
         
-        # Envoyer l'état initial du jeu
-        print(f"[DEBUG] Match {match_id} créé, état initial: {match}")
-        time.sleep(0.5)  # Petit délai pour laisser le temps au client de se préparer
-        send_game_state(match)
+        match_log.debug("Match %s créé entre %s et %s", match_id, match['player1_pseudo'], match['player2_pseudo'])
         
     except Exception as e:
-        print(f"[!] Erreur lors de la notification des joueurs : {e}")
+        match_log.error("Erreur lors de la notification des joueurs : %s", e)
 
-def matchmaking():
-    """Thread de matchmaking qui associe les joueurs en attente"""
+def start_match(match_id):
+    """Envoie l'état initial d'un match si ce n'est pas déjà fait"""
+    with registry_lock:
+        match = matches.get(match_id)
+    if match is None:
+        return
+    with match['lock']:
+        if match['started']:
+            return
+        match['started'] = True
+        if match['created_at'] is not None:
+            metrics.MATCH_START.observe(time.monotonic() - match['created_at'])
+        match_log.info("Démarrage du match %s", match_id)
+        # Mise en file sous le verrou : l'état initial (seq 0) précède
+        # toujours le premier delta
+        send_game_state(match)
+
+def handle_resync(session):
+    """Renvoie l'état complet du match à un client qui a détecté un trou
+    dans les numéros de séquence"""
+    with registry_lock:
+        match = matches.get(session.match_id)
+    if match is None:
+        return
+    with match['lock']:
+        if not match['started']:
+            return
+        move_log.debug("Resynchronisation de %s (match %s, seq %s)", session.pseudo, session.match_id, match['seq'])
+        session.conn.send(game_state(match), kind='state')
+
+def handle_ready(session):
+    """Accusé de réception de match_found : le client est prêt à jouer"""
+    with registry_lock:
+        match = matches.get(session.match_id)
+    if match is None:
+        return
+    with match['lock']:
+        match['ready_players'].add(session.player_number)
+        all_ready = len(match['ready_players']) == 2
+        if match['started']:
+            # READY arrivé après MATCH_START_TIMEOUT : l'état initial est
+            # parti avant que le client l'attende, il reçoit l'état courant
+            session.conn.send(game_state(match), kind='state')
+            return
+    
+    if all_ready:
+        start_match(session.match_id)
+
+def enqueue_player(session):
+    """Ajoute une session en fin de file (à appeler avec queue_lock tenu)"""
+    queue[session] = session.queued_at = now = time.monotonic()
+    show_waiting(session)
+    if worker_node is not None:
+        # Les paires du cluster sont formées par le coordinateur ; l'envoi
+        # ne fait que déposer le message dans la file du lien (aucune E/S
+        # sous queue_lock, voir cluster.Link)
+        if session.sid is None:
+            worker_node.register(session)
+        worker_node.send_coordinator('enqueue', worker_node.describe(session, now))
+    elif MATCHMAKING_MODE == 'rating':
+        rating_pool.add(session, ratings.get(session.pseudo), now)
+    queue_changed.notify()
+
+def dequeue_player(session):
+    """Retire une session de la file si elle y est (queue_lock tenu)"""
+    if queue.pop(session, None) is None:
+        return
+    status_board.player_left(session)
+    if worker_node is not None:
+        worker_node.send_coordinator('dequeue', worker_node.index, session.sid)
+    elif MATCHMAKING_MODE == 'rating':
+        rating_pool.remove(session)
+
+def pop_waiting_player():
+    """Retire le joueur le plus ancien encore connecté (queue_lock tenu)"""
+    while queue:
+        session, _ = queue.popitem(last=False)
+        status_board.player_left(session)
+        if session.conn.fileno() != -1 and not session.conn.closed:
+            return session
+    return None
+
+def show_waiting(session, front=False, value=None):
+    """Signale à la page de monitoring une session entrée en file, ou son
+    classement reçu du coordinateur (mode --workers : la table locale n'est
+    pas tenue à jour, le classement affiché d'abord est provisoire)"""
+    if value is None:
+        value = ratings.get(session.pseudo)
+    status_board.player_queued(session, session.pseudo, session.addr, value, front)
+
+def new_match(match_id, player1_conn, player2_conn, player1_pseudo, player2_pseudo):
+    """Dictionnaire d'un match au début de la partie"""
+    return {
+        'match_id': match_id,
+        'player1_conn': player1_conn,
+        'player2_conn': player2_conn,
+        'player1_pseudo': player1_pseudo,
+        'player2_pseudo': player2_pseudo,
+        'stones': [0, 0],  # pierres des joueurs 1 et 2 en bitboards
+        'current_turn': 1,  # Le joueur 1 (X) commence toujours
+        'is_finished': False,
+        'winner': None,
+        'seq': 0,  # incrémenté à chaque coup, porté par les états et les deltas
+        'started': False,
+        'ready_players': set(),
+        # Joueurs d'un match restauré qui ne se sont pas encore reconnectés
+        'missing_players': set(),
+        # Dernier coup (ou création) : voir check_idle_match
+        'last_activity': time.monotonic(),
+        # Création, pour la mesure du délai de démarrage (None : match restauré)
+        'created_at': time.monotonic(),
+        'lock': metrics.TimedLock('match')
+    }
+
+def record_snapshot(match):
+    """Enregistre un point de reprise du match (match['lock'] tenu ou match
+    pas encore publié)"""
+    recorder.record_snapshot(match['match_id'], match['seq'], tuple(match['stones']),
+                             match['current_turn'], match['player1_pseudo'], match['player2_pseudo'])
+
+def create_match(p1, p2, match_id=None):
+    """Crée le match entre deux sessions et le leur attribue (queue_lock tenu).
+
+    En mode --workers, match_id est attribué par le coordinateur.
+    """
     global match_id_counter
+    match = new_match(None, p1.conn, p2.conn, p1.pseudo, p2.pseudo)
+    with registry_lock:
+        if match_id is None:
+            match_id = match_id_counter
+            match_id_counter += 1
+        match['match_id'] = match_id
+        matches[match_id] = match
+    status_board.match_created(match_id, p1.pseudo, p2.pseudo)
+    if recorder is not None:
+        recorder.record_match(match_id, p1.addr, p2.addr, tuple(match['stones']))
+        record_snapshot(match)
+    timers.schedule(MATCH_START_TIMEOUT, start_match, match_id)
+    timers.schedule(IDLE_MATCH_TIMEOUT, check_idle_match, match_id)
+    metrics.MATCHES_CREATED.inc()
+    for session in (p1, p2):
+        if session.queued_at is not None:
+            metrics.QUEUE_WAIT.observe(match['created_at'] - session.queued_at)
+    
+    # Remettre le match directement aux deux sessions
+    p1.assign_match(match_id, 1)
+    p2.assign_match(match_id, 2)
+    
+    match_log.info("Match créé entre %s et %s (ID: %s)", p1.pseudo, p2.pseudo, match_id)
+    return match_id, match
+
+def restore_matches():
+    """Reconstruit les matchs en cours lors du dernier arrêt (avant le
+    démarrage des serveurs).
+
+    Chaque match repart de son dernier instantané, puis rejoue les tours
+    suivants. Il attend ensuite la reconnexion de ses joueurs (voir
+    resume_match) ; un match sans instantané ne peut pas être repris et
+    est enregistré comme abandonné.
+    """
+    restored = 0
+    for saved in recorder.load_unfinished():
+        match_id = saved['match_id']
+        if saved['snapshot'] is None:
+            recorder.record_result(match_id, saved['board'], None)
+            continue
+        seq, board, current_turn, pseudo1, pseudo2 = saved['snapshot']
+        match = new_match(match_id, None, None, pseudo1, pseudo2)
+        match['created_at'] = None
+        match['stones'] = GAME_RULES.from_string(board)
+        match['current_turn'] = current_turn
+        match['seq'] = seq
+        try:
+            for player_number, move in saved['turns']:
+                index = int(move[0]) * GAME_RULES.size + int(move[1])
+                is_over, winner = GAME_RULES.play(match['stones'], player_number, index)
+                match['seq'] += 1
+                match['current_turn'] = 2 if player_number == 1 else 1
+        except (ValueError, IndexError) as e:
+            match_log.error("Journal du match %s incohérent, abandon : %s", match_id, e)
+            recorder.record_result(match_id, GAME_RULES.to_string(match['stones']), None)
+            continue
+        if saved['turns'] and is_over:
+            # Dernier coup écrit mais pas le résultat
+            recorder.record_result(match_id, GAME_RULES.to_string(match['stones']), winner)
+            continue
+        
+        match['missing_players'] = {1, 2}
+        matches[match_id] = match
+        status_board.match_created(match_id, pseudo1, pseudo2, monitoring.RECONNECTING)
+        awaiting_reconnect[pseudo1] = (match_id, 1)
+        awaiting_reconnect[pseudo2] = (match_id, 2)
+        timers.schedule(RECONNECT_TIMEOUT, expire_restored_match, match_id)
+        timers.schedule(IDLE_MATCH_TIMEOUT, check_idle_match, match_id)
+        restored += 1
+    if restored:
+        match_log.info("%d match(s) restauré(s), en attente de reconnexion", restored)
+
+def resume_match(session):
+    """Rend à un joueur qui se reconnecte sa place dans un match restauré.
+
+    Retourne False si aucun match n'attend ce pseudo. Le match reprend,
+    avec l'état restauré, quand les deux joueurs ont envoyé READY.
+    """
+    with registry_lock:
+        claim = awaiting_reconnect.pop(session.pseudo, None)
+        match = matches.get(claim[0]) if claim is not None else None
+    if match is None:
+        return False
+    match_id, player_number = claim
+    with match['lock']:
+        match[f'player{player_number}_conn'] = session.conn
+        match['missing_players'].discard(player_number)
+        opponent = match['player2_pseudo'] if player_number == 1 else match['player1_pseudo']
+        if not match['missing_players']:
+            status_board.match_status(match_id, monitoring.IN_PROGRESS)
+    session.assign_match(match_id, player_number)
+    match_log.info("%s reprend le match %s (joueur %s)", session.pseudo, match_id, player_number)
+    session.conn.send({
+        'type': 'match_found',
+        'match_id': match_id,
+        'player_number': player_number,
+        'opponent': opponent,
+        'resumed': True
+    })
+    return True
+
+def expire_restored_match(match_id):
+    """Abandonne un match restauré dont un joueur ne s'est pas reconnecté"""
+    with registry_lock:
+        match = matches.get(match_id)
+        if match is None or not match['missing_players']:
+            return
+        del matches[match_id]
+        status_board.match_removed(match_id)
+        for player_number in (1, 2):
+            pseudo = match[f'player{player_number}_pseudo']
+            if awaiting_reconnect.get(pseudo, (None,))[0] == match_id:
+                del awaiting_reconnect[pseudo]
+    match_log.warning("Match restauré %s abandonné : joueur(s) %s absent(s)", match_id, sorted(match['missing_players']))
+    record_abandon(match)
+    for player_number in (1, 2):
+        conn = match[f'player{player_number}_conn']
+        if conn is not None:
+            conn.send({
+                'type': 'opponent_disconnected',
+                'message': 'Votre adversaire ne s\'est pas reconnecté'
+            })
+
+def matchmaking():
+    """Thread de matchmaking qui associe les joueurs dès que deux sont en attente"""
+    if MATCHMAKING_MODE == 'rating':
+        return matchmaking_by_rating()
+    while True:
+        with queue_changed:
+            while len(queue) < 2:
+                queue_changed.wait()
+            created = pair_waiting_players()
+        
+        # Les envois réseau se font une fois queue_lock relâché
+        for match_id, match in created:
+            notify_players_match_found(match_id, match)
+
+def pair_waiting_players():
+    """Apparie les joueurs en file deux à deux, dans l'ordre d'arrivée
+    (queue_lock tenu) ; retourne les (match_id, match) créés"""
+    created = []
+    while len(queue) >= 2:
+        # Les connexions fermées sont écartées au moment de l'appariement
+        p1 = pop_waiting_player()
+        p2 = pop_waiting_player()
+        if p2 is None:
+            if p1 is not None:
+                # Seul joueur valide : il reprend sa place en tête de file
+                queue[p1] = time.monotonic()
+                queue.move_to_end(p1, last=False)
+                show_waiting(p1, front=True)
+            break
+        
+        created.append(create_match(p1, p2))
+    return created
+
+def matchmaking_by_rating():
+    """matchmaking() en mode 'rating' : associe les joueurs de classements
+    proches.
+
+    Le thread ne se réveille qu'à une arrivée ou au prochain élargissement
+    d'écart prévu par rating_pool, et n'examine alors que les joueurs
+    concernés.
+    """
     while True:
-        with lock:
-            # Nettoyer la file d'attente des connexions fermées
-            queue[:] = [(ip, port, pseudo, conn) for ip, port, pseudo, conn in queue 
-                       if conn.fileno() != -1]
+        created = []
+        with queue_changed:
+            due = rating_pool.next_due()
+            while due is None or due > time.monotonic():
+                queue_changed.wait(None if due is None else due - time.monotonic())
+                due = rating_pool.next_due()
             
-            if len(queue) >= 2:
-                p1 = queue.pop(0)
-                p2 = queue.pop(0)
-                
-                match_id = match_id_counter
-                match_id_counter += 1
-                
-                matches[match_id] = {
-                    'player1_conn': p1[3],
-                    'player2_conn': p2[3],
-                    'player1_pseudo': p1[2],
-                    'player2_pseudo': p2[2],
-                    'board': ' ' * 9,
-                    'current_turn': 1,  # Le joueur 1 (X) commence toujours
-                    'is_finished': False,
-                    'winner': None
-                }
-                
-                print(f"[+] Match créé entre {p1[2]} et {p2[2]} (ID: {match_id})")
-                notify_players_match_found(match_id, matches[match_id])
+            for p1, p2, gap in rating_pool.pop_pairs(time.monotonic()):
+                # Une connexion fermée est écartée, l'autre joueur reprend
+                # sa place avec son ancienneté
+                closed = [s for s in (p1, p2) if s.conn.fileno() == -1 or s.conn.closed]
+                arrivals = {session: queue.pop(session) for session in (p1, p2)}
+                for session, arrived in arrivals.items():
+                    status_board.player_left(session)
+                    if closed and session not in closed:
+                        queue[session] = arrived
+                        rating_pool.add(session, ratings.get(session.pseudo), arrived)
+                        show_waiting(session)
+                if closed:
+                    continue
+                if arrivals[p2] < arrivals[p1]:
+                    # Comme en FIFO, le plus ancien joue X
+                    p1, p2 = p2, p1
+                matchmaking_log.debug("Appariement par classement : %s / %s, écart %.0f", p1.pseudo, p2.pseudo, gap)
+                created.append(create_match(p1, p2))
         
-        time.sleep(1)
+        for match_id, match in created:
+            notify_players_match_found(match_id, match)
 
-def start_server():
-    """Démarre le serveur de jeu principal"""
+def handle_cluster_message(op, *args):
+    """Message d'un autre processus du cluster (thread lecteur du lien,
+    un par processus émetteur : ses messages arrivent dans l'ordre)"""
+    if op == 'create':
+        create_cluster_match(*args)
+    elif op == 'joined':
+        join_remote_match(*args)
+    elif op == 'rated':
+        # Classement tenu par le coordinateur, pour la page de monitoring
+        sid, value = args
+        session = worker_node.session(sid)
+        with queue_lock:
+            if session is not None and session in queue:
+                show_waiting(session, value=value)
+    elif op == 'deliver':
+        # Trame déjà encodée par le worker du match pour un joueur local
+        sid, data, kind = args
+        session = worker_node.session(sid)
+        if session is not None:
+            session.conn.send_message(data, kind)
+    elif op == 'update':
+        sid, delta, snapshot = args
+        session = worker_node.session(sid)
+        if session is not None:
+            session.conn.send_update(delta, lambda: snapshot)
+    elif op in ('command', 'leave', 'disconnect'):
+        # Joueur relayé par un autre worker, vers un match tenu ici
+        session = remote_session(*args[:2])
+        if session is None:
+            return
+        if op == 'command':
+            dispatch_command(session, args[2])
+        elif op == 'leave':
+            with registry_lock:
+                match = matches.pop(session.match_id, None)
+            if match is not None:
+                status_board.match_removed(match['match_id'])
+                record_abandon(match)
+        else:
+            cleanup_player(session)
+
+def create_cluster_match(match_id, first, second):
+    """Crée ici le match formé par le coordinateur (le joueur 1 est local)"""
+    with queue_lock:
+        players = []
+        for player in (first, second):
+            if player['worker'] == worker_node.index:
+                session = worker_node.session(player['sid'])
+                if session is None or session not in queue or session.conn.closed:
+                    session = None
+            else:
+                conn = cluster.RemoteConnection(worker_node, player)
+                session = PlayerSession(conn, tuple(player['addr']), player['pseudo'])
+                # Horloge monotone commune aux processus de la machine
+                session.queued_at = player['arrived']
+            players.append(session)
+        if None in players:
+            # Un joueur est parti entre-temps : l'autre reprend sa place
+            survivors = [player for player, session in zip((first, second), players) if session is not None]
+            worker_node.send_coordinator('cancel', survivors)
+            return
+        for session in players:
+            queue.pop(session, None)
+            status_board.player_left(session)
+        match_id, match = create_match(*players, match_id=match_id)
+    if second['worker'] != worker_node.index:
+        # Envoyé avant match_found, sur le même lien
+        worker_node.send_worker(second['worker'], 'joined', second['sid'], match_id, worker_node.index)
+    notify_players_match_found(match_id, match)
+
+def join_remote_match(sid, match_id, owner):
+    """Le joueur local devient joueur 2 d'un match tenu par le worker owner"""
+    session = worker_node.session(sid)
+    with queue_lock:
+        waiting = session is not None and queue.pop(session, None) is not None
+        if waiting:
+            status_board.player_left(session)
+            session.owner = owner
+            session.assign_match(match_id, 2)
+    if not waiting:
+        worker_node.send_worker(owner, 'disconnect', match_id, 2)
+
+def remote_session(match_id, player_number):
+    """Session, sur le worker du match, d'un joueur connecté ailleurs"""
+    with registry_lock:
+        match = matches.get(match_id)
+    if match is None:
+        return None
+    session = PlayerSession(match[f'player{player_number}_conn'], None, match[f'player{player_number}_pseudo'])
+    session.match_id = match_id
+    session.player_number = player_number
+    return session
+
+def listen_socket():
+    """Socket d'écoute du serveur de jeu. En mode --workers, tous les
+    workers écoutent sur le même port (SO_REUSEPORT) et le noyau leur
+    répartit les connexions."""
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if worker_node is not None:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     server.bind((HOST, PORT))
+    return server
+
+def start_server():
+    """Démarre le serveur de jeu principal"""
+    server = listen_socket()
     server.listen()
-    print(f"[+] Serveur en écoute sur {HOST}:{PORT}")
+    log.info("Serveur en écoute sur %s:%s", HOST, PORT)
     
-    # Démarrer le thread de matchmaking
-    threading.Thread(target=matchmaking, daemon=True).start()
+    # Démarrer le thread de matchmaking (le coordinateur en mode --workers)
+    if worker_node is None:
+        threading.Thread(target=matchmaking, daemon=True).start()
+    socket_writer.start()
+    
+    while True:
+        sock, addr = server.accept()
+        threading.Thread(target=handle_client, args=(sock, addr)).start()
+
+async def handle_client_async(sock, addr):
+    """Moteur asyncio : client_flow nourri par des lectures non bloquantes,
+    sans thread dédié"""
+    loop = asyncio.get_running_loop()
+    decoder = protocol.FrameDecoder()
+    flow = client_flow(AsyncioConnection(sock, loop), addr, decoder)
+    next(flow)
+    recv = protocol.recv_first_frame_async
+    try:
+        while True:
+            try:
+                frame = await recv(loop, sock, decoder)
+            except Exception as e:
+                flow.throw(e)
+            else:
+                recv = protocol.recv_frame_async
+                flow.send(frame)
+    except StopIteration:
+        pass
+    finally:
+        flow.close()
+
+async def serve_asyncio():
+    loop = asyncio.get_running_loop()
+    server = listen_socket()
+    server.listen(socket.SOMAXCONN)
+    server.setblocking(False)
+    log.info("Serveur asyncio en écoute sur %s:%s", HOST, PORT)
     
     while True:
-        conn, addr = server.accept()
-        threading.Thread(target=handle_client, args=(conn, addr)).start()
+        sock, addr = await loop.sock_accept(server)
+        sock.setblocking(False)
+        loop.create_task(handle_client_async(sock, addr))
+
+def start_server_async():
+    """Démarre le serveur de jeu sur une boucle d'événements asyncio unique"""
+    if worker_node is None:
+        threading.Thread(target=matchmaking, daemon=True).start()
+    asyncio.run(serve_asyncio())
+
+def status_extras():
+    """Statistiques de la page lues sans verrou du jeu (valeurs simples,
+    éventuellement en retard d'un événement)"""
+    return {
+        'total_matches': match_id_counter - 1,
+        'evictions': dict(evictions),
+        'reaped': reaped_sessions,
+        'timers': timers.stats(),
+        'db': recorder.metrics() if recorder is not None else None,
+        'matchmaking': MATCHMAKING_MODE,
+        'worker': f"worker {worker_node.index} sur {WORKERS}" if worker_node else None
+    }
+
+def page_links(name, number, pages, other):
+    """Liens vers les pages voisines d'une liste ; other : paramètre de
+    l'autre liste, conservé"""
+    if pages == 1:
+        return ""
+    links = [f"Page {number} / {pages}"]
+    if number > 1:
+        links.insert(0, f'<a href="?{name}={number - 1}&{other}">&larr; précédente</a>')
+    if number < pages:
+        links.append(f'<a href="?{name}={number + 1}&{other}">suivante &rarr;</a>')
+    return f"<p>{' | '.join(links)}</p>"
+
+def render_status_page(snapshot, queue_page=1, match_page=1):
+    """Page HTML statique (/status) d'un instantané de status_board
+    (appelée par MyHandler, ou directement par les benchmarks)"""
+    extra = snapshot.extra
+    counts = snapshot.counts
+    waiting, queue_page, queue_pages = snapshot.page(snapshot.waiting, queue_page)
+    match_rows, match_page, match_pages = snapshot.page(snapshot.matches, match_page)
+    
+    # Détails des matchs
+    matches_html = ""
+    for match_id, pseudo1, pseudo2, state, winner in match_rows:
+        status = "Terminé" if state == monitoring.FINISHED else "En cours"
+        if state == monitoring.RECONNECTING:
+            status = "En attente de reconnexion"
+        winner_text = ""
+        if state == monitoring.FINISHED:
+            if winner == 0:
+                winner_text = " (Match nul)"
+            elif winner == 1:
+                winner_text = f" (Gagnant: {pseudo1})"
+            elif winner == 2:
+                winner_text = f" (Gagnant: {pseudo2})"
+        
+        matches_html += f"""
+        <li>Match {match_id}: {pseudo1} vs {pseudo2} - {status}{winner_text}</li>
+        """
+    
+    # Écrivain de la base (file bornée, écritures groupées)
+    db_html = "<p>Persistance désactivée</p>"
+    if extra['db'] is not None:
+        db = extra['db']
+        db_html = f"""
+            <p><strong>En attente d'écriture:</strong> {db['pending']} / {db['max_pending']}</p>
+            <p><strong>Événements écrits:</strong> {db['written']} en {db['batches']} transactions</p>
+            <p><strong>Événements abandonnés:</strong> {db['dropped']}</p>
+            <p><strong>Commit moyen / max:</strong> {db['avg_commit_ms']:.2f} ms / {db['max_commit_ms']:.2f} ms</p>
+        """
+    
+    # Joueurs en attente
+    queue_html = ""
+    for _, pseudo, (ip, port), value in waiting:
+        queue_html += f"<li>{pseudo} ({ip}:{port}) - classement {value:.0f}</li>"
+    
+    html = f"""
+    <html>
+    <head>
+        <title>Serveur TicTacToe - Monitoring</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; }}
+            .stats {{ background-color: #f0f0f0; padding: 15px; border-radius: 5px; margin-bottom: 20px; }}
+            .section {{ margin-bottom: 20px; }}
+            ul {{ background-color: #f9f9f9; padding: 10px; border-radius: 3px; }}
+        </style>
+    </head>
+    <body>
+        <h1>🎮 Serveur de Matchmaking TicTacToe</h1>
+        
+        <div class="stats">
+            <h2>📊 Statistiques</h2>
+            <p><strong>Joueurs en attente:</strong> {len(snapshot.waiting)} (appariement {extra['matchmaking']})</p>
+            <p><strong>Matchs en cours:</strong> {counts[monitoring.IN_PROGRESS] + counts[monitoring.RECONNECTING]}</p>
+            <p><strong>Matchs terminés:</strong> {counts[monitoring.FINISHED]}</p>
+            <p><strong>Total de matchs créés:</strong> {extra['total_matches']}</p>
+            <p><strong>Matchs expirés:</strong> {extra['evictions']['finished']} terminés, {extra['evictions']['idle']} inactifs</p>
+            <p><strong>Échéances en attente:</strong> {extra['timers']['pending']}</p>
+            <p><strong>Clients muets déconnectés:</strong> {extra['reaped']}</p>
+            {f"<p><strong>Processus:</strong> {extra['worker']}</p>" if extra['worker'] else ""}
+        </div>
+        
+        <div class="stats">
+            <h2>💾 Persistance</h2>
+            {db_html}
+        </div>
+        
+        <div class="section">
+            <h2>⏳ Joueurs en attente</h2>
+            <ul>
+                {queue_html if queue_html else "<li>Aucun joueur en attente</li>"}
+            </ul>
+            {page_links('queue_page', queue_page, queue_pages, f'match_page={match_page}')}
+        </div>
+        
+        <div class="section">
+            <h2>🎯 Matchs</h2>
+            <ul>
+                {matches_html if matches_html else "<li>Aucun match en cours</li>"}
+            </ul>
+            {page_links('match_page', match_page, match_pages, f'queue_page={queue_page}')}
+        </div>
+        
+        <p><em>Instantané n° {snapshot.serial} (version {snapshot.version}) ;
+        <a href="/">tableau de bord en direct</a></em></p>
+    </body>
+    </html>
+    """
+    
+    return html
+
+# Tableau de bord en direct (/) : état initial et changements reçus de
+# /events (Server-Sent Events), appliqués dans le navigateur ; l'affichage
+# est redessiné au plus quatre fois par seconde
+LIVE_PAGE = """
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Serveur TicTacToe - Monitoring</title>
+        <style>
+            body { font-family: Arial, sans-serif; margin: 20px; }
+            .stats { background-color: #f0f0f0; padding: 15px; border-radius: 5px; margin-bottom: 20px; }
+            .section { margin-bottom: 20px; }
+            ul { background-color: #f9f9f9; padding: 10px; border-radius: 3px; }
+        </style>
+    </head>
+    <body>
+        <h1>🎮 Serveur de Matchmaking TicTacToe</h1>
+        
+        <div class="stats">
+            <h2>📊 Statistiques</h2>
+            <div id="stats"></div>
+            <p><em id="connection">Connexion...</em></p>
+        </div>
+        
+        <div class="section">
+            <h2>⏳ Joueurs en attente</h2>
+            <ul id="queue"></ul>
+        </div>
+        
+        <div class="section">
+            <h2>🎯 Matchs</h2>
+            <ul id="matches"></ul>
+        </div>
+        
+        <p><em>Mise à jour en direct ; <a href="/status">page statique</a></em></p>
+        
+        <script>
+            const SHOWN = 200;
+            const STATUS = {in_progress: 'En cours', finished: 'Terminé', reconnecting: 'En attente de reconnexion'};
+            let version = 0, extra = null, timer = null;
+            let waiting = new Map(), matches = new Map();
+            let counts = {in_progress: 0, finished: 0, reconnecting: 0};
+
+            function escape(text) {
+                const span = document.createElement('span');
+                span.textContent = text;
+                return span.innerHTML;
+            }
+
+            function matchLine([id, pseudo1, pseudo2, status, winner]) {
+                let text = `Match ${id}: ${pseudo1} vs ${pseudo2} - ${STATUS[status]}`;
+                if (status === 'finished') {
+                    text += winner === 0 ? ' (Match nul)' : ` (Gagnant: ${winner === 1 ? pseudo1 : pseudo2})`;
+                }
+                return text;
+            }
+
+            function waitingLine([key, pseudo, [ip, port], rating]) {
+                return `${pseudo} (${ip}:${port}) - classement ${Math.round(rating)}`;
+            }
+
+            function renderList(element, items, line, empty) {
+                const rows = [];
+                for (const item of items.values()) {
+                    if (rows.length === SHOWN) break;
+                    rows.push(`<li>${escape(line(item))}</li>`);
+                }
+                if (!rows.length) rows.push(`<li>${empty}</li>`);
+                else if (items.size > SHOWN) rows.push(`<li>... et ${items.size - SHOWN} autres</li>`);
+                element.innerHTML = rows.join('');
+            }
+
+            function render() {
+                timer = null;
+                const lines = [
+                    ['Joueurs en attente', `${waiting.size} (appariement ${extra.matchmaking})`],
+                    ['Matchs en cours', counts.in_progress + counts.reconnecting],
+                    ['Matchs terminés', counts.finished],
+                    ['Total de matchs créés', extra.total_matches],
+                    ['Matchs expirés', `${extra.evictions.finished} terminés, ${extra.evictions.idle} inactifs`],
+                    ['Échéances en attente', extra.timers.pending],
+                    ['Clients muets déconnectés', extra.reaped]
+                ];
+                if (extra.worker) lines.push(['Processus', extra.worker]);
+                if (extra.db) lines.push(['Écritures en attente', `${extra.db.pending} / ${extra.db.max_pending}`]);
+                document.getElementById('stats').innerHTML = lines.map(
+                    ([label, value]) => `<p><strong>${label}:</strong> ${escape(String(value))}</p>`).join('');
+                renderList(document.getElementById('queue'), waiting, waitingLine, 'Aucun joueur en attente');
+                renderList(document.getElementById('matches'), matches, matchLine, 'Aucun match en cours');
+            }
+
+            function schedule() {
+                if (timer === null && extra !== null) timer = setTimeout(render, 250);
+            }
+
+            function setMatch(match) {
+                const previous = matches.get(match[0]);
+                if (previous) counts[previous[3]]--;
+                matches.set(match[0], match);
+                counts[match[3]]++;
+            }
+
+            const source = new EventSource('/events');
+            // Événements versionnés : ceux que l'instantané contient déjà sont ignorés
+            function on(kind, apply) {
+                source.addEventListener(kind, (event) => {
+                    if (Number(event.lastEventId) <= version) return;
+                    version = Number(event.lastEventId);
+                    apply(JSON.parse(event.data));
+                    schedule();
+                });
+            }
+
+            source.addEventListener('snapshot', (event) => {
+                const state = JSON.parse(event.data);
+                version = state.version;
+                extra = state.extra;
+                waiting = new Map(state.waiting.map((player) => [player[0], player]));
+                matches = new Map();
+                counts = {in_progress: 0, finished: 0, reconnecting: 0};
+                state.matches.forEach(setMatch);
+                schedule();
+            });
+            source.addEventListener('stats', (event) => {
+                extra = JSON.parse(event.data).extra;
+                schedule();
+            });
+            on('match_created', setMatch);
+            on('match_finished', (data) => {
+                const match = matches.get(data.match_id);
+                if (match) setMatch([...match.slice(0, 3), data.status, data.winner]);
+            });
+            on('match_updated', (data) => {
+                const match = matches.get(data.match_id);
+                if (match) setMatch([...match.slice(0, 3), data.status, data.winner]);
+            });
+            on('match_removed', (data) => {
+                const match = matches.get(data.match_id);
+                if (match) {
+                    counts[match[3]]--;
+                    matches.delete(data.match_id);
+                }
+            });
+            on('queue_join', (data) => {
+                if (data.front) waiting = new Map([[data.player[0], data.player], ...waiting]);
+                else waiting.set(data.player[0], data.player);
+            });
+            on('queue_leave', (data) => waiting.delete(data.key));
+            source.onopen = () => { document.getElementById('connection').textContent = 'En direct'; };
+            source.onerror = () => { document.getElementById('connection').textContent = 'Reconnexion...'; };
+        </script>
+    </body>
+    </html>
+""".encode()
+
+def page_param(params, name):
+    """Numéro de page d'un paramètre de requête (1 si absent ou invalide)"""
+    value = params.get(name, ['1'])[0]
+    return int(value) if value.isdigit() else 1
+
+def sample_throughput():
+    """Relevé des compteurs pour les débits de /metrics.json, chaque seconde"""
+    metrics.sample_rates()
+    timers.schedule(METRICS_SAMPLE_INTERVAL, sample_throughput)
 
 class MyHandler(SimpleHTTPRequestHandler):
     def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/logs':
+            # Derniers événements du tampon circulaire, à la demande
+            self.send_body('\n'.join(logs.dump()), "text/plain; charset=utf-8")
+            return
+        if url.path == '/metrics':
+            self.send_body(metrics.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+            return
+        if url.path == '/metrics.json':
+            self.send_body(json.dumps(metrics.to_json()), "application/json")
+            return
+        if url.path == '/events':
+            self.stream_events()
+            return
+        if url.path != '/status':
+            self.send_body(LIVE_PAGE, "text/html; charset=utf-8")
+            return
+        
+        # Page statique : rendue une fois par instantané et par page, puis
+        # servie telle quelle à tous les visiteurs
+        params = parse_qs(url.query)
+        snapshot = status_board.snapshot(status_extras)
+        key = (
+            snapshot.page(snapshot.waiting, page_param(params, 'queue_page'))[1],
+            snapshot.page(snapshot.matches, page_param(params, 'match_page'))[1]
+        )
+        body = snapshot.rendered.get(key)
+        if body is None:
+            body = snapshot.rendered[key] = render_status_page(snapshot, *key).encode()
+        self.send_body(body, "text/html; charset=utf-8")
+
+    def stream_events(self):
+        """Flux Server-Sent Events : instantané, puis lots d'événements
+        préparés par event_stream, jusqu'à la déconnexion du navigateur
+        (ce thread du serveur HTTP lui est dédié)"""
+        subscriber, initial = event_stream.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header("Content-type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            # Délai de reconnexion du navigateur (ms)
+            self.wfile.write(b"retry: 2000\n\n" + initial)
+            while not subscriber.dropped:
+                self.wfile.write(subscriber.next_batch())
+        except OSError:
+            pass  # navigateur fermé
+        finally:
+            event_stream.unsubscribe(subscriber)
+
+    def send_body(self, body, content_type):
+        if isinstance(body, str):
+            body = body.encode()
         self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.send_header("refresh", "5")  # Auto-refresh toutes les 5 secondes
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        
-        # Page d'état du serveur
-        with lock:
-            # Détails des matchs
-            matches_html = ""
-            for match_id, match in matches.items():
-                status = "Terminé" if match['is_finished'] else "En cours"
-                winner_text = ""
-                if match['is_finished']:
-                    if match['winner'] == 0:
-                        winner_text = " (Match nul)"
-                    elif match['winner'] == 1:
-                        winner_text = f" (Gagnant: {match['player1_pseudo']})"
-                    elif match['winner'] == 2:
-                        winner_text = f" (Gagnant: {match['player2_pseudo']})"
-                
-                matches_html += f"""
-                <li>Match {match_id}: {match['player1_pseudo']} vs {match['player2_pseudo']} - {status}{winner_text}</li>
-                """
-            
-            # Joueurs en attente
-            queue_html = ""
-            for ip, port, pseudo, conn in queue:
-                queue_html += f"<li>{pseudo} ({ip}:{port})</li>"
-            
-            html = f"""
-            <html>
-            <head>
-                <title>Serveur TicTacToe - Monitoring</title>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                    .stats {{ background-color: #f0f0f0; padding: 15px; border-radius: 5px; margin-bottom: 20px; }}
-                    .section {{ margin-bottom: 20px; }}
-                    ul {{ background-color: #f9f9f9; padding: 10px; border-radius: 3px; }}
-                </style>
-            </head>
-            <body>
-                <h1>🎮 Serveur de Matchmaking TicTacToe</h1>
-                
-                <div class="stats">
-                    <h2>📊 Statistiques</h2>
-                    <p><strong>Joueurs en attente:</strong> {len(queue)}</p>
-                    <p><strong>Matchs en cours:</strong> {len([m for m in matches.values() if not m['is_finished']])}</p>
-                    <p><strong>Matchs terminés:</strong> {len([m for m in matches.values() if m['is_finished']])}</p>
-                    <p><strong>Total de matchs créés:</strong> {match_id_counter - 1}</p>
-                </div>
-                
-                <div class="section">
-                    <h2>⏳ Joueurs en attente</h2>
-                    <ul>
-                        {queue_html if queue_html else "<li>Aucun joueur en attente</li>"}
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h2>🎯 Matchs</h2>
-                    <ul>
-                        {matches_html if matches_html else "<li>Aucun match en cours</li>"}
-                    </ul>
-                </div>
-                
-                <p><em>Page actualisée automatiquement toutes les 5 secondes</em></p>
-            </body>
-            </html>
-            """
-        
-        self.wfile.write(html.encode())
+        self.wfile.write(body)
 
 def signal_handler(sig, frame):
-    print("\n[!] Arrêt du serveur...")
+    log.warning("Arrêt du serveur...")
+    if recorder is not None:
+        recorder.close()
+    logs.flush()
     sys.exit(0)
 
-if __name__ == "__main__":
-    signal.signal(signal.SIGINT, signal_handler)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serveur de matchmaking TicTacToe")
+    parser.add_argument('--mode', choices=SERVER_MODES, default=MODE,
+                        help="moteur de connexion : un thread de lecture par client et un "
+                             "thread d'écriture partagé, ou asyncio")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help="nombre de processus workers partageant le port (SO_REUSEPORT)")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--http-port', type=int, default=HTTP_PORT)
+    parser.add_argument('--slow-client-policy', choices=SLOW_CLIENT_POLICIES, default=SLOW_CLIENT_POLICY,
+                        help="traitement d'un client dont la file d'envoi est pleine")
+    parser.add_argument('--outbox-size', type=int, default=OUTBOX_MAX_MESSAGES,
+                        help="nombre maximal de messages en attente d'envoi par client")
+    parser.add_argument('--matchmaking', choices=MATCHMAKING_MODES, default=MATCHMAKING_MODE,
+                        help="appariement dans l'ordre d'arrivée ou par classement Elo proche")
+    parser.add_argument('--rating-gap', type=float, default=rating_pool.initial_gap,
+                        help="écart de classement accepté à l'arrivée en file (mode rating)")
+    parser.add_argument('--rating-widen', type=float, default=rating_pool.widen_by,
+                        help="élargissement de l'écart toutes les --rating-widen-every secondes d'attente")
+    parser.add_argument('--rating-widen-every', type=float, default=rating_pool.widen_every)
+    parser.add_argument('--db', default=DB_PATH,
+                        help="base SQLite des matchs et des tours (vide : pas de persistance)")
+    parser.add_argument('--heartbeat-interval', type=float, default=HEARTBEAT_INTERVAL,
+                        help="silence (s) après lequel un client reçoit un ping")
+    parser.add_argument('--heartbeat-timeout', type=float, default=HEARTBEAT_TIMEOUT,
+                        help="silence (s) après lequel un client est déconnecté")
+    parser.add_argument('--idle-client-timeout', type=float, default=IDLE_CLIENT_TIMEOUT,
+                        help="silence (s) après lequel un client sans 'heartbeat' est déconnecté")
+    parser.add_argument('--finished-ttl', type=float, default=FINISHED_MATCH_TTL,
+                        help="durée (s) de conservation d'un match terminé")
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_MATCH_TIMEOUT,
+                        help="durée (s) sans coup après laquelle un match est abandonné")
+    parser.add_argument('--reconnect-timeout', type=float, default=RECONNECT_TIMEOUT,
+                        help="délai (s) laissé aux joueurs d'un match restauré pour se reconnecter")
+    parser.add_argument('--log-level', choices=logs.LEVELS, default='info',
+                        help="niveau des messages affichés ('debug' : chaque message et chaque coup)")
+    parser.add_argument('--log-ring-level', choices=logs.LEVELS,
+                        help="niveau gardé dans le tampon de /logs (par défaut --log-level)")
+    parser.add_argument('--log-sample', type=logs.parse_sampling, default={},
+                        help="échantillonnage du niveau debug par catégorie, ex. move=100,net=10 "
+                             f"(catégories : {', '.join(logs.CATEGORIES)})")
+    return parser.parse_args()
+
+def run_services(http_port):
+    """Démarre la roue de temporisation, le serveur de jeu et la page de
+    monitoring du processus courant (ne rend pas la main)"""
+    global event_stream
+    timers.start()
+    timers.schedule(METRICS_SAMPLE_INTERVAL, sample_throughput)
     
     # Démarrer le serveur de jeu dans un thread
-    threading.Thread(target=start_server, daemon=True).start()
+    target = start_server_async if MODE == 'asyncio' else start_server
+    log.info("Mode de connexion : %s, appariement : %s", MODE, MATCHMAKING_MODE)
+    threading.Thread(target=target, daemon=True).start()
     
-    # Démarrer le serveur HTTP pour monitoring
-    with HTTPServer((HOST, HTTP_PORT), MyHandler) as http_server:
-        print(f"[+] Serveur HTTP en écoute sur {HOST}:{HTTP_PORT}")
+    # Démarrer le serveur HTTP pour monitoring : un thread par requête, un
+    # navigateur lent ou un flux /events ne bloque pas les autres
+    event_stream = monitoring.EventStream(status_board, status_extras)
+    with ThreadingHTTPServer((HOST, http_port), MyHandler) as http_server:
+        log.info("Serveur HTTP en écoute sur %s:%s", HOST, http_port)
         try:
             http_server.serve_forever()
         except KeyboardInterrupt:
-            print("\n[!] Serveurs arrêtés.")
\ No newline at end of file
+            log.warning("Serveurs arrêtés.")
+
+def run_worker(index, socket_dir, authkey):
+    """Processus worker : un serveur complet, sans matchmaking ni reprise
+    des matchs interrompus ; sa page de monitoring est sur HTTP_PORT + index"""
+    global worker_node, recorder
+    logs.setup(*LOG_CONFIG)
+    worker_node = cluster.WorkerNode(index, socket_dir, authkey, handle_cluster_message)
+    if DB_PATH:
+        recorder = database.MatchRecorder(DB_PATH)
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    log.info("Worker %s démarré (pid %s)", index, os.getpid())
+    run_services(HTTP_PORT + index)
+
+def run_coordinator(socket_dir, authkey):
+    """Processus coordinateur : matchmaking et classements du cluster"""
+    global recorder
+    logs.setup(*LOG_CONFIG)
+    next_match_id = 1
+    if DB_PATH:
+        recorder = database.MatchRecorder(DB_PATH)
+        next_match_id = recorder.next_match_id()
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    cluster.Coordinator(socket_dir, authkey, MATCHMAKING_MODE, rating_pool, next_match_id, recorder).run()
+
+def start_cluster():
+    """Mode --workers N : fork du coordinateur et des N workers, qui héritent
+    de la configuration. Ce processus ne fait que les surveiller : si l'un
+    d'eux s'arrête, tout le cluster est arrêté."""
+    if DB_PATH:
+        # Schéma et mode WAL créés une fois, avant les écrivains concurrents
+        database.connect(DB_PATH).close()
+    # Répertoire privé (0700) des sockets Unix, clé d'authentification des liens
+    socket_dir = tempfile.mkdtemp(prefix='tictactoe-')
+    authkey = os.urandom(32)
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=run_coordinator, args=(socket_dir, authkey), name='coordinator')]
+    processes += [context.Process(target=run_worker, args=(index, socket_dir, authkey), name=f'worker-{index}')
+                  for index in range(WORKERS)]
+    for process in processes:
+        process.start()
+    log.info("Cluster de %s workers sur %s:%s", WORKERS, HOST, PORT)
+    try:
+        multiprocessing.connection.wait([process.sentinel for process in processes])
+        for process in processes:
+            if process.exitcode is not None:
+                log.error("%s arrêté (code %s), arrêt du cluster", process.name, process.exitcode)
+    except KeyboardInterrupt:
+        log.warning("Arrêt du cluster...")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    args = parse_args()
+    MODE, WORKERS = args.mode, args.workers
+    HOST, PORT, HTTP_PORT = args.host, args.port, args.http_port
+    SLOW_CLIENT_POLICY, OUTBOX_MAX_MESSAGES = args.slow_client_policy, args.outbox_size
+    RECONNECT_TIMEOUT = args.reconnect_timeout
+    FINISHED_MATCH_TTL, IDLE_MATCH_TIMEOUT = args.finished_ttl, args.idle_timeout
+    HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT = args.heartbeat_interval, args.heartbeat_timeout
+    IDLE_CLIENT_TIMEOUT = args.idle_client_timeout
+    MATCHMAKING_MODE = args.matchmaking
+    rating_pool = rating.RatingPool(args.rating_gap, args.rating_widen, args.rating_widen_every)
+    DB_PATH = args.db
+    LOG_CONFIG = (args.log_level, args.log_ring_level, args.log_sample)
+    logs.setup(*LOG_CONFIG)
+    if WORKERS > 1:
+        start_cluster()
+        sys.exit(0)
+    if DB_PATH:
+        recorder = database.MatchRecorder(DB_PATH)
+        # Les identifiants continuent après ceux déjà en base
+        match_id_counter = recorder.next_match_id()
+        log.info("Persistance dans %s (prochain match : %s)", DB_PATH, match_id_counter)
+        ratings.load(recorder.load_ratings())
+        restore_matches()
+    signal.signal(signal.SIGINT, signal_handler)
+    run_services(HTTP_PORT)
@@ -0,0 +1,120 @@
+"""Roue de temporisation (hashed timing wheel) partagée par le serveur.
+
+Une seule roue et un seul thread servent toutes les échéances : démarrage
+des matchs, expiration des matchs finis ou inactifs, reconnexions... La
+roue a `slots` cases de `tick` secondes ; une échéance va dans la case de
+son tick d'expiration (modulo la taille de la roue) avec ce tick absolu, si
+bien qu'un délai plus long qu'un tour de roue reste simplement dans sa case
+jusqu'au bon passage.
+
+Programmer et annuler coûtent O(1) ; chaque tick ne parcourt que sa case.
+La précision est d'un tick : une échéance expire au plus `tick` secondes en
+retard, jamais en avance.
+"""
+import logging
+import math
+import threading
+import time
+
+log = logging.getLogger('server.timers')
+
+
+class Timer:
+    """Échéance programmée ; cancel() l'annule si elle n'a pas expiré"""
+
+    __slots__ = ('wheel', 'deadline_tick', 'callback', 'args')
+
+    def __init__(self, wheel, deadline_tick, callback, args):
+        self.wheel = wheel
+        self.deadline_tick = deadline_tick
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        return self.wheel.cancel(self)
+
+
+class TimerWheel:
+    """Roue de `slots` cases de `tick` secondes.
+
+    Les rappels s'exécutent sur le thread de la roue (start()), hors de son
+    verrou : ils peuvent prendre les verrous du serveur ou reprogrammer une
+    échéance. Le verrou de la roue n'est jamais tenu en appelant du code
+    extérieur, il peut donc être pris sous n'importe quel autre verrou.
+    """
+
+    def __init__(self, tick=0.1, slots=512, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.slots = [dict() for _ in range(slots)]
+        self.lock = threading.Lock()
+        self.origin = clock()
+        self.current_tick = 0  # prochain tick à traiter
+        self.pending = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def schedule(self, delay, callback, *args):
+        """Appelle callback(*args) dans delay secondes (arrondi au tick supérieur)"""
+        with self.lock:
+            # Premier tick qui commence après l'échéance ; au plus tôt le
+            # prochain tick à traiter
+            expiry = self.clock() - self.origin + delay
+            deadline_tick = max(math.ceil(expiry / self.tick), self.current_tick)
+            timer = Timer(self, deadline_tick, callback, args)
+            self.slots[deadline_tick % len(self.slots)][timer] = None
+            self.pending += 1
+        return timer
+
+    def cancel(self, timer):
+        """Retourne False si l'échéance a déjà expiré ou été annulée"""
+        with self.lock:
+            slot = self.slots[timer.deadline_tick % len(self.slots)]
+            if timer not in slot:
+                return False
+            del slot[timer]
+            self.pending -= 1
+            self.cancelled += 1
+        return True
+
+    def advance(self):
+        """Traite les ticks écoulés et exécute les rappels expirés ;
+        retourne le nombre de rappels exécutés"""
+        now_tick = int((self.clock() - self.origin) / self.tick)
+        due = []
+        with self.lock:
+            while self.current_tick <= now_tick:
+                slot = self.slots[self.current_tick % len(self.slots)]
+                for timer in [t for t in slot if t.deadline_tick <= self.current_tick]:
+                    del slot[timer]
+                    due.append(timer)
+                self.current_tick += 1
+            self.pending -= len(due)
+            self.fired += len(due)
+        for timer in due:
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                log.error("Erreur dans une échéance %s : %s", timer.callback.__name__, e)
+        return len(due)
+
+    def stats(self):
+        with self.lock:
+            return {'pending': self.pending, 'fired': self.fired, 'cancelled': self.cancelled}
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='timer-wheel', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.advance()
+            next_tick = self.origin + self.current_tick * self.tick
+            self.stopped.wait(max(0.0, next_tick - self.clock()))
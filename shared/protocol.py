@@ -0,0 +1,409 @@
+"""Protocole commun au client et au serveur : découpage du flux TCP en trames.
+
+Par défaut, chaque message est une trame UTF-8 terminée par '\\n' :
+- client -> serveur : le pseudo, puis des commandes texte (MOVE:ij, READY,
+  NEW_GAME) ;
+- serveur -> client : des objets JSON (et le texte d'attente initial).
+
+Le client peut négocier un format binaire en envoyant d'abord la trame
+"PROTO:binary" ; le serveur répond "PROTO_OK:<format retenu>" et, dans ce
+format, les trames sont préfixées par leur longueur (2 octets) et commencent
+par un octet de type (voir MSG_*). Les états de jeu et les coups y ont une
+disposition fixe ; les autres messages restent du JSON dans une trame binaire.
+
+La négociation peut aussi demander des options après une virgule
+("PROTO:binary,delta") ; le serveur confirme celles qu'il accepte. Avec
+'delta', chaque coup n'envoie que la case jouée (game_delta) : l'état complet
+(game_state) n'est envoyé qu'au démarrage, sur RESYNC, ou quand des deltas
+ont été perdus. Les deux portent le numéro de séquence 'seq' du match.
+En JSON aussi, le delta est compact pour rester plus court que l'état :
+{"type":"game_delta","d":[match, seq, case, symbole, octet d'état]}, sans
+espaces, avec le même octet d'état que le format binaire ; decode_message
+le redéploie en dictionnaire complet, comme pour le format binaire.
+Avec 'heartbeat', le serveur envoie {'type': 'ping'} à un client silencieux,
+qui doit répondre par la commande PONG ; sans réponse, il est déconnecté.
+
+TCP ne conserve pas les frontières des envois : un recv() peut contenir une
+demi-trame ou plusieurs trames collées. FrameDecoder reconstitue les trames
+de façon incrémentale, dans un tampon réutilisé rempli par recv_into().
+
+Les clients d'avant ce découpage envoient leurs messages sans délimiteur
+(le pseudo, MOVE:ij, NEW_GAME) : le serveur d'alors prenait chaque recv()
+pour un message. recv_first_frame les reconnaît à leur premier message,
+resté sans délimiteur pendant LEGACY_FRAME_DELAY, et passe le décodeur en
+FRAMING_LEGACY, qui reprend cette règle. Ils reçoivent des lignes JSON
+complètes, comme avant ; n'envoyant jamais READY, leurs matchs démarrent à
+l'expiration du délai de démarrage du serveur.
+"""
+import asyncio
+import json
+import socket
+import struct
+
+FRAME_DELIMITER = b'\n'
+# Taille maximale d'une trame (délimiteur exclu) : au-delà, le pair est fautif
+MAX_FRAME_SIZE = 4096
+
+# Découpage des trames : lignes, ou longueur en préfixe (format binaire)
+FRAMING_LINE = 'line'
+FRAMING_LENGTH = 'length'
+LENGTH_PREFIX = struct.Struct('!H')
+# Anciens clients sans délimiteur : chaque lecture de la socket est un message
+FRAMING_LEGACY = 'legacy'
+# Attente du délimiteur d'un premier message au-delà de laquelle le client
+# est pris pour un ancien client (secondes)
+LEGACY_FRAME_DELAY = 0.5
+
+# Formats de message négociables à la connexion ('json' par défaut)
+WIRE_FORMATS = ('json', 'binary')
+HANDSHAKE_PREFIX = 'PROTO:'
+HANDSHAKE_REPLY_PREFIX = 'PROTO_OK:'
+# Options négociables en plus du format
+FEATURES = ('delta', 'heartbeat')
+
+# Types de message du format binaire (premier octet de la trame)
+MSG_JSON = 0x01   # message JSON quelconque
+MSG_TEXT = 0x02   # texte brut : commandes du client, messages d'attente
+MSG_STATE = 0x03  # état de jeu : match, tour/fin/gagnant, 9 cases
+MSG_MOVE = 0x04   # coup du client : indice de la case (0-8)
+MSG_DELTA = 0x05  # coup joué : match, séquence, case, symbole, tour/fin/gagnant
+
+# type, match_id, seq, octet d'état, plateau (' ', 'X', 'O')
+STATE_STRUCT = struct.Struct('!BIHB9s')
+MOVE_STRUCT = struct.Struct('!BB')
+# type, match_id, seq, case, symbole, octet d'état
+DELTA_STRUCT = struct.Struct('!BIHBcB')
+# Octet d'état : bits 0-1 joueur au trait, bit 2 partie finie, bits 3-4 gagnant
+WINNER_CODES = {None: 0, 1: 1, 2: 2, 0: 3}
+WINNERS = {code: winner for winner, code in WINNER_CODES.items()}
+# Encodeur JSON sans espaces du delta, créé une fois (json.dumps avec
+# separators en construit un à chaque appel)
+_compact_json = json.JSONEncoder(separators=(',', ':')).encode
+
+
+class ProtocolError(Exception):
+    """Flux invalide (trame trop longue ou mal formée)"""
+
+
+class FrameDecoder:
+    """Décodeur incrémental de trames, indépendant de toute E/S.
+
+    Utilisation avec une socket :
+        n = sock.recv_into(decoder.get_buffer())
+        decoder.buffer_updated(n)
+        for frame in decoder.frames(): ...
+
+    ou trame par trame avec next_frame() (voir recv_frame).
+    """
+
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE, buffer_size=None, framing=FRAMING_LINE):
+        self.max_frame_size = max_frame_size
+        self.framing = framing
+        self._buffer = bytearray(buffer_size or 4 * (max_frame_size + 1))
+        self._view = memoryview(self._buffer)
+        self._start = 0  # début des données pas encore découpées
+        self._end = 0    # fin des données reçues
+        self._scan = 0   # tout ce qui précède a déjà été parcouru sans délimiteur
+
+    def get_buffer(self):
+        """Zone libre où écrire les prochains octets reçus"""
+        if self._end == len(self._buffer):
+            self._compact()
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes):
+        """Signale que nbytes octets ont été écrits dans get_buffer()"""
+        self._end += nbytes
+
+    def pending(self):
+        """Nombre d'octets reçus qui n'appartiennent encore à aucune trame"""
+        return self._end - self._start
+
+    def set_framing(self, framing):
+        """Change de découpage (après la négociation) ; les octets déjà reçus
+        appartiennent aux trames suivantes et sont relus dans le nouveau mode"""
+        self.framing = framing
+        self._scan = self._start
+
+    def next_frame(self):
+        """Retourne la prochaine trame complète (bytes), ou None"""
+        if self.framing == FRAMING_LENGTH:
+            return self._next_length_frame()
+        if self.framing == FRAMING_LEGACY:
+            return self._next_legacy_frame()
+        index = self._buffer.find(FRAME_DELIMITER, self._scan, self._end)
+        if index == -1:
+            self._wait_for_delimiter()
+            return None
+        if index - self._start > self.max_frame_size:
+            raise ProtocolError(f"Trame de plus de {self.max_frame_size} octets")
+        frame = bytes(self._view[self._start:index])
+        self._start = self._scan = index + 1
+        if self._start == self._end:
+            # Tampon vide : on repart du début sans recopie
+            self._start = self._end = self._scan = 0
+        return frame
+
+    def _next_length_frame(self):
+        available = self._end - self._start
+        if available < LENGTH_PREFIX.size:
+            return None
+        (length,) = LENGTH_PREFIX.unpack_from(self._buffer, self._start)
+        if length > self.max_frame_size:
+            raise ProtocolError(f"Trame de plus de {self.max_frame_size} octets")
+        if available < LENGTH_PREFIX.size + length:
+            return None
+        begin = self._start + LENGTH_PREFIX.size
+        frame = bytes(self._view[begin:begin + length])
+        self._start = self._scan = begin + length
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+        return frame
+
+    def _next_legacy_frame(self):
+        if self._start == self._end:
+            return None
+        if self._end - self._start > self.max_frame_size:
+            raise ProtocolError(f"Trame de plus de {self.max_frame_size} octets")
+        frame = bytes(self._view[self._start:self._end])
+        self._start = self._end = self._scan = 0
+        return frame
+
+    def frames(self):
+        """Retourne toutes les trames complètes disponibles, découpées en un
+        seul passage (utile quand un recv_into en apporte beaucoup)"""
+        if self.framing == FRAMING_LENGTH:
+            return list(iter(self._next_length_frame, None))
+        if self.framing == FRAMING_LEGACY:
+            return list(iter(self._next_legacy_frame, None))
+        last = self._buffer.rfind(FRAME_DELIMITER, self._scan, self._end)
+        if last == -1:
+            self._wait_for_delimiter()
+            return []
+        frames = bytes(self._view[self._start:last]).split(FRAME_DELIMITER)
+        if max(map(len, frames)) > self.max_frame_size:
+            raise ProtocolError(f"Trame de plus de {self.max_frame_size} octets")
+        self._start = self._scan = last + 1
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+        return frames
+
+    def _wait_for_delimiter(self):
+        """Aucune trame complète : retenir la position et vérifier la taille"""
+        self._scan = self._end
+        if self._end - self._start > self.max_frame_size:
+            raise ProtocolError(f"Trame de plus de {self.max_frame_size} octets")
+
+    def _compact(self):
+        pending = self._end - self._start
+        if pending >= len(self._buffer):
+            raise ProtocolError("Tampon de réception plein")
+        self._buffer[:pending] = self._buffer[self._start:self._end]
+        self._scan -= self._start
+        self._start, self._end = 0, pending
+
+
+def encode_frame(payload, framing=FRAMING_LINE):
+    """Encadre une charge utile (bytes ou str) en trame prête à envoyer"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError("Charge utile trop longue pour une trame")
+    if framing == FRAMING_LENGTH:
+        return LENGTH_PREFIX.pack(len(payload)) + payload
+    if FRAME_DELIMITER in payload:
+        raise ProtocolError("Délimiteur dans la charge utile d'une trame")
+    return payload + FRAME_DELIMITER
+
+
+def encode_json(message):
+    """Trame JSON d'un message serveur"""
+    return encode_frame(json.dumps(message))
+
+
+def framing_for(wire_format):
+    return FRAMING_LENGTH if wire_format == 'binary' else FRAMING_LINE
+
+
+def encode_handshake(wire_format, features=(), prefix=HANDSHAKE_PREFIX):
+    """Trame de négociation (PROTO:) ou de réponse (PROTO_OK:)"""
+    return encode_frame(prefix + ','.join((wire_format, *features)))
+
+
+def parse_handshake(text, prefix=HANDSHAKE_PREFIX):
+    """(format, options reconnues) d'une trame de négociation ; format et
+    options inconnus sont ignorés (repli sur json sans option)"""
+    wire_format, *features = text[len(prefix):].split(',')
+    if wire_format not in WIRE_FORMATS:
+        wire_format = 'json'
+    return wire_format, {feature for feature in features if feature in FEATURES}
+
+
+def _status(message):
+    return message['current_turn'] | (message['is_finished'] << 2) | \
+        (WINNER_CODES[message['winner']] << 3)
+
+
+def _unpack_status(status):
+    return status & 0x3, bool(status & 0x4), WINNERS[(status >> 3) & 0x3]
+
+
+def _delta_message(match_id, seq, cell, symbol, status):
+    current_turn, is_finished, winner = _unpack_status(status)
+    return {
+        'type': 'game_delta',
+        'match_id': match_id,
+        'seq': seq,
+        'cell': cell,
+        'symbol': symbol,
+        'current_turn': current_turn,
+        'is_finished': is_finished,
+        'winner': winner
+    }
+
+
+def encode_message(message, wire_format='json'):
+    """Trame d'un message serveur (dict) dans le format négocié"""
+    if wire_format != 'binary':
+        if message['type'] == 'game_delta':
+            return encode_frame(_compact_json({
+                'type': 'game_delta',
+                'd': [message['match_id'], message['seq'], message['cell'],
+                      message['symbol'], _status(message)]
+            }))
+        return encode_json(message)
+    if message['type'] == 'game_state':
+        payload = STATE_STRUCT.pack(MSG_STATE, message['match_id'], message['seq'],
+                                    _status(message), message['board'].encode('ascii'))
+    elif message['type'] == 'game_delta':
+        payload = DELTA_STRUCT.pack(MSG_DELTA, message['match_id'], message['seq'],
+                                    message['cell'], message['symbol'].encode('ascii'),
+                                    _status(message))
+    else:
+        payload = bytes((MSG_JSON,)) + json.dumps(message).encode()
+    return encode_frame(payload, FRAMING_LENGTH)
+
+
+def decode_message(frame, wire_format='json'):
+    """Message serveur (dict) d'une trame ; le texte brut devient
+    {'type': 'text', 'message': ...}"""
+    if wire_format != 'binary':
+        try:
+            message = json.loads(frame)
+        except ValueError:
+            return {'type': 'text', 'message': frame.decode().strip()}
+        if type(message) is dict and message.get('type') == 'game_delta':
+            return _delta_message(*message['d'])
+        return message
+    kind = frame[0]
+    if kind == MSG_STATE:
+        _, match_id, seq, status, board = STATE_STRUCT.unpack(frame)
+        current_turn, is_finished, winner = _unpack_status(status)
+        return {
+            'type': 'game_state',
+            'match_id': match_id,
+            'seq': seq,
+            'board': board.decode('ascii'),
+            'current_turn': current_turn,
+            'is_finished': is_finished,
+            'winner': winner
+        }
+    if kind == MSG_DELTA:
+        _, match_id, seq, cell, symbol, status = DELTA_STRUCT.unpack(frame)
+        return _delta_message(match_id, seq, cell, symbol.decode('ascii'), status)
+    if kind == MSG_JSON:
+        return json.loads(frame[1:])
+    if kind == MSG_TEXT:
+        return {'type': 'text', 'message': frame[1:].decode()}
+    raise ProtocolError(f"Type de message inconnu : {kind}")
+
+
+def encode_text(text, wire_format='json'):
+    """Trame de texte brut (pseudo, commande, message d'attente)"""
+    if wire_format != 'binary':
+        return encode_frame(text)
+    return encode_frame(bytes((MSG_TEXT,)) + text.encode(), FRAMING_LENGTH)
+
+
+def encode_command(command, wire_format='json'):
+    """Trame d'une commande client ; MOVE:ij est compacté en binaire"""
+    if wire_format == 'binary' and command.startswith("MOVE:"):
+        cell = int(command[5]) * 3 + int(command[6])
+        return encode_frame(MOVE_STRUCT.pack(MSG_MOVE, cell), FRAMING_LENGTH)
+    return encode_text(command, wire_format)
+
+
+def decode_command(frame, wire_format='json'):
+    """Commande client (str) d'une trame, quel que soit le format"""
+    if wire_format != 'binary':
+        return frame.decode().strip()
+    kind = frame[0]
+    if kind == MSG_MOVE:
+        _, cell = MOVE_STRUCT.unpack(frame)
+        return f"MOVE:{cell // 3}{cell % 3}"
+    if kind == MSG_TEXT:
+        return frame[1:].decode().strip()
+    raise ProtocolError(f"Type de commande inconnu : {kind}")
+
+
+def recv_frame(sock, decoder):
+    """Lit la prochaine trame sur une socket bloquante (None à la déconnexion)"""
+    frame = decoder.next_frame()
+    while frame is None:
+        nbytes = sock.recv_into(decoder.get_buffer())
+        if not nbytes:
+            return None
+        decoder.buffer_updated(nbytes)
+        frame = decoder.next_frame()
+    return frame
+
+
+def recv_first_frame(sock, decoder, delay=LEGACY_FRAME_DELAY):
+    """recv_frame pour le premier message d'une connexion : des octets restés
+    delay secondes sans délimiteur viennent d'un ancien client, et le
+    décodeur passe en FRAMING_LEGACY (socket bloquante, sans timeout)"""
+    frame = decoder.next_frame()
+    try:
+        while frame is None:
+            sock.settimeout(delay if decoder.pending() else None)
+            try:
+                nbytes = sock.recv_into(decoder.get_buffer())
+            except socket.timeout:
+                decoder.set_framing(FRAMING_LEGACY)
+                return decoder.next_frame()
+            if not nbytes:
+                return None
+            decoder.buffer_updated(nbytes)
+            frame = decoder.next_frame()
+    finally:
+        sock.settimeout(None)
+    return frame
+
+
+async def recv_frame_async(loop, sock, decoder):
+    """Équivalent asyncio de recv_frame pour une socket non bloquante"""
+    frame = decoder.next_frame()
+    while frame is None:
+        nbytes = await loop.sock_recv_into(sock, decoder.get_buffer())
+        if not nbytes:
+            return None
+        decoder.buffer_updated(nbytes)
+        frame = decoder.next_frame()
+    return frame
+
+
+async def recv_first_frame_async(loop, sock, decoder, delay=LEGACY_FRAME_DELAY):
+    """Équivalent asyncio de recv_first_frame pour une socket non bloquante"""
+    frame = decoder.next_frame()
+    while frame is None:
+        try:
+            nbytes = await asyncio.wait_for(loop.sock_recv_into(sock, decoder.get_buffer()),
+                                            delay if decoder.pending() else None)
+        except asyncio.TimeoutError:
+            decoder.set_framing(FRAMING_LEGACY)
+            return decoder.next_frame()
+        if not nbytes:
+            return None
+        decoder.buffer_updated(nbytes)
+        frame = decoder.next_frame()
+    return frame